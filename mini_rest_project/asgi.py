@@ -0,0 +1,17 @@
+"""
+ASGI config for mini_rest_project project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+e.g. for ``gunicorn -k uvicorn.workers.UvicornWorker mini_rest_project.asgi:application``.
+List and detail reads of the API run as async views; everything else goes
+through the WSGI application in a thread pool.
+"""
+
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mini_rest_project.settings")
+
+from mini_rest_project.wsgi import application as wsgi_application  # noqa
+from movie_database.asgi import ASGIHandler  # noqa
+
+application = ASGIHandler(wsgi_application)
@@ -0,0 +1,16 @@
+"""
+gunicorn settings of mini_rest_project, passed with `-c` in the Procfile.
+"""
+
+
+def post_worker_init(worker):
+    """
+    Build the autocomplete index once the worker loaded the application,
+    before it takes requests.
+    """
+    from django.db import connections
+    from movie_database.autocomplete import warm_autocomplete_index
+
+    warm_autocomplete_index()
+    # the threads serving requests open their own connections
+    connections.close_all()
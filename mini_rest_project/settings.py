@@ -36,10 +36,14 @@ INSTALLED_APPS = (
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'django_filters',
     'movie_database'
 )
 
 MIDDLEWARE_CLASSES = (
+    'movie_database.profiling.SamplingProfilerMiddleware',
+    'movie_database.compression.CompressionMiddleware',
+    'movie_database.replicas.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -48,6 +52,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'movie_database.metrics.RequestMetricsMiddleware',
 )
 
 ROOT_URLCONF = 'mini_rest_project.urls'
@@ -80,6 +85,128 @@ DATABASES = {
     }
 }
 
+DATABASE_ROUTERS = ['movie_database.replicas.ReplicaRouter']
+
+# Read replicas. Safe requests read from one of the REPLICAS aliases, picked
+# per request, and writes go to PRIMARY. A client that wrote reads from the
+# primary for PIN_SECONDS, the replication lag to expect, through the COOKIE
+# and HEADER set on the response to its write.
+
+API_DATABASE_ROUTING = {
+    'PRIMARY': 'default',
+    'REPLICAS': (),
+    'PIN_SECONDS': 5,
+    'COOKIE': 'read_primary_until',
+    'HEADER': 'X-Read-Primary-Until',
+}
+
+# Keyset pagination of the movie_database API
+# API_MAX_PAGE_SIZE caps the `page_size` query parameter.
+
+API_PAGE_SIZE = 100
+
+API_MAX_PAGE_SIZE = 1000
+
+# Rows serialized per chunk by the streaming `export` routes
+
+API_EXPORT_CHUNK_SIZE = 500
+
+# Response cache of the list and detail endpoints, invalidated by model
+# signals once the write commits. 'lru' keeps MAX_ENTRIES responses in each
+# worker, for TIMEOUT seconds since other workers' writes do not reach it;
+# 'django' uses the Django cache named by ALIAS, shared between workers.
+# None disables it.
+
+API_RESPONSE_CACHE = {
+    'BACKEND': 'lru',
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 60,
+}
+
+# Serve the movie list and detail views from the pre-rendered
+# MovieReadModel table, which model signals keep in sync while this is on.
+# Run `manage.py rebuild_movie_read_model` after turning it on.
+
+API_MOVIE_READ_MODEL = False
+
+# In-memory prefix index of the `autocomplete` endpoint, built by every
+# worker at startup and kept up to date by model signals. Each worker
+# rebuilds it after REFRESH seconds to pick up writes made by the others;
+# entries beyond MAX_ENTRIES are left out. An entry takes about 150 bytes;
+# `manage.py benchmark_autocomplete` measures a million of them.
+
+API_AUTOCOMPLETE = {
+    'MAX_ENTRIES': 1000000,
+    'REFRESH': 600,
+}
+
+# Per-request instrumentation: query count, query, serialization and render
+# time per route name, sent in a Server-Timing header unless SERVER_TIMING
+# is off ('staff' sends it to staff users only), and exported at /metrics.
+# With several worker processes, each writes its metrics to DIRECTORY every
+# FLUSH_INTERVAL seconds for /metrics to merge; the snapshots of workers that
+# exited are removed SNAPSHOT_EXPIRY seconds after their last write. TOKEN
+# is the bearer token /metrics requires; without one, /metrics is served
+# only with DEBUG on. None disables it.
+
+API_METRICS = {
+    'SERVER_TIMING': True,
+    'DIRECTORY': None,
+    'FLUSH_INTERVAL': 10,
+    'SNAPSHOT_EXPIRY': 3600,
+    'TOKEN': None,
+}
+
+# Sampling profiler, off while None. Requests are profiled at SAMPLE_RATE,
+# e.g. 0.001, and when they send HEADER with TOKEN as its value. Their stacks
+# are sampled every INTERVAL seconds, 0.01 by default, and written per route
+# to DIRECTORY every FLUSH_INTERVAL seconds as collapsed stacks for
+# flamegraph.pl or speedscope, with the TOP hottest frames of the FOCUS
+# modules, e.g.
+# {'SAMPLE_RATE': 0, 'TOKEN': 'secret', 'DIRECTORY': '/tmp/profiles'}
+
+API_PROFILER = None
+
+# Thread pool of the async views served by mini_rest_project.asgi. Each
+# thread keeps its own database connections, so THREADS also bounds the
+# connections of an ASGI worker.
+
+API_ASYNC = {
+    'THREADS': 16,
+}
+
+# Response compression. ENCODINGS lists the codings to offer in order of
+# preference, brotli ('br') and 'zstd' being used only when installed.
+# LEVELS overrides the default levels; `manage.py benchmark_compression`
+# shows the CPU cost and the bytes saved at each level.
+
+API_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'ENCODINGS': ('br', 'zstd', 'gzip'),
+    'LEVELS': {'br': 4, 'zstd': 3, 'gzip': 6},
+}
+
+# Django REST framework. FastJSONRenderer encodes with orjson or ujson when
+# one of them is installed and falls back to the standard library json.
+# MessagePack and CBOR are negotiated through the Accept and Content-Type
+# headers, using msgpack and cbor2 when installed.
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'movie_database.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'movie_database.renderers.MessagePackRenderer',
+        'movie_database.renderers.CBORRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'movie_database.parsers.MessagePackParser',
+        'movie_database.parsers.CBORParser',
+    ),
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
 
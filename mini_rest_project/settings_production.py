@@ -0,0 +1,91 @@
+"""
+Production settings for mini_rest_project, selected with
+DJANGO_SETTINGS_MODULE=mini_rest_project.settings_production.
+
+The database is read from DATABASE_URL, e.g. the one of the
+heroku-postgresql addon.
+"""
+
+import dj_database_url
+
+from mini_rest_project.settings import *  # noqa
+
+DEBUG = False
+
+# Comma separated host names, e.g. 'example.herokuapp.com'
+ALLOWED_HOSTS = [host for host in os.environ.get('ALLOWED_HOSTS', '*').split(',') if host]
+
+# Database
+# Connections are kept open for CONN_MAX_AGE seconds, so a worker does not
+# pay for the connection handshake on every request.
+
+DATABASES = {
+    'default': dj_database_url.config(
+        default='sqlite:///' + os.path.join(BASE_DIR, 'db.sqlite3'),
+        conn_max_age=int(os.environ.get('CONN_MAX_AGE', 600)),
+    )
+}
+
+# Read replicas, as comma separated URLs in DATABASE_REPLICA_URLS
+
+for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(','))):
+    DATABASES['replica%d' % index] = dj_database_url.parse(url, conn_max_age=DATABASES['default']['CONN_MAX_AGE'])
+    DATABASES['replica%d' % index]['TEST'] = {'MIRROR': 'default'}
+
+API_DATABASE_ROUTING = dict(API_DATABASE_ROUTING, REPLICAS=tuple(alias for alias in DATABASES if alias != 'default'))
+
+# With DATABASE_POOL_MAX_SIZE set, PostgreSQL connections are borrowed from
+# a pool of each worker process and given back at the end of every request,
+# so threaded workers share MAX_SIZE connections. Idle connections are
+# checked with 'SELECT 1' after CHECK_INTERVAL seconds, and closed once
+# they are MAX_LIFETIME seconds old.
+
+for settings_dict in DATABASES.values():
+    if os.environ.get('DATABASE_POOL_MAX_SIZE') and \
+            settings_dict['ENGINE'] == 'django.db.backends.postgresql_psycopg2':
+        settings_dict.update({
+            'ENGINE': 'movie_database.pool',
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                'MIN_SIZE': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 1)),
+                'MAX_SIZE': int(os.environ['DATABASE_POOL_MAX_SIZE']),
+                'TIMEOUT': float(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+                'CHECK_INTERVAL': float(os.environ.get('DATABASE_POOL_CHECK_INTERVAL', 30)),
+                'MAX_LIFETIME': float(os.environ.get('DATABASE_POOL_MAX_LIFETIME', 3600)),
+            },
+        })
+
+# Responses are cached in files shared by the gunicorn workers, so a write
+# through one worker invalidates the responses of all of them
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIRECTORY', '/tmp/mini_rest_project-cache'),
+        'OPTIONS': {'MAX_ENTRIES': 1024},
+    }
+}
+
+API_RESPONSE_CACHE = {
+    'BACKEND': 'django',
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# Metrics of the gunicorn workers, merged by /metrics, which answers 404
+# until METRICS_TOKEN is set. The Server-Timing header, which gives away
+# query counts and timings, goes to staff only.
+
+API_METRICS = dict(API_METRICS, SERVER_TIMING='staff',
+                   DIRECTORY=os.environ.get('METRICS_DIRECTORY', '/tmp/mini_rest_project-metrics'),
+                   TOKEN=os.environ.get('METRICS_TOKEN'))
+
+# Profile requests drawn at PROFILER_SAMPLE_RATE, or sending X-Profile with
+# PROFILER_TOKEN
+
+if os.environ.get('PROFILER_SAMPLE_RATE') or os.environ.get('PROFILER_TOKEN'):
+    API_PROFILER = {
+        'SAMPLE_RATE': float(os.environ.get('PROFILER_SAMPLE_RATE', 0)),
+        'TOKEN': os.environ.get('PROFILER_TOKEN'),
+        'DIRECTORY': os.environ.get('PROFILER_DIRECTORY', '/tmp/mini_rest_project-profiles'),
+    }
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MovieDatabaseConfig(AppConfig):
+    name = 'movie_database'
+
+    def ready(self):
+        # connect the model signal handlers
+        from movie_database import signals  # noqa
+        from movie_database import read_model  # noqa
+        from movie_database import search  # noqa
+        from movie_database import autocomplete  # noqa
+        # time the queries of connections opened before the first request
+        from movie_database import metrics  # noqa
+        from movie_database import prometheus  # noqa
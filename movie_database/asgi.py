@@ -0,0 +1,218 @@
+import sys
+import threading
+from io import BytesIO
+
+from django.core import signals
+from django.core.handlers import base
+from django.core.handlers.wsgi import WSGIRequest, get_path_info, get_script_name
+from django.core.urlresolvers import Resolver404, get_resolver, set_script_prefix
+
+from movie_database.async_views import AsyncReadMixin, ThreadRunner
+
+
+def build_environ(scope, body):
+    """
+    Return the WSGI environ of the ASGI HTTP `scope` and request `body`.
+    """
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # WSGI strings carry the bytes of the URL decoded as ISO-8859-1
+        'SCRIPT_NAME': script_name.encode('utf-8').decode('iso-8859-1'),
+        'PATH_INFO': path.encode('utf-8').decode('iso-8859-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('iso-8859-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': str(client[0]),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = value.decode('latin-1')
+        environ[name] = environ[name] + ',' + value if name in environ else value
+    return environ
+
+
+def encode_headers(headers):
+    return [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+
+def response_headers(response):
+    headers = list(response.items())
+    for cookie in response.cookies.values():
+        headers.append(('Set-Cookie', cookie.output(header='')))
+    return headers
+
+
+class ASGIHandler(base.BaseHandler):
+    """
+    ASGI application serving the `list` and `retrieve` actions of viewsets
+    with `AsyncReadMixin` on the event loop, their blocking calls running in
+    the thread executor. Every other request goes to `wsgi_application` in
+    the executor, so both entry points behave the same.
+    """
+    request_class = WSGIRequest
+    init_lock = threading.Lock()
+
+    def __init__(self, wsgi_application):
+        super().__init__()
+        self.wsgi_application = wsgi_application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError('Unsupported ASGI scope type %r' % scope['type'])
+
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        environ = build_environ(scope, b''.join(body))
+
+        view = self.resolve_async_view(environ)
+        if view is None:
+            await self.send_wsgi_response(environ, send)
+        else:
+            await self.send_async_response(environ, view, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def resolve_async_view(self, environ):
+        """
+        Return the resolver match of a request going to an async action, or
+        `None`.
+        """
+        # DRF gives HEAD requests to viewsets no action
+        if environ['REQUEST_METHOD'] != 'GET':
+            return None
+        try:
+            match = get_resolver(None).resolve(get_path_info(environ))
+        except Resolver404:
+            return None
+        cls = getattr(match.func, 'cls', None)
+        if cls is None or not issubclass(cls, AsyncReadMixin):
+            return None
+        if match.func.actions.get('get') not in cls.async_actions:
+            return None
+        return match
+
+    async def send_wsgi_response(self, environ, send):
+        run = ThreadRunner()
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [int(status.split(' ', 1)[0]), headers]
+
+        result = await run(self.wsgi_application, environ, start_response)
+        try:
+            chunks = iter(result)
+            chunk = await run(next, chunks, None)
+            await send({'type': 'http.response.start', 'status': started[0],
+                        'headers': encode_headers(started[1])})
+            while chunk is not None:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await run(next, chunks, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                await run(result.close)
+
+    async def send_async_response(self, environ, match, send):
+        if self._request_middleware is None:
+            with self.init_lock:
+                if self._request_middleware is None:
+                    self.load_middleware()
+
+        set_script_prefix(get_script_name(environ))
+        run = ThreadRunner()
+        signals.request_started.send(sender=self.__class__, environ=environ)
+        request = self.request_class(environ)
+        try:
+            response = await run(self.process_request, request, match)
+            if response is None:
+                response = await self.call_async_view(request, match)
+        except Exception:
+            response = await run(self.handle_exception, request, sys.exc_info())
+        try:
+            response = await run(self.process_response, request, response)
+        except Exception:
+            response = await run(self.handle_exception, request, sys.exc_info())
+        response._closable_objects.append(request)
+
+        try:
+            await send({'type': 'http.response.start', 'status': response.status_code,
+                        'headers': encode_headers(response_headers(response))})
+            if response.streaming:
+                chunks = iter(response.streaming_content)
+                chunk = await run(next, chunks, None)
+                while chunk is not None:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                    chunk = await run(next, chunks, None)
+                await send({'type': 'http.response.body', 'body': b''})
+            else:
+                await send({'type': 'http.response.body', 'body': response.content})
+        finally:
+            response.close()
+
+    def process_request(self, request, match):
+        """
+        Run the request and view middleware, returning the response one of
+        them gave, if any.
+        """
+        for middleware_method in self._request_middleware:
+            response = middleware_method(request)
+            if response:
+                return response
+        request.resolver_match = match
+        for middleware_method in self._view_middleware:
+            response = middleware_method(request, match.func, match.args, match.kwargs)
+            if response:
+                return response
+        return None
+
+    async def call_async_view(self, request, match):
+        cls = match.func.cls
+        view = cls(**match.func.initkwargs)
+        view.action_map = match.func.actions
+        for method, action in match.func.actions.items():
+            setattr(view, method, getattr(view, action))
+        return await view.async_dispatch(request, *match.args, **match.kwargs)
+
+    def handle_exception(self, request, exc_info):
+        signals.got_request_exception.send(sender=self.__class__, request=request)
+        return self.handle_uncaught_exception(request, get_resolver(None), exc_info)
+
+    def process_response(self, request, response):
+        if hasattr(response, 'render') and callable(response.render):
+            for middleware_method in self._template_response_middleware:
+                response = middleware_method(request, response)
+            response = response.render()
+        for middleware_method in self._response_middleware:
+            response = middleware_method(request, response)
+        return self.apply_response_fixes(request, response)
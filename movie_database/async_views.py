@@ -0,0 +1,197 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.urlresolvers import get_script_prefix, set_script_prefix
+from django.db import close_old_connections
+from django.http import Http404
+from rest_framework import status
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+
+from movie_database.compiled import compile_serializer
+from movie_database.metrics import set_recorder
+from movie_database.profiling import set_profile
+from movie_database.replicas import set_read_database
+
+_executor = []
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the thread pool running the blocking work of async views. Each
+    of its threads keeps its own database connections for `CONN_MAX_AGE`
+    seconds, as a request thread would; pooled ones go back after every
+    call.
+    """
+    if not _executor:
+        with _executor_lock:
+            if not _executor:
+                threads = getattr(settings, 'API_ASYNC', {}).get('THREADS', 16)
+                _executor.append(ThreadPoolExecutor(threads))
+    return _executor[0]
+
+
+class ThreadRunner(object):
+    """
+    Runs the blocking calls of `request` in the executor, with the script
+    prefix of the calling thread, the read database of the request, its
+    metrics recorder and its profile. Connections that are too old or
+    broken are closed before and after each call.
+    """
+
+    def __init__(self, request=None):
+        self.read_database = getattr(request, 'read_database', None)
+        self.recorder = getattr(request, 'metrics', None)
+        self.profile = getattr(request, 'profile', None)
+        self.script_prefix = get_script_prefix()
+
+    def call(self, func, *args, **kwargs):
+        # request_started and request_finished fire on the event loop thread,
+        # so the connections of this thread are checked around every call
+        close_old_connections()
+        set_script_prefix(self.script_prefix)
+        set_read_database(self.read_database)
+        set_recorder(self.recorder)
+        set_profile(self.profile)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            set_read_database(None)
+            set_recorder(None)
+            set_profile(None)
+            close_old_connections()
+
+    def __call__(self, func, *args, **kwargs):
+        return asyncio.get_event_loop().run_in_executor(get_executor(), partial(self.call, func, *args, **kwargs))
+
+
+class AsyncReadMixin(object):
+    """
+    Async `list` and `retrieve` for the ASGI entry point. Queries that do
+    not depend on each other run concurrently in the executor: the page or
+    the object, the many relations of a detail view, and the conditional
+    GET state. Requests the compiled serializer cannot render run the
+    regular action in the executor.
+    """
+    async_actions = ('list', 'retrieve')
+
+    async def async_dispatch(self, request, *args, **kwargs):
+        run = ThreadRunner(request)
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await run(self.initial, request, *args, **kwargs)
+            if self.action == 'list':
+                response = await self.async_list(run, request, *args, **kwargs)
+            else:
+                response = await self.async_retrieve(run, request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def get_async_serializer(self):
+        """
+        Return the compiled serializer of the request, or `None` when it
+        needs the regular action.
+        """
+        if getattr(self, 'use_read_model', None) and self.use_read_model():
+            return None
+        if getattr(self, 'get_included_relations', None) and self.get_included_relations():
+            return None
+        # rows are not model instances
+        for permission in self.get_permissions():
+            if type(permission).has_object_permission is not BasePermission.has_object_permission:
+                return None
+        return compile_serializer(self.get_serializer())
+
+    def is_conditional_view(self, request):
+        return hasattr(self, 'get_conditional_state') and self.supports_conditional_get(request)
+
+    async def async_list(self, run, request, *args, **kwargs):
+        compiled = await run(self.get_async_serializer)
+        if compiled is None:
+            return await run(self.list, request, *args, **kwargs)
+
+        queryset = await run(lambda: self.filter_queryset(self.get_queryset()))
+        state = run(self.get_conditional_state, queryset) if self.is_conditional_view(request) else None
+        return await self.async_response(run, request, state, partial(self.load_page, run, compiled, queryset))
+
+    async def load_page(self, run, compiled, queryset):
+        queryset = compiled.values(queryset, self.get_ordering_columns())
+        page = await run(self.paginate_queryset, queryset)
+        rows = page if page is not None else await run(list, queryset)
+        pks = [row[compiled.model._meta.pk.name] for row in rows]
+        related = await asyncio.gather(*[run(compiled.load_related, name, pks) for name in compiled.many_fields])
+        data = await run(compiled.to_representation, rows, dict(zip(compiled.many_fields, related)))
+        return self.get_paginated_response(data) if page is not None else Response(data)
+
+    async def async_retrieve(self, run, request, *args, **kwargs):
+        compiled = await run(self.get_async_serializer)
+        if compiled is None:
+            return await run(self.retrieve, request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        value = kwargs[lookup_url_kwarg]
+        queryset = await run(lambda: self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: value}))
+        state = run(self.get_conditional_state, queryset) if self.is_conditional_view(request) else None
+        load = partial(self.load_object, run, compiled, queryset, value)
+        return await self.async_response(run, request, state, load)
+
+    async def load_object(self, run, compiled, queryset, value):
+        names = compiled.many_fields
+        if self.lookup_field in ('pk', compiled.model._meta.pk.name):
+            # the relations only need the primary key from the URL
+            rows, *related = await asyncio.gather(run(list, compiled.values(queryset)[:1]),
+                                                  *[run(compiled.load_related, name, [value]) for name in names])
+        else:
+            rows = await run(list, compiled.values(queryset)[:1])
+            pks = [row[compiled.model._meta.pk.name] for row in rows]
+            related = await asyncio.gather(*[run(compiled.load_related, name, pks) for name in names])
+        if not rows:
+            raise Http404
+        data = await run(compiled.to_representation, rows, dict(zip(names, related)))
+        return Response(data[0])
+
+    async def async_response(self, run, request, state, load):
+        """
+        Return the response `load()` builds, answered from the response cache
+        when the view has one, and with the conditional GET headers computed
+        by the pending `state` query.
+        """
+        if state is not None and self.is_conditional(request):
+            etag, last_modified, count = await state
+            if self.action == 'retrieve' and not count:
+                raise Http404
+            if self.is_not_modified(request, etag, last_modified):
+                return self.add_conditional_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag,
+                                                    last_modified)
+
+        cache = key = response = None
+        if hasattr(self, 'get_cached_response'):
+            cache, key, response = await run(self.get_cached_response, request)
+        if response is None:
+            try:
+                response = await load()
+            except Exception:
+                if state is not None:
+                    # retrieve the state, so its failures are not left unhandled
+                    await asyncio.gather(state, return_exceptions=True)
+                raise
+            if cache is not None:
+                response = await run(self.store_response, cache, key, response)
+
+        if state is not None:
+            etag, last_modified, count = await state
+            if response.status_code == status.HTTP_200_OK:
+                self.add_conditional_headers(response, etag, last_modified)
+        return response
@@ -0,0 +1,287 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, connections
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from movie_database.models import Actor, Director, Movie
+from movie_database.signals import movies_bulk_created
+
+logger = logging.getLogger(__name__)
+
+# Completed models, the field completed on and the fields shown
+SOURCES = OrderedDict([
+    ('movie', (Movie, 'title', ('title',))),
+    ('actor', (Actor, 'surname', ('name', 'surname'))),
+    ('director', (Director, 'surname', ('name', 'surname'))),
+])
+KINDS = list(SOURCES)
+KIND_OF_MODEL = {model: kind for kind, (model, key, fields) in SOURCES.items()}
+
+
+def normalize(text):
+    return text.lower()
+
+
+def entry_for(kind, values):
+    """
+    Return the `(key, kind, text)` entry of an object from its `values`, a
+    mapping of field names.
+    """
+    model, key, fields = SOURCES[kind]
+    return normalize(values[key]), KINDS.index(kind), ' '.join(values[name] for name in fields)
+
+
+class PrefixIndex(object):
+    """
+    Sorted array of completion keys answering prefix queries with bisect.
+
+    Entries are stored column-wise, with the kind and primary key packed
+    into one integer id kept in a typed array, and are ordered by key and
+    id. Writes shift the arrays, which takes about a millisecond on a
+    million entries. Once the index holds `max_entries` entries further
+    ones are dropped and counted.
+    """
+
+    def __init__(self, entries=(), max_entries=None):
+        """
+        `entries` holds `(key, kind index, pk, text)` tuples.
+        """
+        self.max_entries = max_entries
+        entries = sorted(entries, key=lambda entry: (entry[0], entry[2] * len(KINDS) + entry[1]))
+        self.dropped = 0
+        if max_entries is not None and len(entries) > max_entries:
+            self.dropped = len(entries) - max_entries
+            del entries[max_entries:]
+        self.keys = [entry[0] for entry in entries]
+        self.ids = array('q', (entry[2] * len(KINDS) + entry[1] for entry in entries))
+        self.texts = [entry[3] for entry in entries]
+        self.lock = threading.Lock()
+        self.built = time.time()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, prefix, limit=10):
+        """
+        Return up to `limit` `(kind, pk, text)` entries whose key starts
+        with `prefix`, in key order.
+        """
+        prefix = normalize(prefix)
+        results = []
+        with self.lock:
+            keys = self.keys
+            index = bisect_left(keys, prefix)
+            while index < len(keys) and len(results) < limit and keys[index].startswith(prefix):
+                pk, kind = divmod(self.ids[index], len(KINDS))
+                results.append((KINDS[kind], pk, self.texts[index]))
+                index += 1
+        return results
+
+    def find(self, kind, pk, key=None):
+        """
+        Return the position of an entry, looked up by `key` when given, by
+        scanning the ids otherwise (tens of milliseconds on a million
+        entries), or `None`.
+        """
+        entry_id = pk * len(KINDS) + KINDS.index(kind)
+        if key is not None:
+            index = bisect_left(self.keys, key)
+            while index < len(self.keys) and self.keys[index] == key:
+                if self.ids[index] == entry_id:
+                    return index
+                index += 1
+        try:
+            return self.ids.index(entry_id)
+        except ValueError:
+            return None
+
+    def remove(self, kind, pk, key=None):
+        with self.lock:
+            self._remove(kind, pk, key)
+
+    def _remove(self, kind, pk, key):
+        index = self.find(kind, pk, key)
+        if index is not None:
+            del self.keys[index], self.ids[index], self.texts[index]
+
+    def insert(self, kind, pk, values):
+        """
+        Add the entry of a new object, built from `values`, a mapping of its
+        field names.
+        """
+        with self.lock:
+            self._insert(kind, pk, values)
+
+    def _insert(self, kind, pk, values):
+        if self.max_entries is not None and len(self.keys) >= self.max_entries:
+            self.dropped += 1
+            return
+        key, kind_index, text = entry_for(kind, values)
+        entry_id = pk * len(KINDS) + kind_index
+        index = bisect_left(self.keys, key)
+        while index < len(self.keys) and self.keys[index] == key and self.ids[index] < entry_id:
+            index += 1
+        self.keys.insert(index, key)
+        self.ids.insert(index, entry_id)
+        self.texts.insert(index, text)
+
+    def update(self, kind, pk, values, key=None):
+        """
+        Replace the entry of an object, found through its previous `key`
+        when given.
+        """
+        with self.lock:
+            self._remove(kind, pk, key)
+            self._insert(kind, pk, values)
+
+    def stats(self):
+        return {
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'dropped': self.dropped,
+            'age': time.time() - self.built,
+        }
+
+
+def build_index(max_entries=None, chunk_size=5000):
+    """
+    Return a `PrefixIndex` of every movie, actor and director. Reading
+    stops once `max_entries` rows were read.
+    """
+    entries = []
+    for kind, (model, key, fields) in SOURCES.items():
+        names = list(OrderedDict.fromkeys((key,) + fields))
+        queryset = model.objects.order_by('pk').values_list('pk', *names)
+        last = None
+        while max_entries is None or len(entries) <= max_entries:
+            rows = list((queryset if last is None else queryset.filter(pk__gt=last))[:chunk_size])
+            if not rows:
+                break
+            for row in rows:
+                entries.append((row[0],) + entry_for(kind, dict(zip(names, row[1:]))))
+            last = rows[-1][0]
+    return PrefixIndex([(key, kind, pk, text) for pk, key, kind, text in entries], max_entries)
+
+
+_autocomplete_index = []
+_build_lock = threading.Lock()
+
+
+def get_options():
+    return getattr(settings, 'API_AUTOCOMPLETE', {})
+
+
+def get_autocomplete_index():
+    """
+    Return the index of this worker, building it on first use. An index
+    older than `REFRESH` seconds is rebuilt in a background thread, so
+    writes handled by other workers show up eventually.
+    """
+    if not _autocomplete_index:
+        with _build_lock:
+            if not _autocomplete_index:
+                _autocomplete_index.append(build_index(get_options().get('MAX_ENTRIES')))
+    index = _autocomplete_index[0]
+    refresh = get_options().get('REFRESH')
+    if refresh is not None and time.time() - index.built > refresh and _build_lock.acquire(False):
+        # stops other requests from starting a rebuild until this one ends
+        index.built = time.time()
+        threading.Thread(target=_rebuild, daemon=True).start()
+    return index
+
+
+def _rebuild():
+    try:
+        index = build_index(get_options().get('MAX_ENTRIES'))
+        if _autocomplete_index:
+            _autocomplete_index[0] = index
+    except DatabaseError:
+        logger.exception('Could not rebuild the autocomplete index')
+    finally:
+        # the thread ends here, its connections would never be reused
+        connections.close_all()
+        _build_lock.release()
+
+
+def warm_autocomplete_index():
+    """
+    Build the index before the worker serves its first request, from the
+    `post_worker_init` hook of `mini_rest_project/gunicorn_config.py`.
+    """
+    try:
+        get_autocomplete_index()
+    except DatabaseError:
+        logger.exception('Could not build the autocomplete index')
+
+
+def reset_autocomplete_index():
+    del _autocomplete_index[:]
+
+
+@receiver(setting_changed)
+def reset_autocomplete_options(setting, **kwargs):
+    if setting == 'API_AUTOCOMPLETE':
+        reset_autocomplete_index()
+
+
+def remember_key(sender, instance, **kwargs):
+    # the key the entry of the instance is stored under, to find it on save
+    # (read from __dict__, so deferred fields are not loaded)
+    key = instance.__dict__.get(SOURCES[KIND_OF_MODEL[sender]][1])
+    instance._autocomplete_key = None if key is None else normalize(key)
+
+
+def remember_previous_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Before an update of an indexed object, read the key its entry is stored
+    under, unless the instance already knows it or the key is not saved.
+    """
+    if raw or instance.pk is None or not _autocomplete_index or hasattr(instance, '_autocomplete_key'):
+        return
+    key_field = SOURCES[KIND_OF_MODEL[sender]][1]
+    if update_fields is not None and key_field not in update_fields:
+        remember_key(sender, instance)
+        return
+    key = sender._default_manager.using(kwargs.get('using')).filter(pk=instance.pk) \
+        .values_list(key_field, flat=True).first()
+    instance._autocomplete_key = None if key is None else normalize(key)
+
+
+def index_instance(sender, instance, created=False, **kwargs):
+    # an index not built yet will read the row from the database
+    if _autocomplete_index:
+        kind = KIND_OF_MODEL[sender]
+        if created:
+            _autocomplete_index[0].insert(kind, instance.pk, instance.__dict__)
+        else:
+            _autocomplete_index[0].update(kind, instance.pk, instance.__dict__,
+                                          getattr(instance, '_autocomplete_key', None))
+    remember_key(sender, instance)
+
+
+def remove_instance(sender, instance, **kwargs):
+    if _autocomplete_index:
+        if not hasattr(instance, '_autocomplete_key'):
+            # most likely the key it was loaded with
+            remember_key(sender, instance)
+        _autocomplete_index[0].remove(KIND_OF_MODEL[sender], instance.pk, instance._autocomplete_key)
+
+
+for model in KIND_OF_MODEL:
+    pre_save.connect(remember_previous_key, sender=model, dispatch_uid='autocomplete_index')
+    post_save.connect(index_instance, sender=model, dispatch_uid='autocomplete_index')
+    post_delete.connect(remove_instance, sender=model, dispatch_uid='autocomplete_index')
+
+
+@receiver(movies_bulk_created, dispatch_uid='autocomplete_index')
+def index_bulk_created_movies(sender, movies, **kwargs):
+    for movie in movies:
+        index_instance(Movie, movie, created=True)
@@ -0,0 +1,258 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished, setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from movie_database.replicas import get_read_database, replication_window
+
+
+class LRUCacheBackend(object):
+    """
+    In-process cache keeping the `max_entries` most recently used responses
+    for at most `timeout` seconds. The version counter is local to the
+    worker, so the timeout bounds how long a worker serves responses older
+    than a write made through another one.
+    """
+
+    def __init__(self, max_entries=1024, timeout=60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self.entries[key] = entry
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_version(self):
+        return self.version
+
+    def incr_version(self):
+        with self.lock:
+            self.version += 1
+            # entries of older versions can never be hit again
+            self.entries.clear()
+
+
+class DjangoCacheBackend(object):
+    """
+    Stores responses and the version counter in a Django cache, so every
+    worker sharing that cache sees the same invalidations.
+
+    The cache may drop the counter, e.g. when a file cache culls entries,
+    so versions are taken from the clock in microseconds: a counter set
+    again never goes back to a version whose responses may still be stored.
+    """
+    version_key = 'movie_database:response_cache:version'
+
+    def __init__(self, alias='default', timeout=300):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            version = int(time.time() * 1000000)
+            self.cache.add(self.version_key, version, None)
+            version = self.cache.get(self.version_key, version)
+        return version
+
+    def incr_version(self):
+        # set, not incr: incr is not atomic on every cache, and a lost bump
+        # would keep the version of the responses read before the write
+        version = self.cache.get(self.version_key, 0)
+        self.cache.set(self.version_key, max(int(time.time() * 1000000), version + 1), None)
+
+
+BACKENDS = {
+    'lru': lambda options: LRUCacheBackend(options.get('MAX_ENTRIES', 1024), options.get('TIMEOUT', 60)),
+    'django': lambda options: DjangoCacheBackend(options.get('ALIAS', 'default'), options.get('TIMEOUT', 300)),
+}
+
+
+def _detach(data):
+    """
+    Copy the `ReturnList`/`ReturnDict` wrappers of serializer output into
+    plain containers, so cached data does not keep serializers alive.
+    """
+    if isinstance(data, ReturnList):
+        return list(data)
+    if isinstance(data, dict):
+        return OrderedDict((key, _detach(value)) for key, value in data.items())
+    return data
+
+
+class ResponseCache(object):
+    """
+    Caches serialized response data under the request URL and a version
+    counter that model signals bump on every write.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # set when a write was invalidated before its transaction committed
+        self.pending = False
+        # the last version seen and when this worker first saw it
+        self.version = None
+        self.version_since = 0.0
+
+    def make_key(self, prefix, request):
+        url = request.build_absolute_uri().encode('utf-8')
+        version = self.backend.get_version()
+        if version != self.version:
+            self.version, self.version_since = version, time.time()
+        return 'movie_database:response_cache:%s:%s:%s' % (version, prefix, hashlib.md5(url).hexdigest())
+
+    def version_age(self):
+        """
+        Return how many seconds ago this worker first saw the current version.
+        """
+        return time.time() - self.version_since
+
+    def get(self, key):
+        data = self.backend.get(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def set(self, key, data):
+        self.backend.set(key, _detach(data))
+
+    def invalidate(self):
+        self.invalidations += 1
+        self.backend.incr_version()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+        }
+
+
+_response_cache = []
+
+
+def get_response_cache():
+    """
+    Return the `ResponseCache` configured by `API_RESPONSE_CACHE`, or `None`
+    when response caching is disabled.
+    """
+    if not _response_cache:
+        options = getattr(settings, 'API_RESPONSE_CACHE', None)
+        _response_cache.append(ResponseCache(BACKENDS[options['BACKEND']](options)) if options else None)
+    return _response_cache[0]
+
+
+def invalidate_response_cache(using=None):
+    """
+    Invalidate the cached responses once the write made on `using` commits,
+    so no reader caches the data from before the commit under the new
+    version.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return
+    if hasattr(transaction, 'on_commit'):
+        transaction.on_commit(cache.invalidate, using=using)
+        return
+    # Without on_commit (Django < 1.9), invalidate now and again once the
+    # request is finished, after its transactions committed.
+    cache.invalidate()
+    if transaction.get_connection(using).in_atomic_block:
+        cache.pending = True
+
+
+@receiver(request_finished, dispatch_uid='response_cache')
+def invalidate_pending_responses(**kwargs):
+    cache = _response_cache[0] if _response_cache else None
+    if cache is not None and cache.pending:
+        cache.pending = False
+        cache.invalidate()
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    if setting == 'API_RESPONSE_CACHE':
+        del _response_cache[:]
+
+
+class CachedResponseMixin(object):
+    """
+    Serves `list` and `retrieve` from the response cache.
+
+    Responses computed inside a transaction are not stored, since the data
+    they show may still be rolled back, and neither are those read from a
+    replica that may not have replicated the last write yet.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache, key, response = self.get_cached_response(request)
+        if response is not None:
+            return response
+        return self.store_response(cache, key, handler(request, *args, **kwargs))
+
+    def get_cached_response(self, request):
+        """
+        Return `(cache, key, response)`, the response being `None` on a miss.
+        """
+        cache = get_response_cache()
+        if cache is None:
+            return None, None, None
+        key = cache.make_key(self.__class__.__name__, request)
+        data = cache.get(key)
+        if data is None:
+            return cache, key, None
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return cache, key, response
+
+    def store_response(self, cache, key, response):
+        if cache is None:
+            return response
+        if response.status_code == 200 and not connection.in_atomic_block and self.is_replicated(cache):
+            cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def is_replicated(self, cache):
+        return get_read_database() is None or cache.version_age() >= replication_window()
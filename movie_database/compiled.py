@@ -0,0 +1,193 @@
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from rest_framework.relations import HyperlinkedRelatedField, ManyRelatedField, PrimaryKeyRelatedField
+
+from movie_database.fields import build_url_template, format_url
+from movie_database.metrics import record_serialization
+
+_compiled_plans = {}
+
+
+def _relation_plan(relation):
+    """
+    Return how a relation renders a related primary key: `('pk', None)`,
+    `('url', view_name)`, or `None` when it needs the related instance.
+    """
+    if isinstance(relation, HyperlinkedRelatedField):
+        if relation.lookup_field != 'pk':
+            return None
+        return 'url', relation.view_name
+    if isinstance(relation, PrimaryKeyRelatedField) and relation.pk_field is None:
+        return 'pk', None
+    return None
+
+
+def plan_compiled(serializer):
+    """
+    Return `(columns, fields)` describing how to render the fields of
+    `serializer` from `.values()` rows, or `None` when one of them needs
+    model instances.
+
+    `fields` holds `(name, kind, column, relation)` entries, where `kind` is
+    `'column'`, `'related'` for a forward relation read from its column, or
+    `'many'` for a relation loaded with one extra query per page.
+    """
+    key = (serializer.__class__, tuple(serializer.fields))
+    if key not in _compiled_plans:
+        _compiled_plans[key] = _plan_fields(serializer)
+    return _compiled_plans[key]
+
+
+def _plan_fields(serializer):
+    opts = serializer.Meta.model._meta
+    columns, fields = [opts.pk.name], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            relation = _relation_plan(field)
+            if relation is None or relation[0] != 'url':
+                return None
+            fields.append((name, 'related', opts.pk.name, relation))
+            continue
+        if len(field.source_attrs) != 1:
+            return None
+        try:
+            model_field = opts.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            return None
+
+        if isinstance(field, ManyRelatedField):
+            relation = _relation_plan(field.child_relation)
+            if relation is None or not (model_field.many_to_many or model_field.one_to_many):
+                return None
+            if model_field.auto_created:
+                lookup = model_field.field.name
+            else:
+                lookup = model_field.related_query_name()
+            fields.append((name, 'many', (model_field.related_model, lookup), relation))
+        elif model_field.is_relation:
+            relation = _relation_plan(field)
+            if relation is None or not model_field.concrete or model_field.many_to_many:
+                return None
+            columns.append(model_field.name)
+            fields.append((name, 'related', model_field.name, relation))
+        elif model_field.concrete:
+            columns.append(model_field.name)
+            fields.append((name, 'column', model_field.name, None))
+        else:
+            return None
+    return tuple(columns), tuple(fields)
+
+
+class CompiledSerializer(object):
+    """
+    Read-only counterpart of a model serializer rendering `.values()` rows.
+
+    Column values go through the `to_representation` of their field only,
+    and hyperlinks are formatted from URL templates reversed once, so the
+    output is the same as the serializer's without the per-field dispatch.
+    """
+
+    def __init__(self, serializer, plan):
+        self.serializer = serializer
+        self.model = serializer.Meta.model
+        self.columns, self.fields = plan
+        self.url_templates = {}
+
+    def values(self, queryset, columns=()):
+        """
+        Turn `queryset` into one reading the rendered columns and the extra
+        `columns`, e.g. those of the ordering, as dicts.
+        """
+        columns = self.columns + tuple(name for name in columns if name not in self.columns)
+        return queryset.prefetch_related(None).values(*columns)
+
+    def render_related(self, relation, field, value):
+        kind, view_name = relation
+        if kind == 'pk' or value is None:
+            return value
+        format = field.context.get('format', None)
+        if format and field.format and field.format != format:
+            format = field.format
+        key = (view_name, format)
+        if key not in self.url_templates:
+            self.url_templates[key] = build_url_template(view_name, field.context['request'], format,
+                                                         field.lookup_url_kwarg)
+        return format_url(self.url_templates[key], value)
+
+    def load_many(self, model, lookup, relation, field, pks):
+        """
+        Return `{pk: [rendered related values]}` for the rows in `pks`, in
+        the order the related manager would return them.
+        """
+        queryset = model.objects.all()
+        batch_size = max(connections[queryset.db].ops.bulk_batch_size([lookup], pks), 1)
+        values = {}
+        for start in range(0, len(pks), batch_size):
+            rows = queryset.filter(**{'%s__in' % lookup: pks[start:start + batch_size]}).values_list(lookup, 'pk')
+            for pk, related_pk in rows:
+                values.setdefault(pk, []).append(self.render_related(relation, field, related_pk))
+        return values
+
+    @property
+    def many_fields(self):
+        return [name for name, kind, column, relation in self.fields if kind == 'many']
+
+    def load_related(self, name, pks):
+        """
+        Return `{pk: [rendered related values]}` of the many field `name`
+        for the rows in `pks`.
+        """
+        for field_name, kind, column, relation in self.fields:
+            if field_name == name and kind == 'many':
+                field = self.serializer.fields[name].child_relation
+                return self.load_many(column[0], column[1], relation, field, pks) if pks else {}
+        raise KeyError(name)
+
+    @record_serialization
+    def to_representation(self, rows, related=None):
+        """
+        Render `rows`. `related` may hold the `load_related` results of the
+        many fields, e.g. loaded concurrently; the others are loaded here.
+        """
+        rows = list(rows)
+        pks = [row[self.model._meta.pk.name] for row in rows]
+        related = related or {}
+        renderers = []
+        for name, kind, column, relation in self.fields:
+            field = self.serializer.fields[name]
+            if kind == 'many':
+                many = related[name] if name in related else self.load_related(name, pks)
+                renderers.append((name, kind, many, None))
+            elif kind == 'related':
+                renderers.append((name, kind, column, (relation, field)))
+            else:
+                renderers.append((name, kind, column, field.to_representation))
+
+        data = []
+        for row, pk in zip(rows, pks):
+            item = OrderedDict()
+            for name, kind, source, render in renderers:
+                if kind == 'many':
+                    item[name] = source.get(pk, [])
+                elif kind == 'related':
+                    item[name] = self.render_related(render[0], render[1], row[source])
+                else:
+                    value = row[source]
+                    item[name] = None if value is None else render(value)
+            data.append(item)
+        return data
+
+
+def compile_serializer(serializer):
+    """
+    Return a `CompiledSerializer` for `serializer`, or `None` when its
+    fields cannot be rendered from `.values()` rows.
+    """
+    plan = plan_compiled(serializer)
+    if plan is None:
+        return None
+    return CompiledSerializer(serializer, plan)
@@ -0,0 +1,168 @@
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCompressor(object):
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor(object):
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCompressor(object):
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# Available encodings and their default levels, in order of preference
+COMPRESSORS = OrderedDict()
+if brotli is not None:
+    COMPRESSORS['br'] = (BrotliCompressor, 4)
+if zstandard is not None:
+    COMPRESSORS['zstd'] = (ZstdCompressor, 3)
+COMPRESSORS['gzip'] = (GzipCompressor, 6)
+
+
+def compress(encoding, level, data):
+    compressor = COMPRESSORS[encoding][0](level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_sequence(encoding, level, sequence):
+    """
+    Compress the chunks of `sequence` as they come, flushing after every
+    chunk so clients can decode a stream before it ends.
+    """
+    compressor = COMPRESSORS[encoding][0](level)
+    for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def parse_accept_encoding(header):
+    """
+    Return `{coding: qvalue}` for an `Accept-Encoding` header, with `*`
+    standing for the codings the header does not name.
+    """
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        codings[coding] = qvalue
+    return codings
+
+
+def choose_encoding(header, encodings):
+    """
+    Return the coding of `encodings` the `Accept-Encoding` header prefers,
+    the first of `encodings` on a tie, or `None` when none is acceptable.
+    """
+    codings = parse_accept_encoding(header)
+    chosen, best = None, 0.0
+    for encoding in encodings:
+        qvalue = codings.get(encoding, codings.get('*', 0.0))
+        if qvalue > best:
+            chosen, best = encoding, qvalue
+    return chosen
+
+
+class CompressionMiddleware(object):
+    """
+    Compresses responses with the best coding of `Accept-Encoding` among
+    gzip, and brotli and zstd when installed. Bodies shorter than
+    `MIN_SIZE` are sent as they are; streaming responses are compressed
+    chunk by chunk.
+
+    ETags become weak, since the compressed bytes differ from the ones
+    the ETag was computed for.
+    """
+
+    def __init__(self):
+        options = getattr(settings, 'API_COMPRESSION', {})
+        self.min_size = options.get('MIN_SIZE', 1024)
+        levels = options.get('LEVELS', {})
+        self.encodings = [name for name in options.get('ENCODINGS', COMPRESSORS) if name in COMPRESSORS]
+        self.levels = {name: levels.get(name, COMPRESSORS[name][1]) for name in self.encodings}
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        level = self.levels[encoding]
+        if response.streaming:
+            # the compressed length is unknown until the stream ends
+            response.streaming_content = compress_sequence(encoding, level, response.streaming_content)
+            del response['Content-Length']
+        else:
+            content = compress(encoding, level, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        if response.has_header('ETag') and not response['ETag'].startswith('W/'):
+            response['ETag'] = 'W/' + response['ETag']
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,83 @@
+import calendar
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _etags(header):
+    return [etag.strip()[2:] if etag.strip().startswith('W/') else etag.strip() for etag in header.split(',')]
+
+
+class ConditionalGetMixin(object):
+    """
+    Adds `ETag` and `Last-Modified` to `list` and `retrieve`, computed from
+    `MAX(updated)` and the row count of the requested rows, and answers
+    conditional requests with 304 before anything is serialized.
+    """
+    modified_field = 'updated'
+
+    def supports_conditional_get(self, request):
+        """
+        Return whether `MAX(updated)` of the rows covers everything the
+        response to `request` shows. Mixins later in the MRO may say no.
+        """
+        parent = getattr(super(), 'supports_conditional_get', None)
+        return parent(request) if parent is not None else True
+
+    def list(self, request, *args, **kwargs):
+        if not self.supports_conditional_get(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(queryset, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.supports_conditional_get(request):
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return self.conditional_response(queryset, super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_state(self, queryset):
+        """
+        Return the `(etag, last_modified, count)` of the rows in `queryset`,
+        with `last_modified` as a timestamp or `None`.
+        """
+        state = queryset.order_by().aggregate(modified=Max(self.modified_field), count=Count('pk'))
+        last_modified = None
+        if state['modified'] is not None:
+            last_modified = calendar.timegm(state['modified'].utctimetuple())
+        key = '%s:%s:%s:%s' % (self.request.build_absolute_uri(), self.request.accepted_media_type,
+                               state['modified'] and state['modified'].isoformat(), state['count'])
+        return quote_etag(hashlib.md5(key.encode('utf-8')).hexdigest()), last_modified, state['count']
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etags = _etags(if_none_match)
+            return '*' in etags or etag in etags
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return if_modified_since is not None and last_modified is not None and last_modified <= if_modified_since
+
+    def is_conditional(self, request):
+        return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+    def conditional_response(self, queryset, handler, request, *args, **kwargs):
+        etag, last_modified, count = self.get_conditional_state(queryset)
+        if self.action == 'retrieve' and not count:
+            return handler(request, *args, **kwargs)
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        return self.add_conditional_headers(response, etag, last_modified)
+
+    def add_conditional_headers(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
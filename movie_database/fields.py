@@ -0,0 +1,115 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+from rest_framework.reverse import reverse
+
+URL_PLACEHOLDER = 'url0placeholder0'
+
+
+def build_url_template(view_name, request=None, format=None, lookup_url_kwarg='pk'):
+    """
+    Reverse `view_name` once and return the `(prefix, suffix)` surrounding
+    the lookup value, so further URLs can be formatted without the resolver.
+    """
+    url = reverse(view_name, kwargs={lookup_url_kwarg: URL_PLACEHOLDER}, request=request, format=format)
+    prefix, _, suffix = url.rpartition(URL_PLACEHOLDER)
+    return prefix, suffix
+
+
+def format_url(template, lookup_value):
+    if not isinstance(lookup_value, int):
+        lookup_value = urlquote(lookup_value, safe=RFC3986_SUBDELIMS + '/~:@')
+    return '%s%s%s' % (template[0], lookup_value, template[1])
+
+
+class TemplatedHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+    """
+    Hyperlinked field that reverses its view once per serializer and formats
+    every other URL from the cached template.
+    """
+
+    def get_url(self, obj, view_name, request, format):
+        # Unsaved objects will not yet have a valid URL.
+        if hasattr(obj, 'pk') and obj.pk in (None, ''):
+            return None
+
+        templates = self.__dict__.setdefault('_url_templates', {})
+        key = (view_name, format)
+        if key not in templates:
+            templates[key] = build_url_template(view_name, request, format, self.lookup_url_kwarg)
+        return format_url(templates[key], getattr(obj, self.lookup_field))
+
+
+def resolve_pks(queryset, pks):
+    """
+    Return `{pk: instance}` for `pks`, batching the lookup only as far as
+    the database limits the number of query parameters.
+    """
+    pks = list(pks)
+    batch_size = max(connections[queryset.db].ops.bulk_batch_size(['pk'], pks), 1)
+    instances = {}
+    for start in range(0, len(pks), batch_size):
+        instances.update(queryset.in_bulk(pks[start:start + batch_size]))
+    return instances
+
+
+class BatchManyRelatedField(ManyRelatedField):
+    """
+    Resolves every submitted primary key with a single `pk__in` query and
+    reports all the missing ones together.
+    """
+    default_error_messages = {
+        'does_not_exist': _('Invalid pks {pk_values} - objects do not exist.'),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, type('')) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        relation = self.child_relation
+        pks = [relation.to_pk(item) for item in data]
+        resolved = relation.context.get('related_instances', {}).get(relation.get_queryset().model)
+        if resolved is None:
+            resolved = resolve_pks(relation.get_queryset(), set(pks))
+        missing = [item for item, pk in zip(data, pks) if pk not in resolved]
+        if missing:
+            self.fail('does_not_exist', pk_values=missing)
+        return [resolved[pk] for pk in pks]
+
+
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that first looks its instance up in the
+    `related_instances` map a bulk list serializer puts in the context.
+    With `many=True` it validates the whole list in one query.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs.keys():
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchManyRelatedField(**list_kwargs)
+
+    def to_pk(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def to_internal_value(self, data):
+        resolved = self.context.get('related_instances', {}).get(self.get_queryset().model)
+        if resolved is None:
+            return super().to_internal_value(data)
+        pk = self.to_pk(data)
+        if pk not in resolved:
+            self.fail('does_not_exist', pk_value=data)
+        return resolved[pk]
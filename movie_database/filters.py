@@ -0,0 +1,98 @@
+import sys
+
+from django.core.validators import EMPTY_VALUES
+from django.db import connections
+from django_filters import rest_framework as filters
+
+from movie_database.models import OscarAward, Actor, Director, Movie, MovieReadModel
+
+SURROGATES = (0xD800, 0xDFFF)
+
+
+def successor(prefix):
+    """
+    Return the smallest string greater than every string starting with
+    `prefix`, or `None` when there is none.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if SURROGATES[0] <= code <= SURROGATES[1]:
+        # surrogates cannot be encoded, and no string contains them
+        code = SURROGATES[1] + 1
+    return prefix[:-1] + chr(code)
+
+
+class PrefixFilter(filters.CharFilter):
+    """
+    Case-sensitive prefix match answered from a b-tree index.
+
+    PostgreSQL compares strings by the database locale, where e.g. 'jaws'
+    sorts between 'Ja' and 'Jb', so there it is a LIKE served by the
+    `varchar_pattern_ops` indexes. Elsewhere it is a `>= prefix AND <
+    successor` range, since SQLite's LIKE ignores case and skips indexes.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if connections[qs.db].vendor == 'postgresql':
+            return self.get_method(qs)(**{'%s__startswith' % self.name: value})
+        lookups = {'%s__gte' % self.name: value}
+        upper = successor(value)
+        if upper is not None:
+            lookups['%s__lt' % self.name] = upper
+        return self.get_method(qs)(**lookups)
+
+
+class MovieFilter(filters.FilterSet):
+    title = PrefixFilter(name='title')
+    director = filters.NumberFilter(name='director')
+    actor = filters.NumberFilter(name='actor')
+    genre = filters.NumberFilter(name='genre')
+    animated = filters.BooleanFilter(name='animated')
+    oscar_year_min = filters.NumberFilter(name='oscar_award__year', lookup_expr='gte')
+    oscar_year_max = filters.NumberFilter(name='oscar_award__year', lookup_expr='lte')
+
+    class Meta:
+        model = Movie
+        fields = ('title', 'director', 'actor', 'genre', 'animated', 'oscar_year_min', 'oscar_year_max')
+
+
+class MovieReadModelFilter(filters.FilterSet):
+    """
+    The `MovieFilter` filters answered by the read model table alone.
+    """
+    title = PrefixFilter(name='title')
+    director = filters.NumberFilter(name='director')
+    animated = filters.BooleanFilter(name='animated')
+
+    class Meta:
+        model = MovieReadModel
+        fields = ('title', 'director', 'animated')
+
+
+class ActorFilter(filters.FilterSet):
+    surname = PrefixFilter(name='surname')
+
+    class Meta:
+        model = Actor
+        fields = ('surname',)
+
+
+class DirectorFilter(filters.FilterSet):
+    surname = PrefixFilter(name='surname')
+
+    class Meta:
+        model = Director
+        fields = ('surname',)
+
+
+class OscarAwardFilter(filters.FilterSet):
+    year_min = filters.NumberFilter(name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(name='year', lookup_expr='lte')
+
+    class Meta:
+        model = OscarAward
+        fields = ('category', 'year_min', 'year_max')
@@ -0,0 +1,78 @@
+import random
+import string
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from movie_database.autocomplete import KINDS, PrefixIndex
+
+
+def random_word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12))).capitalize()
+
+
+def index_size(index):
+    """
+    Return the bytes held by the arrays of `index` and the strings in them.
+    """
+    size = sys.getsizeof(index.keys) + sys.getsizeof(index.texts) + sys.getsizeof(index.ids)
+    return size + sum(sys.getsizeof(key) for key in index.keys) + sum(sys.getsizeof(text) for text in index.texts)
+
+
+def percentile(timings, fraction):
+    return sorted(timings)[min(int(len(timings) * fraction), len(timings) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Measure the build time, memory use and query latency of an autocomplete index of random names.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=1000000, help='Entries in the index.')
+        parser.add_argument('--queries', type=int, default=10000, help='Prefix queries timed.')
+        parser.add_argument('--updates', type=int, default=1000, help='Additions and removals timed.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        entries = []
+        for pk in range(1, options['entries'] + 1):
+            kind = rng.randrange(len(KINDS))
+            words = [random_word(rng) for _ in range(rng.randint(1, 3) if kind == 0 else 2)]
+            key = (words[0] if kind == 0 else words[-1]).lower()
+            entries.append((key, kind, pk, ' '.join(words)))
+
+        started = time.perf_counter()
+        index = PrefixIndex(entries)
+        build = time.perf_counter() - started
+        memory = index_size(index)
+        self.stdout.write('%d entries built in %.2f s, %.1f MB (%d bytes per entry)' % (
+            len(index), build, memory / 2.0 ** 20, memory // max(len(index), 1)))
+
+        keys = [entry[0] for entry in entries]
+        del entries
+        for length in (1, 2, 3, 5):
+            timings = []
+            for _ in range(options['queries']):
+                prefix = rng.choice(keys)[:length]
+                started = time.perf_counter()
+                index.search(prefix, 10)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write('prefix of %d: p50 %.1f us, p99 %.1f us' % (
+                length, percentile(timings, 0.5) * 1e6, percentile(timings, 0.99) * 1e6))
+
+        additions, updates, removals = [], [], []
+        for pk in range(options['entries'] + 1, options['entries'] + options['updates'] + 1):
+            surname = random_word(rng)
+            started = time.perf_counter()
+            index.insert('actor', pk, {'name': random_word(rng), 'surname': surname})
+            additions.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            index.update('actor', pk, {'name': random_word(rng), 'surname': surname}, surname.lower())
+            updates.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            index.remove('actor', pk, surname.lower())
+            removals.append(time.perf_counter() - started)
+        for name, timings in (('insert', additions), ('update', updates), ('remove', removals)):
+            self.stdout.write('%s: p50 %.1f us, p99 %.1f us' % (
+                name, percentile(timings, 0.5) * 1e6, percentile(timings, 0.99) * 1e6))
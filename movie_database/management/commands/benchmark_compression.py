@@ -0,0 +1,36 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from movie_database.compression import COMPRESSORS, compress
+from movie_database.management.commands.benchmark_renderers import movie_list
+from movie_database.renderers import FastJSONRenderer
+
+LEVELS = {
+    'gzip': (1, 3, 6, 9),
+    'br': (0, 1, 4, 6, 9, 11),
+    'zstd': (1, 3, 6, 9, 19),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare the CPU cost and the bytes saved by each compression coding and level on a movie list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=10000, help='Movies in the compressed list.')
+        parser.add_argument('--repeat', type=int, default=3, help='Compressions timed per level.')
+
+    def handle(self, *args, **options):
+        content = FastJSONRenderer().render(movie_list(options['movies']), 'application/json')
+        self.stdout.write('%d bytes of JSON' % len(content))
+        self.stdout.write('%-5s %5s %12s %8s %10s %10s %14s' % (
+            'coding', 'level', 'bytes', 'ratio', 'ms', 'MB/s', 'saved KB/ms'))
+        for encoding in COMPRESSORS:
+            for level in LEVELS[encoding]:
+                compressed = compress(encoding, level, content)
+                seconds = min(timeit.repeat(lambda: compress(encoding, level, content),
+                                            repeat=options['repeat'], number=1))
+                saved = len(content) - len(compressed)
+                self.stdout.write('%-5s %5d %12d %7.1fx %10.2f %10.1f %14.1f' % (
+                    encoding, level, len(compressed), float(len(content)) / len(compressed), seconds * 1000,
+                    len(content) / seconds / 2 ** 20, saved / 1024.0 / (seconds * 1000)))
@@ -0,0 +1,55 @@
+import timeit
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand
+from rest_framework.relations import Hyperlink
+
+from movie_database.renderers import ENCODERS, FastJSONRenderer
+
+
+def movie_list(count):
+    """
+    Return a paginated response body of `count` movies, shaped like the
+    output of `MovieSerializer`.
+    """
+    results = []
+    for pk in range(1, count + 1):
+        results.append(OrderedDict([
+            ('url', Hyperlink('http://testserver/movies/%d/' % pk, None)),
+            ('id', pk),
+            ('title', 'Movie número %d' % pk),
+            ('genre', [pk % 7 + 1, pk % 11 + 1]),
+            ('director', pk % 500 + 1),
+            ('actor', [pk % 1000 + 1, pk % 1000 + 2, pk % 1000 + 3, pk % 1000 + 4]),
+            ('oscar_award', Hyperlink('http://testserver/oscarAwards/%d/' % pk, None) if pk % 50 == 0 else None),
+            ('animated', pk % 9 == 0),
+        ]))
+    return OrderedDict([('next', 'http://testserver/movies/?cursor=eyJyIjowfQ'), ('previous', None),
+                        ('results', results)])
+
+
+class Command(BaseCommand):
+    help = 'Compare the throughput of the available JSON encoders rendering a movie list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=10000, help='Movies in the rendered list.')
+        parser.add_argument('--repeat', type=int, default=5, help='Renders timed per encoder.')
+
+    def handle(self, *args, **options):
+        data = movie_list(options['movies'])
+        expected, baseline = None, None
+        for encoder in reversed(ENCODERS):
+            renderer = FastJSONRenderer()
+            renderer.encoder = encoder
+            output = renderer.render(data, 'application/json')
+            if expected is None:
+                expected = output
+            elif output != expected:
+                self.stderr.write('%s output differs from json' % encoder)
+
+            seconds = min(timeit.repeat(lambda: renderer.render(data, 'application/json'),
+                                        repeat=options['repeat'], number=1))
+            baseline = baseline or seconds
+            self.stdout.write('%-7s %8.2f ms %8.1f MB/s %10d movies/s %6.1fx' % (
+                encoder, seconds * 1000, len(output) / seconds / 2 ** 20, options['movies'] / seconds,
+                baseline / seconds))
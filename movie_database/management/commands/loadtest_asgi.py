@@ -0,0 +1,125 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import reverse
+from django.db.backends.utils import CursorWrapper
+from django.test import override_settings
+
+from movie_database.asgi import ASGIHandler, build_environ
+from movie_database.management.commands.benchmark_autocomplete import percentile
+from movie_database.models import Actor, Director, Genre, Movie, OscarAward
+
+RESOURCES = (('genre', Genre), ('oscaraward', OscarAward), ('actor', Actor), ('director', Director),
+             ('movie', Movie))
+
+
+def request_paths():
+    paths = []
+    for basename, model in RESOURCES:
+        pk = model.objects.order_by('pk').values_list('pk', flat=True).first()
+        if pk is None:
+            raise CommandError('There are no %s rows to request.' % model._meta.verbose_name)
+        paths += [reverse(basename + '-list'), reverse(basename + '-detail', kwargs={'pk': pk})]
+    return paths
+
+
+def asgi_scope(path):
+    return {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'path': path, 'root_path': '',
+            'query_string': b'', 'headers': [(b'host', b'testserver')], 'server': ('testserver', 80)}
+
+
+@contextmanager
+def database_latency(seconds):
+    """
+    Make every query wait `seconds` first, as if the database were across
+    the network.
+    """
+    if not seconds:
+        yield
+        return
+    execute, executemany = CursorWrapper.execute, CursorWrapper.executemany
+
+    def slow_execute(self, *args, **kwargs):
+        time.sleep(seconds)
+        return execute(self, *args, **kwargs)
+
+    def slow_executemany(self, *args, **kwargs):
+        time.sleep(seconds)
+        return executemany(self, *args, **kwargs)
+
+    with mock.patch.object(CursorWrapper, 'execute', slow_execute), \
+            mock.patch.object(CursorWrapper, 'executemany', slow_executemany):
+        yield
+
+
+class Command(BaseCommand):
+    help = ('Compare the throughput and latency of the list and detail endpoints served in-process by the WSGI '
+            'application in a thread pool and by the ASGI application on an event loop.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests sent to each application.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight at once.')
+        parser.add_argument('--db-latency', type=float, default=0, help='Milliseconds added to every query.')
+        parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled.')
+
+    def handle(self, *args, **options):
+        paths = request_paths()
+        targets = [paths[index % len(paths)] for index in range(options['requests'])]
+        overrides = {'ALLOWED_HOSTS': ['testserver']}
+        if not options['cache']:
+            overrides['API_RESPONSE_CACHE'] = None
+        with override_settings(**overrides), database_latency(options['db_latency'] / 1000.0):
+            self.stdout.write('%-5s %10s %10s %10s %8s' % ('', 'req/s', 'p50 ms', 'p99 ms', 'errors'))
+            self.report('wsgi', *self.run_wsgi(targets, options['concurrency']))
+            self.report('asgi', *self.run_asgi(targets, options['concurrency']))
+
+    def report(self, name, seconds, timings, errors):
+        self.stdout.write('%-5s %10.1f %10.2f %10.2f %8d' % (
+            name, len(timings) / seconds, percentile(timings, 0.5) * 1000, percentile(timings, 0.99) * 1000, errors))
+
+    def run_wsgi(self, targets, concurrency):
+        application = WSGIHandler()
+        statuses = []
+
+        def request(path):
+            started = time.perf_counter()
+            result = application(build_environ(asgi_scope(path), b''),
+                                 lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+            b''.join(result)
+            result.close()
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            started = time.perf_counter()
+            timings = list(executor.map(request, targets))
+            seconds = time.perf_counter() - started
+        return seconds, timings, sum(status != 200 for status in statuses)
+
+    def run_asgi(self, targets, concurrency):
+        application = ASGIHandler(WSGIHandler())
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        async def request(path):
+            async with semaphore:
+                started = time.perf_counter()
+                await application(asgi_scope(path), receive, send)
+                return time.perf_counter() - started
+
+        loop = asyncio.get_event_loop()
+        started = time.perf_counter()
+        timings = loop.run_until_complete(asyncio.gather(*[request(path) for path in targets]))
+        seconds = time.perf_counter() - started
+        return seconds, timings, sum(status != 200 for status in statuses)
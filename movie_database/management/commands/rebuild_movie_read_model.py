@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from movie_database.read_model import rebuild_read_models
+
+
+class Command(BaseCommand):
+    help = 'Render every movie into the MovieReadModel table again.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Movies rendered per query.')
+
+    def handle(self, *args, **options):
+        count = rebuild_read_models(options['chunk_size'])
+        self.stdout.write('Rebuilt %d movie read models.' % count)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from movie_database.search import get_search_backend, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Create the search index if needed and index every movie, actor, director and genre again.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database whose index to rebuild.')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows indexed per query.')
+
+    def handle(self, *args, **options):
+        get_search_backend(options['database']).install()
+        count = rebuild_search_index(options['database'], options['chunk_size'])
+        self.stdout.write('Indexed %d documents.' % count)
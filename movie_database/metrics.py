@@ -0,0 +1,278 @@
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_finished, setting_changed
+from django.db.backends.signals import connection_created
+from django.db.backends.utils import CursorDebugWrapper, CursorWrapper
+from django.dispatch import receiver
+
+# Upper bounds of the histogram buckets, in seconds, queries and bytes
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Histograms of the request costs, labelled by route and action
+REQUEST_HISTOGRAMS = (
+    ('api_request_duration_seconds', DURATION_BUCKETS),
+    ('api_response_size_bytes', SIZE_BUCKETS),
+    ('api_db_queries', QUERY_BUCKETS),
+    ('api_db_seconds', DURATION_BUCKETS),
+    ('api_serialize_seconds', DURATION_BUCKETS),
+    ('api_render_seconds', DURATION_BUCKETS),
+)
+
+# The recorder of the request this thread works for, or None
+_state = threading.local()
+
+
+def get_options():
+    """
+    Return the `API_METRICS` options, or `None` when instrumentation is off.
+    """
+    options = getattr(settings, 'API_METRICS', None)
+    if options is None:
+        return None
+    return dict({'SERVER_TIMING': True, 'DIRECTORY': None, 'FLUSH_INTERVAL': 10, 'SNAPSHOT_EXPIRY': 3600,
+                 'TOKEN': None}, **options)
+
+
+def get_recorder():
+    return getattr(_state, 'recorder', None)
+
+
+def set_recorder(recorder):
+    _state.recorder = recorder
+
+
+class RequestRecorder(object):
+    """
+    Costs of one request. Queries may run in several threads at once, so
+    their durations are appended to a list rather than summed.
+    """
+    __slots__ = ('started', 'action', 'model', 'queries', 'serialization', 'serializing', 'render_started',
+                 'render')
+
+    def __init__(self):
+        self.started = perf_counter()
+        # the viewset action and the model of its queryset
+        self.action = ''
+        self.model = ''
+        self.queries = []
+        self.serialization = 0.0
+        self.serializing = False
+        self.render_started = None
+        self.render = 0.0
+
+    def server_timing(self, duration):
+        return 'db;dur=%.2f;desc="%d queries", serialize;dur=%.2f, render;dur=%.2f, app;dur=%.2f' % (
+            sum(self.queries) * 1000, len(self.queries), self.serialization * 1000, self.render * 1000,
+            duration * 1000)
+
+
+class Histogram(object):
+    """
+    Counts of the observed values at most each of `buckets`, the last
+    count holding the larger ones, with their sum.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestMetrics(object):
+    """
+    The `REQUEST_HISTOGRAMS` of every route name, e.g. `movie-detail`, and
+    viewset action, e.g. `retrieve`, and the serialization time per model.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def get_histogram(self, name, labels, buckets):
+        key = (name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(buckets)
+        return self.histograms[key]
+
+    def observe(self, route, recorder, duration, size):
+        labels = (('route', route), ('action', recorder.action))
+        values = (duration, size, len(recorder.queries), sum(recorder.queries), recorder.serialization,
+                  recorder.render)
+        with self.lock:
+            for (name, buckets), value in zip(REQUEST_HISTOGRAMS, values):
+                if value is not None:
+                    self.get_histogram(name, labels, buckets).observe(value)
+            if recorder.model:
+                self.get_histogram('api_model_serialize_seconds', (('model', recorder.model),),
+                                   DURATION_BUCKETS).observe(recorder.serialization)
+
+    def snapshot(self):
+        """
+        Return `{(name, labels): (buckets, counts, sum)}`, `labels` being
+        `(label, value)` pairs.
+        """
+        with self.lock:
+            return {key: (histogram.buckets, list(histogram.counts), histogram.sum)
+                    for key, histogram in self.histograms.items()}
+
+
+_request_metrics = []
+
+
+def get_request_metrics():
+    if not _request_metrics:
+        _request_metrics.append(RequestMetrics())
+    return _request_metrics[0]
+
+
+@receiver(setting_changed)
+def reset_request_metrics(setting, **kwargs):
+    if setting == 'API_METRICS':
+        del _request_metrics[:]
+
+
+class TimedCursorMixin(object):
+    def execute(self, sql, params=None):
+        recorder = get_recorder()
+        if recorder is None:
+            return super().execute(sql, params)
+        started = perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            recorder.queries.append(perf_counter() - started)
+
+    def executemany(self, sql, param_list):
+        recorder = get_recorder()
+        if recorder is None:
+            return super().executemany(sql, param_list)
+        started = perf_counter()
+        try:
+            return super().executemany(sql, param_list)
+        finally:
+            recorder.queries.append(perf_counter() - started)
+
+
+class TimedCursorWrapper(TimedCursorMixin, CursorWrapper):
+    pass
+
+
+class TimedCursorDebugWrapper(TimedCursorMixin, CursorDebugWrapper):
+    pass
+
+
+@receiver(connection_created, dispatch_uid='request_metrics')
+def install_timed_cursors(sender, connection, **kwargs):
+    # once per connection wrapper, which reconnects through the same object
+    if getattr(connection, 'timed_cursors', False) or get_options() is None:
+        return
+    connection.make_cursor = lambda cursor: TimedCursorWrapper(cursor, connection)
+    connection.make_debug_cursor = lambda cursor: TimedCursorDebugWrapper(cursor, connection)
+    connection.timed_cursors = True
+
+
+def record_serialization(method):
+    """
+    Add the time spent in `method`, less its queries, to the serialization
+    time of the request. Nested calls are counted once.
+    """
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        recorder = get_recorder()
+        if recorder is None or recorder.serializing:
+            return method(*args, **kwargs)
+        recorder.serializing = True
+        queries = len(recorder.queries)
+        started = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            recorder.serialization += perf_counter() - started - sum(recorder.queries[queries:])
+            recorder.serializing = False
+
+    return wrapper
+
+
+class RequestMetricsMiddleware(object):
+    """
+    Records the queries, serialization and render time of every request
+    into the histograms of its route, and sends them in a `Server-Timing`
+    header unless `SERVER_TIMING` is off. With `SERVER_TIMING` set to
+    `'staff'` only authenticated staff users get the header.
+
+    It goes last in `MIDDLEWARE_CLASSES`, so its `process_response` runs
+    right after the response is rendered; the `app` duration leaves out
+    the middleware before it. Queries run while a streaming response is
+    sent are not counted.
+    """
+
+    def __init__(self):
+        options = get_options()
+        if options is None:
+            raise MiddlewareNotUsed
+        self.server_timing = options['SERVER_TIMING']
+
+    def process_request(self, request):
+        # also kept on the request for work done in other threads
+        request.metrics = RequestRecorder()
+        set_recorder(request.metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, 'metrics', None)
+        actions = getattr(view_func, 'actions', None)
+        if recorder is None or not actions:
+            return
+        recorder.action = actions.get(request.method.lower(), '')
+        queryset = getattr(view_func.cls, 'queryset', None)
+        if queryset is not None:
+            recorder.model = queryset.model.__name__
+
+    def process_template_response(self, request, response):
+        recorder = getattr(request, 'metrics', None)
+        if recorder is not None:
+            recorder.render_started = perf_counter()
+        return response
+
+    def process_response(self, request, response):
+        recorder = getattr(request, 'metrics', None)
+        if recorder is None:
+            return response
+        set_recorder(None)
+        finished = perf_counter()
+        if recorder.render_started is not None:
+            recorder.render = finished - recorder.render_started
+        duration = finished - recorder.started
+        match = getattr(request, 'resolver_match', None)
+        # the length of streamed bodies is unknown
+        size = None if response.streaming else len(response.content)
+        get_request_metrics().observe(match and match.url_name or 'unmatched', recorder, duration, size)
+        if self.sends_server_timing(request):
+            response['Server-Timing'] = recorder.server_timing(duration)
+        return response
+
+    def sends_server_timing(self, request):
+        if self.server_timing != 'staff':
+            return bool(self.server_timing)
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_authenticated() and user.is_staff)
+
+
+@receiver(request_finished, dispatch_uid='request_metrics')
+def reset_recorder(**kwargs):
+    set_recorder(None)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.core.validators
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Actor',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('name', models.CharField(max_length=20)),
+                ('surname', models.CharField(max_length=40)),
+            ],
+            options={
+                'ordering': ('surname', 'name'),
+            },
+        ),
+        migrations.CreateModel(
+            name='Director',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('name', models.CharField(max_length=20)),
+                ('surname', models.CharField(max_length=40)),
+            ],
+            options={
+                'ordering': ('surname', 'name'),
+            },
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('name', models.CharField(max_length=10, unique=True,
+                                          validators=[django.core.validators.MinLengthValidator(1)])),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Movie',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('title', models.CharField(max_length=100,
+                                           validators=[django.core.validators.MinLengthValidator(1)])),
+                ('animated', models.BooleanField(default=False)),
+                ('actor', models.ManyToManyField(related_name='plays', to='movie_database.Actor')),
+                ('director', models.ForeignKey(related_name='directs', to='movie_database.Director')),
+                ('genre', models.ManyToManyField(related_name='movie_genre', to='movie_database.Genre')),
+            ],
+            options={
+                'ordering': ('title',),
+            },
+        ),
+        migrations.CreateModel(
+            name='OscarAward',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('category', models.CharField(max_length=20, choices=[
+                    ('Best_Film', 'Best Film'), ('Best_Film_Editing', 'Best Film Editing'),
+                    ('Best_Scenario', 'Best Scenario'), ('Best_Adapter_Screenplay', 'Best Adapter Screenplay'),
+                    ('Best_Original_Song', 'Best Original Song')])),
+                ('year', models.IntegerField(validators=[django.core.validators.MinValueValidator(1929),
+                                                         django.core.validators.MaxValueValidator(2016)])),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='oscaraward',
+            unique_together=set([('category', 'year')]),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='oscar_award',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                                       to='movie_database.OscarAward'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='director',
+            unique_together=set([('surname', 'name')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='actor',
+            unique_together=set([('surname', 'name')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='movie',
+            unique_together=set([('title', 'director')]),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.core.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_database', '0002_updated'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='oscaraward',
+            name='year',
+            field=models.IntegerField(db_index=True, validators=[django.core.validators.MinValueValidator(1929),
+                                                                 django.core.validators.MaxValueValidator(2016)]),
+        ),
+        migrations.AlterIndexTogether(
+            name='movie',
+            index_together=set([('title', 'id'), ('director', 'title'), ('animated', 'title')]),
+        ),
+    ]
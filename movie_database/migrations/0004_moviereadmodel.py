@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_database', '0003_movie_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieReadModel',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100, db_index=True)),
+                ('animated', models.BooleanField(default=False)),
+                ('data', models.TextField()),
+                ('director', models.ForeignKey(related_name='+', on_delete=django.db.models.deletion.DO_NOTHING,
+                                               to='movie_database.Director', db_constraint=False)),
+            ],
+            options={
+                'ordering': ('title',),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='moviereadmodel',
+            index_together=set([('director', 'title'), ('animated', 'title')]),
+        ),
+    ]
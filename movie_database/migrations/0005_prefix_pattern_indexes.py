@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# Columns of the PrefixFilter filters, whose LIKE on PostgreSQL needs an
+# index with the pattern operator class. MovieReadModel.title has db_index,
+# for which Django already creates one.
+PATTERN_INDEXES = (
+    ('movie_database_movie', 'title'),
+    ('movie_database_actor', 'surname'),
+    ('movie_database_director', 'surname'),
+)
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in PATTERN_INDEXES:
+        schema_editor.execute('CREATE INDEX %s ON %s (%s varchar_pattern_ops)' % (
+            schema_editor.quote_name('%s_%s_like' % (table, column)), schema_editor.quote_name(table),
+            schema_editor.quote_name(column)))
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in PATTERN_INDEXES:
+        schema_editor.execute('DROP INDEX IF EXISTS %s' % schema_editor.quote_name('%s_%s_like' % (table, column)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie_database', '0004_moviereadmodel'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
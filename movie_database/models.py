@@ -13,7 +13,7 @@ class Genre(models.Model):
 
 class OscarAward(models.Model):
     category = models.CharField(max_length=20, choices=oscar_categories_tuple, null=False)
-    year = models.IntegerField(validators=[MinValueValidator(1929), MaxValueValidator(2016)])
+    year = models.IntegerField(validators=[MinValueValidator(1929), MaxValueValidator(2016)], db_index=True)
 
     class Meta:
         unique_together = ('category', 'year')
@@ -25,6 +25,7 @@ class OscarAward(models.Model):
 class Actor(models.Model):
     # should be inheritance from Person
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
     name = models.CharField(max_length=20, blank=False)
     surname = models.CharField(max_length=40, blank=False)
 
@@ -39,6 +40,7 @@ class Actor(models.Model):
 class Director(models.Model):
     # should be inheritance from Person
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
     name = models.CharField(max_length=20, blank=False)
     surname = models.CharField(max_length=40, blank=False)
 
@@ -52,6 +54,7 @@ class Director(models.Model):
 
 class Movie(models.Model):
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
     title = models.CharField(max_length=100, validators=[MinLengthValidator(1)])
     director = models.ForeignKey(Director, related_name='directs', null=False)
     actor = models.ManyToManyField(Actor, related_name='plays')
@@ -62,6 +65,28 @@ class Movie(models.Model):
     class Meta:
         ordering = ('title',)
         unique_together = ('title', 'director')
+        # the list in title order, and filtered by director or by animated
+        index_together = [('title', 'id'), ('director', 'title'), ('animated', 'title')]
+
+    def __str__(self):
+        return '%s' % (self.title)
+
+
+class MovieReadModel(models.Model):
+    """
+    Pre-rendered representation of a movie with the columns its list is
+    filtered and ordered by, kept in sync by `movie_database.read_model`.
+    """
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=100, db_index=True)
+    director = models.ForeignKey(Director, related_name='+', db_constraint=False, on_delete=models.DO_NOTHING)
+    animated = models.BooleanField(default=False)
+    # MovieSerializer output with relative URLs, as JSON
+    data = models.TextField()
+
+    class Meta:
+        ordering = ('title',)
+        index_together = [('director', 'title'), ('animated', 'title')]
 
     def __str__(self):
         return '%s' % (self.title)
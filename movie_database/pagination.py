@@ -0,0 +1,190 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.template import loader
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.compat import coreapi, template_render
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the model `Meta.ordering` with a primary key
+    tiebreak.
+
+    Pages are selected with a `WHERE (ordering) > (position)` condition
+    instead of an OFFSET, so a deep page costs the same as the first one.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = getattr(settings, 'API_PAGE_SIZE', 100)
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+    invalid_cursor_message = _('Invalid cursor')
+    template = 'rest_framework/pagination/previous_and_next.html'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.opts = queryset.model._meta
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        reverse, position = self.decode_cursor(request)
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the ordering used to build positions, ending with `pk`.
+
+        An ordering filter on the view takes precedence over the model
+        `Meta.ordering`.
+        """
+        ordering = None
+        for filter_cls in getattr(view, 'filter_backends', ()):
+            if hasattr(filter_cls, 'get_ordering'):
+                ordering = filter_cls().get_ordering(request, queryset, view)
+                break
+        ordering = tuple(ordering or self.opts.ordering)
+        if not any(field.lstrip('-') in ('pk', self.opts.pk.name) for field in ordering):
+            ordering += ('-pk' if ordering and ordering[0].startswith('-') else 'pk',)
+        return ordering
+
+    def get_position_filter(self, ordering, position):
+        """
+        Expand the `(ordering) > (position)` row comparison into lookups.
+
+        The leading column is also bounded on its own so the database can
+        turn the condition into an index range scan.
+        """
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [self.get_ordering_field(field).to_python(value) for field, value in zip(ordering, position)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        conditions = []
+        for index, field in enumerate(ordering):
+            lookup = '%s__%s' % (field.lstrip('-'), 'lt' if field.startswith('-') else 'gt')
+            condition = Q(**{lookup: position[index]})
+            for previous, value in zip(ordering[:index], position[:index]):
+                condition &= Q(**{previous.lstrip('-'): value})
+            conditions.append(condition)
+        bound = '%s__%s' % (ordering[0].lstrip('-'), 'lte' if ordering[0].startswith('-') else 'gte')
+        return Q(**{bound: position[0]}) & reduce(or_, conditions)
+
+    def get_ordering_field(self, field):
+        name = field.lstrip('-')
+        return self.opts.pk if name == 'pk' else self.opts.get_field(name)
+
+    def get_position(self, item):
+        """
+        Return the ordering values of `item`, a model instance or a
+        `.values()` row.
+        """
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if isinstance(item, dict):
+                position.append(item[self.opts.pk.name if name == 'pk' else name])
+            else:
+                attname = 'pk' if name == 'pk' else self.opts.get_field(name).attname
+                position.append(getattr(item, attname))
+        return position
+
+    def decode_cursor(self, request):
+        """
+        Return the `(reverse, position)` pair encoded in the request cursor.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            reverse, position = bool(cursor['r']), cursor['p']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or not all(isinstance(value, (str, int, float)) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def encode_cursor(self, reverse, item):
+        return self.cursor_url(self.base_url, reverse, self.get_position(item))
+
+    def cursor_url(self, url, reverse, position):
+        """
+        Return `url` with a cursor to the page after `position`, or before
+        it with `reverse`.
+        """
+        cursor = {'r': int(reverse), 'p': position}
+        encoded = urlsafe_b64encode(json.dumps(cursor, default=str).encode('utf-8')).decode('ascii')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_html_context(self):
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link()
+        }
+
+    def to_html(self):
+        template = loader.get_template(self.template)
+        context = self.get_html_context()
+        return template_render(template, context)
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, 'coreapi must be installed to use `get_schema_fields()`'
+        return [
+            coreapi.Field(name=self.cursor_query_param, required=False, location='query'),
+            coreapi.Field(name=self.page_size_query_param, required=False, location='query')
+        ]
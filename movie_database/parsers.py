@@ -0,0 +1,35 @@
+import cbor2
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from movie_database.renderers import CBORRenderer, MessagePackRenderer
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies.
+    """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as exc:
+            # the decoders raise their own exception types
+            raise ParseError('MessagePack parse error - %s' % exc)
+
+
+class CBORParser(BaseParser):
+    """
+    Parses CBOR request bodies.
+    """
+    media_type = 'application/cbor'
+    renderer_class = CBORRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return cbor2.loads(stream.read())
+        except Exception as exc:
+            raise ParseError('CBOR parse error - %s' % exc)
@@ -0,0 +1,212 @@
+"""
+Database connection pool, and a PostgreSQL backend using it.
+
+Select the backend with `'ENGINE': 'movie_database.pool'` and size the pool
+of each worker process with the `POOL` key of the database settings.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of DB-API connections opened with `connect`.
+
+    At most `max_size` connections are open at once; `acquire` waits up to
+    `timeout` seconds for one to be released and raises `PoolTimeout` after
+    that. Connections idle for longer than `check_interval` seconds are
+    checked with `check` before being handed out, and those older than
+    `max_lifetime` seconds are closed when released.
+    """
+
+    def __init__(self, connect, min_size=0, max_size=10, timeout=30.0, check=None, check_interval=30.0,
+                 max_lifetime=None):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self.check_interval = check_interval
+        self.max_lifetime = max_lifetime
+        # (connection, opened at, released at), the most recently used last
+        self.idle = deque()
+        # opening times of the connections by id, and the slots being opened
+        self.opened = {}
+        self.pending = 0
+        self.condition = threading.Condition()
+        self.counters = dict.fromkeys(
+            ('opened', 'closed', 'acquired', 'waited', 'timeouts', 'failed_checks'), 0)
+        self.wait_time = 0.0
+
+    @property
+    def size(self):
+        return len(self.opened) + self.pending
+
+    def open(self):
+        """
+        Open a connection in the slot reserved by incrementing `pending`.
+        """
+        try:
+            connection = self.connect()
+        except Exception:
+            with self.condition:
+                self.pending -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.pending -= 1
+            self.opened[id(connection)] = time.time()
+            self.counters['opened'] += 1
+        return connection
+
+    def discard(self, connection):
+        with self.condition:
+            if self.opened.pop(id(connection), None) is not None:
+                self.counters['closed'] += 1
+            self.condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def fill(self):
+        """
+        Open connections until the pool holds `min_size` of them.
+        """
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.pending += 1
+            connection = self.open()
+            self.release(connection)
+
+    def acquire(self):
+        started = time.time()
+        while True:
+            connection = self.take(started)
+            if connection is None:
+                return self.open()
+            connection, released = connection
+            if self.check is None or time.time() - released <= self.check_interval or self.check(connection):
+                return connection
+            with self.condition:
+                self.counters['failed_checks'] += 1
+            self.discard(connection)
+
+    def take(self, started):
+        """
+        Return `(connection, released at)` for an idle connection, or
+        `None` after reserving a slot for a new one.
+        """
+        with self.condition:
+            waited = False
+            while not self.idle and self.size >= self.max_size:
+                remaining = started + self.timeout - time.time()
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    raise PoolTimeout('No database connection was released within %s seconds' % self.timeout)
+                waited = True
+                self.condition.wait(remaining)
+            if waited:
+                self.counters['waited'] += 1
+                self.wait_time += time.time() - started
+            self.counters['acquired'] += 1
+            if self.idle:
+                connection, opened, released = self.idle.pop()
+                return connection, released
+            self.pending += 1
+            return None
+
+    def release(self, connection, discard=False):
+        """
+        Return a connection, closing it when `discard` is set, when it
+        outlived `max_lifetime` or when it is not part of the pool.
+        """
+        with self.condition:
+            opened = self.opened.get(id(connection))
+            expired = opened is not None and self.max_lifetime is not None and \
+                time.time() - opened > self.max_lifetime
+            if not discard and not expired and opened is not None:
+                self.idle.append((connection, opened, time.time()))
+                self.condition.notify()
+                return
+        self.discard(connection)
+
+    def guard(self, owner, connection):
+        """
+        Discard `connection` when `owner` is garbage collected, e.g. the
+        connection wrapper of a thread that ended without closing it, so its
+        slot is not lost. Return the finalizer, to `detach` on release.
+        """
+        return weakref.finalize(owner, self.discard, connection)
+
+    def close(self):
+        """
+        Close the idle connections.
+        """
+        with self.condition:
+            idle, self.idle = self.idle, deque()
+        for connection, opened, released in idle:
+            self.discard(connection)
+
+    def stats(self):
+        with self.condition:
+            stats = dict(self.counters)
+            stats.update({
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'wait_seconds': self.wait_time,
+            })
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, options=None, check=None):
+    """
+    Return the pool of the database `alias` in this process, creating it
+    from the `POOL` settings in `options` on first use.
+
+    Pools are kept per process id, so a forked worker opens its own
+    connections instead of sharing those of its parent.
+    """
+    key = (alias, os.getpid())
+    if key not in _pools:
+        with _pools_lock:
+            if key not in _pools:
+                options = options or {}
+                pool = ConnectionPool(
+                    connect,
+                    min_size=options.get('MIN_SIZE', 0),
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 30.0),
+                    check=check,
+                    check_interval=options.get('CHECK_INTERVAL', 30.0),
+                    max_lifetime=options.get('MAX_LIFETIME'),
+                )
+                pool.fill()
+                _pools[key] = pool
+    return _pools[key]
+
+
+def get_pools():
+    """
+    Return `{alias: pool}` for the pools of this process.
+    """
+    pid = os.getpid()
+    return {alias: pool for (alias, owner), pool in _pools.items() if owner == pid}
@@ -0,0 +1,71 @@
+from functools import partial
+
+from django.db.backends.postgresql_psycopg2 import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from movie_database.pool import get_pool
+
+Database = base.Database
+DatabaseError = base.DatabaseError
+IntegrityError = base.IntegrityError
+
+
+def connect(conn_params, isolation_level):
+    """
+    Open a connection for the pool. It holds the connection parameters
+    rather than a wrapper, which would otherwise live as long as the pool.
+    """
+    connection = Database.connect(**conn_params)
+    if isolation_level is not None and isolation_level != connection.isolation_level:
+        connection.set_session(isolation_level=isolation_level)
+    return connection
+
+
+def connection_is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend borrowing its connections from the pool of the worker
+    process instead of connecting on every request.
+
+    Closing the connection, e.g. at the end of a request with a
+    `CONN_MAX_AGE` of 0, gives it back to the pool after rolling back any
+    open transaction; connections that saw errors and no longer answer are
+    closed instead. The connection of a thread that ends without closing it
+    is closed when its wrapper is collected.
+    """
+
+    @property
+    def pool(self):
+        connect_pooled = partial(connect, self.get_connection_params(),
+                                 self.settings_dict['OPTIONS'].get('isolation_level'))
+        return get_pool(self.alias, connect_pooled, self.settings_dict.get('POOL'), connection_is_usable)
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        self.pool_guard = self.pool.guard(self, connection)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        self.pool_guard.detach()
+        # closed inside an atomic block the wrapper keeps the connection
+        discard = self.in_atomic_block or self.autocommit != self.settings_dict['AUTOCOMMIT'] or \
+            (self.errors_occurred and not self.is_usable())
+        if not discard and self.connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                self.connection.rollback()
+            except Database.Error:
+                discard = True
+        self.pool.release(self.connection, discard)
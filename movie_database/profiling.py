@@ -0,0 +1,292 @@
+"""
+Sampling profiler for single requests in production.
+
+A request is profiled when it is drawn at `SAMPLE_RATE`, or when it sends
+`HEADER` with `TOKEN` as its value. While it runs, a sampler thread records
+the stacks of the threads working for it every `INTERVAL` seconds; the
+sampler sleeps while no request is profiled, so other requests only pay
+for the check in `process_request`.
+
+The samples of each route are summed per worker and written, by a thread
+of the worker every `FLUSH_INTERVAL` seconds and when it exits, to
+`<DIRECTORY>/<route>.<pid>.folded`, as collapsed stacks for flamegraph.pl
+or speedscope (`cat movie-list.*.folded | flamegraph.pl > movie-list.svg`),
+and `<route>.<pid>.txt`, the hottest frames of the `FOCUS` modules.
+"""
+import atexit
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_finished, setting_changed
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+# The profile of the request this thread works for, or None
+_state = threading.local()
+
+
+def get_options():
+    """
+    Return the `API_PROFILER` options, or `None` when profiling is off.
+    """
+    options = getattr(settings, 'API_PROFILER', None)
+    if options is None:
+        return None
+    defaults = {
+        'SAMPLE_RATE': 0.0,
+        'HEADER': 'X-Profile',
+        'TOKEN': None,
+        'INTERVAL': 0.01,
+        'FLUSH_INTERVAL': 5,
+        'DIRECTORY': os.path.join(tempfile.gettempdir(), 'mini_rest_project-profiles'),
+        'FOCUS': ('movie_database', 'rest_framework'),
+        'TOP': 30,
+    }
+    defaults.update(options)
+    return defaults
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return '%s:%s:%d' % (frame.f_globals.get('__name__', code.co_filename), code.co_name, code.co_firstlineno)
+
+
+def collapse(frame):
+    """
+    Return the stack of `frame` as a tuple of frame names, outermost first.
+    """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+class Profile(object):
+    """
+    The stack samples of one request, taken from the threads that
+    `set_profile` to it.
+    """
+
+    def __init__(self):
+        self.threads = set()
+        self.stacks = Counter()
+
+    def sample(self, frames):
+        for ident in list(self.threads):
+            frame = frames.get(ident)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+
+def get_profile():
+    return getattr(_state, 'profile', None)
+
+
+def set_profile(profile):
+    current = get_profile()
+    if current is profile:
+        return
+    ident = threading.get_ident()
+    if current is not None:
+        current.threads.discard(ident)
+    if profile is not None:
+        profile.threads.add(ident)
+    _state.profile = profile
+
+
+class StackSampler(object):
+    """
+    Samples the stacks of the running profiles every `interval` seconds, in
+    a thread that waits while there are none.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.profiles = set()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def start(self, profile):
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+                self.thread.start()
+            self.profiles.add(profile)
+            self.condition.notify()
+
+    def stop(self, profile):
+        # waits for a sample in progress, so `profile` no longer changes
+        with self.condition:
+            self.profiles.discard(profile)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.profiles:
+                    self.condition.wait()
+                frames = sys._current_frames()
+                for profile in self.profiles:
+                    profile.sample(frames)
+                del frames
+            time.sleep(self.interval)
+
+
+class RouteProfiles(object):
+    """
+    The samples of the profiled requests of every route in this worker.
+    Requests only add to them; a thread writes the routes that changed
+    every `flush_interval` seconds.
+    """
+
+    def __init__(self, directory, focus, top, flush_interval):
+        self.directory = directory
+        self.focus = tuple(focus)
+        self.top = top
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.routes = {}
+        self.dirty = set()
+        self.flusher = None
+
+    def add(self, route, profile):
+        with self.lock:
+            stacks, requests = self.routes.get(route, (Counter(), 0))
+            stacks.update(profile.stacks)
+            self.routes[route] = (stacks, requests + 1)
+            self.dirty.add(route)
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self.flush_periodically, name='profile-flusher', daemon=True)
+                self.flusher.start()
+                atexit.register(self.flush)
+
+    def flush(self):
+        """
+        Write the routes that changed since the last flush.
+        """
+        # one flush at a time, so a flush returns once the files are written
+        with self.flush_lock:
+            with self.lock:
+                changed = [(route, Counter(self.routes[route][0]), self.routes[route][1]) for route in self.dirty]
+                self.dirty.clear()
+            for route, stacks, requests in changed:
+                try:
+                    self.write(route, stacks, requests)
+                except OSError:
+                    # e.g. the directory is not writable; the next request to
+                    # the route writes it again
+                    pass
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def hottest_frames(self, stacks):
+        """
+        Return `(name, inner samples, total samples)` of the frames of the
+        `focus` modules, the most sampled first. A frame is inner in the
+        samples where it is the last frame of the `focus` modules, so the
+        time of the libraries it calls counts for it.
+        """
+        inner, total = Counter(), Counter()
+        for stack, count in stacks.items():
+            focused = [name for name in stack if name.startswith(self.focus)]
+            if focused:
+                inner[focused[-1]] += count
+            for name in set(focused):
+                total[name] += count
+        frames = sorted(total, key=lambda name: (-inner[name], -total[name], name))
+        return [(name, inner[name], total[name]) for name in frames[:self.top]]
+
+    def write(self, route, stacks, requests):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, '%s.%d' % (route, os.getpid()))
+        with open(path + '.folded', 'w') as folded:
+            for stack, count in sorted(stacks.items()):
+                folded.write('%s %d\n' % (';'.join(stack), count))
+        with open(path + '.txt', 'w') as summary:
+            summary.write('# %d samples of %d requests to %s\n' % (sum(stacks.values()), requests, route))
+            summary.write('%8s %8s  %s\n' % ('inner', 'total', 'frame'))
+            for name, inner, total in self.hottest_frames(stacks):
+                summary.write('%8d %8d  %s\n' % (inner, total, name))
+
+
+_profiler = []
+
+
+def get_profiler():
+    """
+    Return `(sampler, route profiles)` of this process.
+    """
+    if not _profiler or _profiler[0] != os.getpid():
+        options = get_options()
+        _profiler[:] = [os.getpid(), StackSampler(options['INTERVAL']),
+                        RouteProfiles(options['DIRECTORY'], options['FOCUS'], options['TOP'],
+                                      options['FLUSH_INTERVAL'])]
+    return _profiler[1], _profiler[2]
+
+
+@receiver(setting_changed)
+def reset_profiler(setting, **kwargs):
+    if setting == 'API_PROFILER':
+        del _profiler[:]
+
+
+class SamplingProfilerMiddleware(object):
+    """
+    Profiles the requests drawn at `SAMPLE_RATE` and those sending `HEADER`
+    with `TOKEN`; the latter get the sample count in their response. It
+    goes first in `MIDDLEWARE_CLASSES`, so the other middleware is
+    profiled too.
+    """
+
+    def __init__(self):
+        options = get_options()
+        if options is None:
+            raise MiddlewareNotUsed
+        self.sample_rate = options['SAMPLE_RATE']
+        self.header = options['HEADER']
+        self.meta_key = 'HTTP_' + options['HEADER'].upper().replace('-', '_')
+        self.token = options['TOKEN']
+
+    def is_requested(self, request):
+        value = request.META.get(self.meta_key)
+        return value is not None and self.token is not None and constant_time_compare(value, self.token)
+
+    def process_request(self, request):
+        requested = self.meta_key in request.META and self.is_requested(request)
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return
+        # also kept on the request for work done in other threads
+        request.profile = Profile()
+        request.profile_requested = requested
+        set_profile(request.profile)
+        get_profiler()[0].start(request.profile)
+
+    def process_response(self, request, response):
+        profile = getattr(request, 'profile', None)
+        if profile is None:
+            return response
+        set_profile(None)
+        sampler, routes = get_profiler()
+        sampler.stop(profile)
+        match = getattr(request, 'resolver_match', None)
+        routes.add(match and match.url_name or 'unmatched', profile)
+        if request.profile_requested:
+            response[self.header + '-Samples'] = str(sum(profile.stacks.values()))
+        return response
+
+
+@receiver(request_finished, dispatch_uid='sampling_profiler')
+def reset_profile(**kwargs):
+    set_profile(None)
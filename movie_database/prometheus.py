@@ -0,0 +1,252 @@
+"""
+Prometheus exposition of the request metrics, the response cache and the
+connection pools.
+
+Every worker process writes its own snapshot to `<DIRECTORY>/<pid>.json`,
+every `FLUSH_INTERVAL` seconds and when it exits, so workers never share a
+lock or a file; `/metrics` merges the snapshots of all of them. Counters of
+workers that exited are kept until their snapshot is `SNAPSHOT_EXPIRY`
+seconds old, then the snapshot is removed; Prometheus sees the drop as a
+counter reset.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.core.signals import request_started
+from django.dispatch import receiver
+
+from movie_database.cache import get_response_cache
+from movie_database.metrics import get_options, get_request_metrics
+from movie_database.pool import get_pools
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DESCRIPTIONS = {
+    'api_request_duration_seconds': 'Time from the request to the rendered response.',
+    'api_response_size_bytes': 'Size of the response body before compression.',
+    'api_db_queries': 'Database queries per request.',
+    'api_db_seconds': 'Time spent in database queries per request.',
+    'api_serialize_seconds': 'Time spent serializing per request, queries excluded.',
+    'api_render_seconds': 'Time spent rendering the response per request.',
+    'api_model_serialize_seconds': 'Time spent serializing per request, by the model of the viewset.',
+    'api_response_cache_hits_total': 'Response cache lookups that found a response.',
+    'api_response_cache_misses_total': 'Response cache lookups that found nothing.',
+    'api_response_cache_invalidations_total': 'Response cache invalidations.',
+    'api_response_cache_hit_ratio': 'Share of the response cache lookups that found a response.',
+    'api_db_pool_connections': 'Open pooled connections.',
+    'api_db_pool_max_size': 'Connections a pool may open.',
+    'api_db_pool_events_total': 'Pool events: connections opened, closed, acquired, waited for, timed out '
+                                'and failing their check.',
+    'api_db_pool_wait_seconds_total': 'Time spent waiting for a pooled connection.',
+    'api_metrics_workers': 'Worker processes whose metrics are merged.',
+}
+
+POOL_EVENTS = ('opened', 'closed', 'acquired', 'waited', 'timeouts', 'failed_checks')
+
+
+def collect_local():
+    """
+    Return the metrics of this process as a JSON-able snapshot.
+    """
+    histograms = [[name, labels, buckets, counts, total]
+                  for (name, labels), (buckets, counts, total) in get_request_metrics().snapshot().items()]
+    counters, gauges = [], []
+    cache = get_response_cache()
+    if cache is not None:
+        stats = cache.stats()
+        for name in ('hits', 'misses', 'invalidations'):
+            counters.append(['api_response_cache_%s_total' % name, [], stats[name]])
+    for alias, pool in get_pools().items():
+        stats = pool.stats()
+        database = [['database', alias]]
+        for event in POOL_EVENTS:
+            counters.append(['api_db_pool_events_total', database + [['event', event]], stats[event]])
+        counters.append(['api_db_pool_wait_seconds_total', database, stats['wait_seconds']])
+        gauges.append(['api_db_pool_connections', database + [['state', 'idle']], stats['idle']])
+        gauges.append(['api_db_pool_connections', database + [['state', 'in_use']], stats['in_use']])
+        gauges.append(['api_db_pool_max_size', database, stats['max_size']])
+    return {'pid': os.getpid(), 'histograms': histograms, 'counters': counters, 'gauges': gauges}
+
+
+def write_snapshot(directory):
+    snapshot = collect_local()
+    # readers never see a partly written file
+    descriptor, path = tempfile.mkstemp(dir=directory, prefix='.%d.' % snapshot['pid'])
+    with os.fdopen(descriptor, 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    os.replace(path, os.path.join(directory, '%d.json' % snapshot['pid']))
+
+
+def read_snapshots(directory, expiry=None):
+    """
+    Return the snapshots in `directory`, removing those of workers that
+    exited and last wrote more than `expiry` seconds ago.
+    """
+    snapshots = []
+    for name in os.listdir(directory):
+        if name.endswith('.json') and not name.startswith('.'):
+            path = os.path.join(directory, name)
+            try:
+                if expiry is not None and is_expired(path, expiry):
+                    os.remove(path)
+                    continue
+                with open(path) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError):
+                continue
+    return snapshots
+
+
+def is_expired(path, expiry):
+    pid = os.path.basename(path)[:-len('.json')]
+    if not pid.isdigit() or int(pid) == os.getpid() or is_running(int(pid)):
+        return False
+    return time.time() - os.path.getmtime(path) > expiry
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def key_of(name, labels):
+    return name, tuple(tuple(pair) for pair in labels)
+
+
+def merge_snapshots(snapshots):
+    """
+    Sum the histograms and counters of `snapshots`, and the gauges of the
+    workers still running. Return `(histograms, counters, gauges)` keyed by
+    `(name, labels)`.
+    """
+    histograms, counters, gauges = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, buckets, counts, total in snapshot['histograms']:
+            key = key_of(name, labels)
+            if key in histograms:
+                merged = histograms[key]
+                histograms[key] = (buckets, [a + b for a, b in zip(merged[1], counts)], merged[2] + total)
+            else:
+                histograms[key] = (buckets, counts, total)
+        for name, labels, value in snapshot['counters']:
+            key = key_of(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        if snapshot['pid'] == os.getpid() or is_running(snapshot['pid']):
+            for name, labels, value in snapshot['gauges']:
+                key = key_of(name, labels)
+                gauges[key] = gauges.get(key, 0) + value
+            gauges[('api_metrics_workers', ())] = gauges.get(('api_metrics_workers', ()), 0) + 1
+    lookups = sum(counters.get(key_of('api_response_cache_%s_total' % name, []), 0) for name in ('hits', 'misses'))
+    if lookups:
+        gauges[('api_response_cache_hit_ratio', ())] = float(
+            counters[key_of('api_response_cache_hits_total', [])]) / lookups
+    return histograms, counters, gauges
+
+
+def collect_metrics():
+    """
+    Return the merged metrics of every worker, or of this process when
+    `API_METRICS` has no `DIRECTORY`.
+    """
+    options = get_options()
+    directory = options['DIRECTORY']
+    if directory is None:
+        return merge_snapshots([collect_local()])
+    os.makedirs(directory, exist_ok=True)
+    write_snapshot(directory)
+    return merge_snapshots(read_snapshots(directory, options['SNAPSHOT_EXPIRY']))
+
+
+def format_labels(labels, extra=()):
+    labels = tuple(labels) + tuple(extra)
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+                                          .replace('\n', r'\n')) for name, value in labels)
+
+
+def format_value(value):
+    if isinstance(value, float) and value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+def render_metrics(metrics):
+    """
+    Return `metrics`, as returned by `merge_snapshots`, in the Prometheus
+    text format.
+    """
+    histograms, counters, gauges = metrics
+    families = {}
+    for kind, series in (('histogram', histograms), ('counter', counters), ('gauge', gauges)):
+        for name, labels in series:
+            families.setdefault(name, (kind, series, []))[2].append(labels)
+
+    lines = []
+    for name in sorted(families):
+        kind, series, label_sets = families[name]
+        if name in DESCRIPTIONS:
+            lines.append('# HELP %s %s' % (name, DESCRIPTIONS[name]))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for labels in sorted(label_sets):
+            if kind != 'histogram':
+                lines.append('%s%s %s' % (name, format_labels(labels), format_value(series[name, labels])))
+                continue
+            buckets, counts, total = series[name, labels]
+            cumulative = 0
+            for bound, count in zip(list(buckets) + [float('inf')], counts):
+                cumulative += count
+                lines.append('%s_bucket%s %d' % (name, format_labels(labels, [('le', format_value(bound))]),
+                                                 cumulative))
+            lines.append('%s_sum%s %s' % (name, format_labels(labels), format_value(float(total))))
+            lines.append('%s_count%s %d' % (name, format_labels(labels), cumulative))
+    return '\n'.join(lines) + '\n'
+
+
+_flusher = []
+_flusher_lock = threading.Lock()
+
+
+def flush(directory):
+    try:
+        write_snapshot(directory)
+    except OSError:
+        # e.g. the directory was removed; the next flush tries again
+        pass
+
+
+def flush_periodically(directory, interval):
+    while True:
+        time.sleep(interval)
+        flush(directory)
+
+
+@receiver(request_started, dispatch_uid='prometheus')
+def start_flusher(**kwargs):
+    """
+    Start writing the snapshots of this process, once per worker: workers
+    forked from a process that already did start their own.
+    """
+    if _flusher and _flusher[0] == os.getpid():
+        return
+    options = get_options()
+    if options is None or options['DIRECTORY'] is None:
+        return
+    with _flusher_lock:
+        if _flusher and _flusher[0] == os.getpid():
+            return
+        os.makedirs(options['DIRECTORY'], exist_ok=True)
+        thread = threading.Thread(target=flush_periodically, args=(options['DIRECTORY'], options['FLUSH_INTERVAL']),
+                                  name='metrics-flusher', daemon=True)
+        thread.start()
+        atexit.register(flush, options['DIRECTORY'])
+        _flusher[:] = [os.getpid()]
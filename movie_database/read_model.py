@@ -0,0 +1,130 @@
+import json
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.utils.encoders import JSONEncoder
+
+from movie_database.compiled import compile_serializer
+from movie_database.models import Genre, OscarAward, Actor, Movie, MovieReadModel
+from movie_database.serializers import MovieSerializer
+from movie_database.signals import movies_bulk_created
+
+
+def read_model_enabled():
+    return getattr(settings, 'API_MOVIE_READ_MODEL', False)
+
+
+def build_read_models(queryset):
+    """
+    Return unsaved `MovieReadModel` rows for the movies of `queryset`,
+    rendered without a request so their URLs are relative.
+    """
+    compiled = compile_serializer(MovieSerializer(context={'request': None, 'format': None}))
+    rows = list(compiled.values(queryset.order_by(), ('title', 'director', 'animated')))
+    return [
+        MovieReadModel(id=row['id'], title=row['title'], director_id=row['director'], animated=row['animated'],
+                       data=json.dumps(data, cls=JSONEncoder))
+        for row, data in zip(rows, compiled.to_representation(rows))
+    ]
+
+
+def refresh_read_models(pks):
+    """
+    Re-render the read model rows of the movies in `pks`, dropping those of
+    movies that no longer exist.
+    """
+    pks = list(set(pks))
+    batch_size = max(connections[MovieReadModel.objects.db].ops.bulk_batch_size(['id'], pks), 1)
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start:start + batch_size]
+        rows = build_read_models(Movie.objects.filter(pk__in=batch))
+        with transaction.atomic():
+            MovieReadModel.objects.filter(pk__in=batch).delete()
+            MovieReadModel.objects.bulk_create(rows)
+
+
+def rebuild_read_models(chunk_size=500):
+    """
+    Replace the read model table with freshly rendered rows, one chunk of
+    movies at a time. Return the number of rows written.
+    """
+    count, last = 0, None
+    with transaction.atomic():
+        MovieReadModel.objects.all().delete()
+        while True:
+            queryset = Movie.objects.order_by('pk')
+            if last is not None:
+                queryset = queryset.filter(pk__gt=last)
+            pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            MovieReadModel.objects.bulk_create(build_read_models(Movie.objects.filter(pk__in=pks)))
+            count, last = count + len(pks), pks[-1]
+    return count
+
+
+# Only the rows whose representation changed are refreshed. It shows the
+# primary keys of the director, the award and the ordered actors and genres,
+# so edits of a director, a genre or an award leave the movies as they are.
+
+@receiver(post_save, sender=Movie, dispatch_uid='movie_read_model')
+def refresh_saved_movie(sender, instance, raw=False, **kwargs):
+    if read_model_enabled() and not raw:
+        refresh_read_models([instance.pk])
+
+
+@receiver(post_delete, sender=Movie, dispatch_uid='movie_read_model')
+def delete_movie_read_model(sender, instance, **kwargs):
+    # also reached when deleting a director cascades to its movies
+    if read_model_enabled():
+        MovieReadModel.objects.filter(pk=instance.pk).delete()
+
+
+@receiver(movies_bulk_created, dispatch_uid='movie_read_model')
+def refresh_bulk_created_movies(sender, movies, **kwargs):
+    if read_model_enabled():
+        refresh_read_models([movie.pk for movie in movies])
+
+
+@receiver(post_save, sender=Actor, dispatch_uid='movie_read_model')
+def refresh_movies_of_saved_actor(sender, instance, created=False, raw=False, **kwargs):
+    # movies list their actors in surname order
+    if read_model_enabled() and not created and not raw:
+        refresh_read_models(Movie.objects.filter(actor=instance).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Actor, dispatch_uid='movie_read_model')
+@receiver(pre_delete, sender=Genre, dispatch_uid='movie_read_model')
+@receiver(pre_delete, sender=OscarAward, dispatch_uid='movie_read_model')
+def remember_movies_of_deleted_relation(sender, instance, **kwargs):
+    if read_model_enabled():
+        lookup = {Actor: 'actor', Genre: 'genre', OscarAward: 'oscar_award'}[sender]
+        instance._read_model_movies = list(Movie.objects.filter(**{lookup: instance}).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Actor, dispatch_uid='movie_read_model')
+@receiver(post_delete, sender=Genre, dispatch_uid='movie_read_model')
+@receiver(post_delete, sender=OscarAward, dispatch_uid='movie_read_model')
+def refresh_movies_of_deleted_relation(sender, instance, **kwargs):
+    if read_model_enabled():
+        refresh_read_models(getattr(instance, '_read_model_movies', ()))
+
+
+@receiver(m2m_changed, sender=Movie.actor.through, dispatch_uid='movie_read_model')
+@receiver(m2m_changed, sender=Movie.genre.through, dispatch_uid='movie_read_model')
+def refresh_movies_of_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not read_model_enabled():
+        return
+    if not reverse:
+        if action.startswith('post_'):
+            refresh_read_models([instance.pk])
+        return
+    name = 'actor' if sender is Movie.actor.through else 'genre'
+    if action == 'pre_clear':
+        instance._read_model_movies = list(Movie.objects.filter(**{name: instance}).values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_read_models(getattr(instance, '_read_model_movies', ()))
+    elif action in ('post_add', 'post_remove'):
+        refresh_read_models(pk_set)
@@ -0,0 +1,101 @@
+import cbor2
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _ujson_supports_default():
+    # ujson only calls `default` for unknown types since 5.x, older versions
+    # reject the argument and would turn datetimes into timestamps.
+    try:
+        ujson.dumps(None, default=str)
+    except TypeError:
+        return False
+    return True
+
+
+ENCODERS = ('json',)
+if ujson is not None and _ujson_supports_default():
+    ENCODERS = ('ujson',) + ENCODERS
+if orjson is not None:
+    ENCODERS = ('orjson',) + ENCODERS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` encoding with the fastest of orjson, ujson and the
+    standard library `json` that is installed.
+
+    Types the fast encoders do not handle the same way, like datetimes and
+    lazy translation strings, go through the `encoder_class` of
+    `JSONRenderer`, so the output does not depend on the encoder. Indented
+    output and the non-default `UNICODE_JSON`/`COMPACT_JSON` settings are
+    left to `JSONRenderer`.
+    """
+    encoder = ENCODERS[0]
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.encoder == 'json' or self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = getattr(self, 'encode_%s' % self.encoder)(data)
+        except (TypeError, OverflowError):
+            # e.g. integers past 64 bits; the standard encoder reports
+            # values nothing can encode
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            # same javascript-safe escaping as `JSONRenderer`
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+    def encode_orjson(self, data):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(data, default=self.encoder_class().default, option=options)
+
+    def encode_ujson(self, data):
+        return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False,
+                           default=self.encoder_class().default).encode('utf-8')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders MessagePack, with values outside the JSON data model converted
+    the same way as by `JSONRenderer`.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = encoders.JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        return msgpack.packb(data, default=self.encoder_class().default, use_bin_type=True)
+
+
+class CBORRenderer(MessagePackRenderer):
+    """
+    Renders CBOR. Values CBOR has no type for are converted the same way as
+    by `JSONRenderer`.
+    """
+    media_type = 'application/cbor'
+    format = 'cbor'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        default = self.encoder_class().default
+        return cbor2.dumps(data, default=lambda encoder, value: encoder.encode(default(value)))
@@ -0,0 +1,106 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The replica the requests of this thread read from, or None for the primary
+_state = threading.local()
+
+
+def get_options():
+    options = {
+        'PRIMARY': 'default',
+        'REPLICAS': (),
+        'PIN_SECONDS': 5,
+        'COOKIE': 'read_primary_until',
+        'HEADER': 'X-Read-Primary-Until',
+    }
+    options.update(getattr(settings, 'API_DATABASE_ROUTING', {}))
+    return options
+
+
+def get_read_database():
+    """
+    Return the replica the current request reads from, or `None`.
+    """
+    return getattr(_state, 'database', None)
+
+
+def set_read_database(alias):
+    _state.database = alias
+
+
+def replication_window():
+    """
+    Return how many seconds replicas are assumed to lag behind the primary.
+    """
+    return get_options()['PIN_SECONDS']
+
+
+class ReplicaRouter(object):
+    """
+    Sends the reads of safe requests to the replica chosen for them by
+    `ReplicaRoutingMiddleware`, and everything else to the primary. Reads
+    outside requests, e.g. in management commands, stay on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_database() or get_options()['PRIMARY']
+
+    def db_for_write(self, model, **hints):
+        return get_options()['PRIMARY']
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model=None, **hints):
+        # replicas get their schema through replication
+        return db not in get_options()['REPLICAS']
+
+
+class ReplicaRoutingMiddleware(object):
+    """
+    Picks a replica for every safe request, unless the client wrote less
+    than `PIN_SECONDS` ago. Responses to writes carry the time until which
+    the client reads from the primary in `COOKIE` and `HEADER`; clients
+    without cookies send `HEADER` back.
+    """
+
+    def process_request(self, request):
+        options = get_options()
+        database = None
+        if options['REPLICAS'] and request.method in SAFE_METHODS and not self.is_pinned(request, options):
+            database = random.choice(options['REPLICAS'])
+        # also kept on the request for work done in other threads
+        request.read_database = database
+        set_read_database(database)
+
+    def is_pinned(self, request, options):
+        header = 'HTTP_' + options['HEADER'].upper().replace('-', '_')
+        for value in (request.COOKIES.get(options['COOKIE']), request.META.get(header)):
+            try:
+                if value is not None and float(value) > time.time():
+                    return True
+            except ValueError:
+                pass
+        return False
+
+    def process_response(self, request, response):
+        options = get_options()
+        if options['REPLICAS'] and request.method not in SAFE_METHODS:
+            until = '%.3f' % (time.time() + options['PIN_SECONDS'])
+            response.set_cookie(options['COOKIE'], until, max_age=options['PIN_SECONDS'], httponly=True)
+            response[options['HEADER']] = until
+        return response
+
+
+@receiver(request_finished, dispatch_uid='replica_routing')
+def reset_read_database(**kwargs):
+    # after streamed bodies, which read while the response is sent
+    set_read_database(None)
@@ -0,0 +1,328 @@
+import re
+from collections import OrderedDict
+from functools import reduce
+from operator import and_, or_
+
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from movie_database.models import Genre, Actor, Director, Movie
+from movie_database.signals import movies_bulk_created
+
+# Indexed models and the fields of their document text
+DOCUMENTS = OrderedDict([
+    ('movie', (Movie, ('title',))),
+    ('actor', (Actor, ('name', 'surname'))),
+    ('director', (Director, ('name', 'surname'))),
+    ('genre', (Genre, ('name',))),
+])
+KINDS = list(DOCUMENTS)
+KIND_OF_MODEL = {model: kind for kind, (model, fields) in DOCUMENTS.items()}
+
+INDEX_TABLE = 'movie_database_search'
+
+
+def tokenize(query):
+    return re.findall(r'\w+', query.lower(), re.UNICODE)
+
+
+def document_text(instance):
+    model, fields = DOCUMENTS[KIND_OF_MODEL[type(instance)]]
+    return ' '.join(getattr(instance, name) for name in fields)
+
+
+def document_id(kind, pk):
+    # one integer key for the object of every kind
+    return pk * len(KINDS) + KINDS.index(kind)
+
+
+def split_document_id(key):
+    pk, kind = divmod(key, len(KINDS))
+    return KINDS[kind], pk
+
+
+class IndexedSearchBackend(object):
+    """
+    Keeps one row per document in `INDEX_TABLE`, keyed by `document_id`.
+    """
+    create_statements = ()
+    insert_statement = None
+
+    def __init__(self, using):
+        self.using = using
+
+    @property
+    def connection(self):
+        # backends are shared by the threads, connections are not
+        return connections[self.using]
+
+    def installed(self):
+        with self.connection.cursor() as cursor:
+            return INDEX_TABLE in self.connection.introspection.table_names(cursor)
+
+    def install(self):
+        """
+        Create the index table unless it exists. Return whether it did.
+        """
+        if self.installed():
+            return False
+        with self.connection.cursor() as cursor:
+            for statement in self.create_statements:
+                cursor.execute(statement)
+        return True
+
+    def count(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM %s' % INDEX_TABLE)
+            return cursor.fetchone()[0]
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s' % INDEX_TABLE)
+
+    def remove(self, keys):
+        keys = list(keys)
+        batch_size = max(self.connection.ops.bulk_batch_size(['id'], keys), 1)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                cursor.execute('DELETE FROM %s WHERE %s IN (%s)' % (
+                    INDEX_TABLE, self.key_column, ', '.join(['%s'] * len(batch))), batch)
+
+    def index(self, documents):
+        """
+        Add or replace `(kind, pk, text)` documents.
+        """
+        rows = [(document_id(kind, pk), text) for kind, pk, text in documents]
+        with transaction.atomic(using=self.using):
+            self.remove(key for key, text in rows)
+            with self.connection.cursor() as cursor:
+                cursor.executemany(self.insert_statement, [self.insert_params(key, text) for key, text in rows])
+
+    def insert_params(self, key, text):
+        return key, text
+
+    def valid_position(self, position):
+        return len(position) == 2 and isinstance(position[0], (int, float)) and not isinstance(position[0], bool) \
+            and isinstance(position[1], int) and not isinstance(position[1], bool)
+
+    def search(self, tokens, limit, position=None, reverse=False):
+        """
+        Return up to `limit` `(kind, pk, text, position)` documents matching
+        every token as a prefix, best first, that come after `position`;
+        with `reverse`, those before it, nearest first.
+
+        Positions are `[rank, key]` pairs, so a page starts where the last
+        one ended instead of ranking and skipping every earlier match.
+        """
+        ascending = self.rank_ascending != reverse
+        params = [self.match_param(tokens)]
+        after = ''
+        if position is not None:
+            after = ' AND (%(rank)s %(rank_op)s %%s OR (%(rank)s = %%s AND %(key)s %(key_op)s %%s))' % {
+                'rank': self.rank_column, 'rank_op': '>' if ascending else '<', 'key': self.key_column,
+                'key_op': '<' if reverse else '>'}
+            params += [position[0], position[0], position[1]]
+        order = '%s %s, %s %s' % (self.rank_column, 'ASC' if ascending else 'DESC', self.key_column,
+                                  'DESC' if reverse else 'ASC')
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.search_statement.format(after=after, order=order), params + [limit])
+            return [split_document_id(key) + (text, [rank, key]) for key, text, rank in cursor.fetchall()]
+
+
+class FTS5SearchBackend(IndexedSearchBackend):
+    """
+    SQLite FTS5 table ranked by bm25, which is lower for better matches.
+    """
+    key_column = 'rowid'
+    rank_column = 'rank'
+    rank_ascending = True
+    create_statements = (
+        "CREATE VIRTUAL TABLE %s USING fts5(text, tokenize='unicode61 remove_diacritics 1')" % INDEX_TABLE,
+    )
+    insert_statement = 'INSERT INTO %s (rowid, text) VALUES (%%s, %%s)' % INDEX_TABLE
+    search_statement = 'SELECT rowid, text, rank FROM %s WHERE %s MATCH %%s{after} ORDER BY {order} LIMIT %%s' % (
+        INDEX_TABLE, INDEX_TABLE)
+
+    def match_param(self, tokens):
+        return ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+
+
+class PostgreSQLSearchBackend(IndexedSearchBackend):
+    """
+    PostgreSQL table with a GIN-indexed `tsvector`, ranked by `ts_rank`.
+    """
+    key_column = 'id'
+    rank_column = 'ts_rank(document, query)'
+    rank_ascending = False
+    create_statements = (
+        'CREATE TABLE %s (id bigint PRIMARY KEY, text text NOT NULL, document tsvector NOT NULL)' % INDEX_TABLE,
+        'CREATE INDEX %s_document ON %s USING gin (document)' % (INDEX_TABLE, INDEX_TABLE),
+    )
+    insert_statement = "INSERT INTO %s (id, text, document) VALUES (%%s, %%s, to_tsvector('simple', %%s))" % (
+        INDEX_TABLE)
+    search_statement = (
+        "SELECT id, text, ts_rank(document, query) FROM %s, to_tsquery('simple', %%s) query "
+        "WHERE document @@ query{after} ORDER BY {order} LIMIT %%s" % INDEX_TABLE
+    )
+
+    def insert_params(self, key, text):
+        return key, text, text
+
+    def match_param(self, tokens):
+        return ' & '.join('%s:*' % token for token in tokens)
+
+
+class ScanSearchBackend(object):
+    """
+    Fallback without an index, matching the model tables with LIKE and
+    ordering by kind and text.
+    """
+
+    def __init__(self, using):
+        self.using = using
+
+    def installed(self):
+        return True
+
+    def install(self):
+        return False
+
+    def count(self):
+        return None
+
+    def clear(self):
+        pass
+
+    def remove(self, keys):
+        pass
+
+    def index(self, documents):
+        pass
+
+    def valid_position(self, position):
+        if not position or not isinstance(position[0], int) or not 0 <= position[0] < len(KINDS):
+            return False
+        model, fields = DOCUMENTS[KINDS[position[0]]]
+        return len(position) == len(fields) + 2 and all(isinstance(value, str) for value in position[1:-1]) \
+            and isinstance(position[-1], int)
+
+    def search(self, tokens, limit, position=None, reverse=False):
+        """
+        As `IndexedSearchBackend.search`, positions being `[kind index,
+        *document fields, pk]`. Each kind is read up to the rows still
+        missing from the page.
+        """
+        documents = []
+        kinds = list(enumerate(DOCUMENTS.items()))
+        for index, (kind, (model, fields)) in reversed(kinds) if reverse else kinds:
+            if position is not None and (index > position[0] if reverse else index < position[0]):
+                continue
+            condition = reduce(and_, [reduce(or_, [Q(**{'%s__icontains' % name: token}) for name in fields])
+                                      for token in tokens])
+            ordering = fields + ('pk',)
+            queryset = model.objects.using(self.using).filter(condition) \
+                .order_by(*[('-' if reverse else '') + name for name in ordering])
+            if position is not None and index == position[0]:
+                queryset = queryset.filter(position_filter(ordering, position[1:], reverse))
+            for instance in queryset[:limit - len(documents)]:
+                documents.append((kind, instance.pk, document_text(instance),
+                                  [index] + [getattr(instance, name) for name in fields] + [instance.pk]))
+            if len(documents) >= limit:
+                break
+        return documents
+
+
+def position_filter(ordering, position, reverse=False):
+    """
+    Return the condition of the rows after `position` in `ordering`, or
+    before it with `reverse`.
+    """
+    lookup = 'lt' if reverse else 'gt'
+    conditions = []
+    for index, name in enumerate(ordering):
+        condition = Q(**{'%s__%s' % (name, lookup): position[index]})
+        for previous, value in zip(ordering[:index], position[:index]):
+            condition &= Q(**{previous: value})
+        conditions.append(condition)
+    return reduce(or_, conditions)
+
+
+_backends = {}
+
+
+def get_search_backend(using='default'):
+    """
+    Return the search backend of the database `using`: FTS5 on SQLite
+    builds that have it, `tsvector` on PostgreSQL, and table scans
+    elsewhere.
+    """
+    if using not in _backends:
+        connection = connections[using]
+        backend = ScanSearchBackend
+        if connection.vendor == 'postgresql':
+            backend = PostgreSQLSearchBackend
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+                if cursor.fetchone()[0]:
+                    backend = FTS5SearchBackend
+        _backends[using] = backend(using)
+    return _backends[using]
+
+
+def rebuild_search_index(using='default', chunk_size=500):
+    """
+    Index every document again. Return the number of documents.
+    """
+    backend = get_search_backend(using)
+    count = 0
+    with transaction.atomic(using=using):
+        backend.clear()
+        for kind, (model, fields) in DOCUMENTS.items():
+            queryset = model.objects.using(using).order_by('pk').values_list('pk', *fields)
+            last = None
+            while True:
+                rows = list((queryset if last is None else queryset.filter(pk__gt=last))[:chunk_size])
+                if not rows:
+                    break
+                backend.index((kind, row[0], ' '.join(row[1:])) for row in rows)
+                count, last = count + len(rows), rows[-1][0]
+    return count
+
+
+@receiver(post_migrate, dispatch_uid='search_index')
+def install_search_index(sender, using='default', **kwargs):
+    """
+    Create the index after `migrate`, and rebuild it when it does not hold
+    one document per row, e.g. after `flush`.
+    """
+    if sender.name != 'movie_database':
+        return
+    backend = get_search_backend(using)
+    created = backend.install()
+    expected = sum(model.objects.using(using).count() for model, fields in DOCUMENTS.values())
+    if created or backend.count() not in (None, expected):
+        rebuild_search_index(using)
+
+
+def index_instance(sender, instance, using='default', **kwargs):
+    get_search_backend(using).index([(KIND_OF_MODEL[sender], instance.pk, document_text(instance))])
+
+
+def remove_instance(sender, instance, using='default', **kwargs):
+    get_search_backend(using).remove([document_id(KIND_OF_MODEL[sender], instance.pk)])
+
+
+for model in KIND_OF_MODEL:
+    post_save.connect(index_instance, sender=model, dispatch_uid='search_index')
+    post_delete.connect(remove_instance, sender=model, dispatch_uid='search_index')
+
+
+@receiver(movies_bulk_created, dispatch_uid='search_index')
+def index_bulk_created_movies(sender, movies, **kwargs):
+    if movies:
+        get_search_backend(movies[0]._state.db or 'default').index(
+            ('movie', movie.pk, document_text(movie)) for movie in movies)
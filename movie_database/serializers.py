@@ -1,10 +1,47 @@
-from rest_framework import serializers
+from django.db import connections, transaction
+from rest_framework import permissions, serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 
+from movie_database.fields import TemplatedHyperlinkedRelatedField, BatchPrimaryKeyRelatedField, resolve_pks
+from movie_database.metrics import record_serialization
 from movie_database.models import Genre, OscarAward, Actor, Director, Movie
+from movie_database.signals import movies_bulk_created
 
 
-class GenreSerializer(serializers.HyperlinkedModelSerializer):
-    movie_genre = serializers.HyperlinkedRelatedField(
+class DynamicFieldsMixin(object):
+    """
+    Keeps only the fields listed in the `fields` query parameter of a read
+    request, e.g. `?fields=id,title`. Unknown names are ignored, and so is
+    the parameter when the context sets `sparse_fields` to `False`.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse_fields = False
+        request = self.context.get('request')
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return
+        if not self.context.get('sparse_fields', True):
+            return
+        requested = request.query_params.get(self.fields_query_param)
+        if not requested:
+            return
+        requested = set(name.strip() for name in requested.split(','))
+        if requested & set(self.fields):
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+            self.sparse_fields = True
+
+    @record_serialization
+    def to_representation(self, instance):
+        # timed here, since every model serializer has the mixin
+        return super().to_representation(instance)
+
+
+class GenreSerializer(DynamicFieldsMixin, serializers.HyperlinkedModelSerializer):
+    movie_genre = TemplatedHyperlinkedRelatedField(
         many=True,
         read_only=True,
         view_name='movie-detail'
@@ -15,14 +52,14 @@ class GenreSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('url', 'id', 'name', 'movie_genre')
 
 
-class OscarAwardSerializer(serializers.HyperlinkedModelSerializer):
+class OscarAwardSerializer(DynamicFieldsMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = OscarAward
         fields = ('url', 'id', 'category', 'year')
 
 
-class ActorSerializer(serializers.HyperlinkedModelSerializer):
-    plays = serializers.HyperlinkedRelatedField(
+class ActorSerializer(DynamicFieldsMixin, serializers.HyperlinkedModelSerializer):
+    plays = TemplatedHyperlinkedRelatedField(
         many=True,
         read_only=True,
         view_name='movie-detail'
@@ -33,8 +70,8 @@ class ActorSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('url', 'id', 'name', 'surname', 'created', 'plays')
 
 
-class DirectorSerializer(serializers.HyperlinkedModelSerializer):
-    directs = serializers.HyperlinkedRelatedField(
+class DirectorSerializer(DynamicFieldsMixin, serializers.HyperlinkedModelSerializer):
+    directs = TemplatedHyperlinkedRelatedField(
         many=True,
         read_only=True,
         view_name='movie-detail'
@@ -45,13 +82,135 @@ class DirectorSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('url', 'id', 'name', 'surname', 'created', 'directs')
 
 
-class MovieSerializer(serializers.HyperlinkedModelSerializer):
-    director = serializers.PrimaryKeyRelatedField(queryset=Director.objects.all(), many=False, read_only=False)
-    actor = serializers.PrimaryKeyRelatedField(default=[], queryset=Actor.objects.all(), many=True, read_only=False,
-                                               allow_empty=True)
-    genre = serializers.PrimaryKeyRelatedField(default=[], queryset=Genre.objects.all(), many=True, read_only=False,
-                                               allow_empty=True)
+class MovieListSerializer(serializers.ListSerializer):
+    """
+    Validates a list of movies resolving the referenced directors, actors
+    and genres with one query per model, and creates them in bulk.
+    """
+    unique_together_message = 'The fields title, director must make a unique set.'
+    unique_message = 'This field must be unique.'
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.context['related_instances'] = self.resolve_related(data)
+        validated_data = super().to_internal_value(data)
+        errors = [{} for attrs in validated_data]
+        self.validate_unique_together(validated_data, errors)
+        self.validate_unique_oscar_award(validated_data, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated_data
+
+    def resolve_related(self, data):
+        pks = {}
+        for name, field in self.child.fields.items():
+            relation = getattr(field, 'child_relation', field)
+            if field.read_only or not isinstance(relation, BatchPrimaryKeyRelatedField):
+                continue
+            queryset = relation.get_queryset()
+            wanted = pks.setdefault(queryset.model, (queryset, set()))[1]
+            for item in data:
+                if not isinstance(item, dict) or item.get(name) is None:
+                    continue
+                for value in (item[name] if isinstance(item[name], list) else [item[name]]):
+                    try:
+                        wanted.add(relation.to_pk(value))
+                    except serializers.ValidationError:
+                        pass
+        return {model: resolve_pks(queryset, wanted) for model, (queryset, wanted) in pks.items()}
+
+    def validate_unique_together(self, validated_data, errors):
+        """
+        Check `('title', 'director')` across the batch and against the table
+        in one pass instead of one query per movie.
+        """
+        keys = [(attrs['title'], attrs['director'].pk) for attrs in validated_data]
+        existing = self.existing_keys(set(title for title, director in keys))
+        seen = set()
+        for key, item_errors in zip(keys, errors):
+            if key in existing or key in seen:
+                item_errors[api_settings.NON_FIELD_ERRORS_KEY] = [self.unique_together_message]
+            seen.add(key)
+
+    def validate_unique_oscar_award(self, validated_data, errors):
+        """
+        Check that no two movies get the same award, within the batch and
+        against the table, with one `__in` query instead of one per movie.
+        """
+        pks = [attrs['oscar_award'].pk if attrs.get('oscar_award') is not None else None for attrs in validated_data]
+        wanted = list(set(pk for pk in pks if pk is not None))
+        queryset = Movie.objects.order_by()
+        batch_size = max(connections[queryset.db].ops.bulk_batch_size(['oscar_award'], wanted), 1)
+        taken = set()
+        for start in range(0, len(wanted), batch_size):
+            taken.update(queryset.filter(oscar_award__in=wanted[start:start + batch_size])
+                         .values_list('oscar_award', flat=True))
+        for pk, item_errors in zip(pks, errors):
+            if pk is None:
+                continue
+            if pk in taken:
+                item_errors['oscar_award'] = [self.unique_message]
+            taken.add(pk)
+
+    def existing_keys(self, titles):
+        titles = list(titles)
+        queryset = Movie.objects.order_by()
+        batch_size = max(connections[queryset.db].ops.bulk_batch_size(['title'], titles), 1)
+        keys = {}
+        for start in range(0, len(titles), batch_size):
+            rows = queryset.filter(title__in=titles[start:start + batch_size]).values_list('title', 'director', 'pk')
+            keys.update(((title, director), pk) for title, director, pk in rows)
+        return keys
+
+    def create(self, validated_data):
+        m2m_fields = [field for field in Movie._meta.many_to_many if field.name in self.child.fields]
+        m2m_names = set(field.name for field in m2m_fields)
+        with transaction.atomic():
+            movies = Movie.objects.bulk_create([
+                Movie(**{name: value for name, value in attrs.items() if name not in m2m_names})
+                for attrs in validated_data
+            ])
+            if any(movie.pk is None for movie in movies):
+                # Only some backends return primary keys from bulk inserts.
+                pks = self.existing_keys(set(movie.title for movie in movies))
+                for movie in movies:
+                    movie.pk = pks[(movie.title, movie.director_id)]
+            for field in m2m_fields:
+                through = field.rel.through
+                source, target = field.m2m_field_name() + '_id', field.m2m_reverse_field_name() + '_id'
+                through.objects.bulk_create([
+                    through(**{source: movie.pk, target: related.pk})
+                    for movie, attrs in zip(movies, validated_data)
+                    for related in attrs.get(field.name, [])
+                ])
+        movies_bulk_created.send(sender=Movie, movies=movies)
+        return movies
+
+
+class MovieSerializer(DynamicFieldsMixin, serializers.HyperlinkedModelSerializer):
+    director = BatchPrimaryKeyRelatedField(queryset=Director.objects.all(), many=False, read_only=False)
+    actor = BatchPrimaryKeyRelatedField(default=[], queryset=Actor.objects.all(), many=True, read_only=False,
+                                        allow_empty=True)
+    genre = BatchPrimaryKeyRelatedField(default=[], queryset=Genre.objects.all(), many=True, read_only=False,
+                                        allow_empty=True)
 
     class Meta:
         model = Movie
         fields = ('url', 'id', 'title', 'genre', 'director', 'actor', 'oscar_award', 'animated')
+        list_serializer_class = MovieListSerializer
+
+    def get_validators(self):
+        validators = super().get_validators()
+        if isinstance(self.parent, MovieListSerializer):
+            # the list serializer checks the whole batch at once
+            validators = [validator for validator in validators if not isinstance(validator, UniqueTogetherValidator)]
+        return validators
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if isinstance(self.parent, MovieListSerializer) and 'oscar_award' in fields:
+            # the list serializer checks the awards of the whole batch at once
+            field = fields['oscar_award']
+            field.validators = [validator for validator in field.validators
+                                if not isinstance(validator, UniqueValidator)]
+        return fields
@@ -0,0 +1,90 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from movie_database.cache import invalidate_response_cache
+from movie_database.models import Genre, OscarAward, Actor, Director, Movie
+
+# Sent after `MovieListSerializer` bulk inserts movies, which bypasses
+# `post_save` and `m2m_changed`.
+movies_bulk_created = Signal(providing_args=['movies'])
+
+
+def invalidate_responses(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_response_cache(kwargs.get('using'))
+
+
+for model in (Genre, OscarAward, Actor, Director, Movie):
+    post_save.connect(invalidate_responses, sender=model, dispatch_uid='invalidate_responses')
+    post_delete.connect(invalidate_responses, sender=model, dispatch_uid='invalidate_responses')
+
+for through in (Movie.actor.through, Movie.genre.through):
+    m2m_changed.connect(invalidate_responses, sender=through, dispatch_uid='invalidate_responses')
+
+
+@receiver(movies_bulk_created, dispatch_uid='invalidate_responses')
+def invalidate_bulk_responses(sender, **kwargs):
+    invalidate_response_cache()
+
+
+def touch(queryset):
+    """
+    Bump `updated` on rows whose representation changed through a relation,
+    so their ETag and Last-Modified change too.
+    """
+    queryset.update(updated=timezone.now())
+
+
+@receiver(pre_save, sender=Movie, dispatch_uid='touch_related')
+def remember_director(sender, instance, raw=False, **kwargs):
+    if instance.pk is not None and not raw:
+        instance._previous_director_id = Movie.objects.filter(pk=instance.pk) \
+            .values_list('director', flat=True).first()
+
+
+@receiver(post_save, sender=Movie, dispatch_uid='touch_related')
+def touch_movie_relations(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # `directs` and `plays` are ordered by title
+    touch(Director.objects.filter(pk__in=[instance.director_id, getattr(instance, '_previous_director_id', None)]))
+    touch(Actor.objects.filter(plays=instance))
+
+
+@receiver(pre_delete, sender=Movie, dispatch_uid='touch_related')
+def touch_deleted_movie_relations(sender, instance, **kwargs):
+    touch(Director.objects.filter(pk=instance.director_id))
+    touch(Actor.objects.filter(plays=instance))
+
+
+@receiver(pre_delete, sender=Actor, dispatch_uid='touch_related')
+@receiver(pre_delete, sender=Genre, dispatch_uid='touch_related')
+@receiver(pre_delete, sender=OscarAward, dispatch_uid='touch_related')
+def touch_movies_of_deleted_relation(sender, instance, **kwargs):
+    lookup = {Actor: 'actor', Genre: 'genre', OscarAward: 'oscar_award'}[sender]
+    touch(Movie.objects.filter(**{lookup: instance}))
+
+
+@receiver(m2m_changed, sender=Movie.actor.through, dispatch_uid='touch_related')
+@receiver(m2m_changed, sender=Movie.genre.through, dispatch_uid='touch_related')
+def touch_m2m_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+    name = 'actor' if sender is Movie.actor.through else 'genre'
+    if reverse:
+        movies = Movie.objects.filter(**({name: instance} if action == 'pre_clear' else {'pk__in': pk_set}))
+        related = [instance.pk]
+    else:
+        movies = Movie.objects.filter(pk=instance.pk)
+        related = getattr(instance, name).values_list('pk', flat=True) if action == 'pre_clear' else pk_set
+    touch(movies)
+    if name == 'actor':
+        touch(Actor.objects.filter(pk__in=related))
+
+
+@receiver(movies_bulk_created, dispatch_uid='touch_related')
+def touch_bulk_relations(sender, movies, **kwargs):
+    pks = [movie.pk for movie in movies]
+    touch(Director.objects.filter(directs__in=pks))
+    touch(Actor.objects.filter(plays__in=pks))
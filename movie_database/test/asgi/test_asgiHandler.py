@@ -0,0 +1,154 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from movie_database.asgi import ASGIHandler
+from movie_database.async_views import ThreadRunner
+from movie_database.cache import get_response_cache
+from movie_database.metrics import get_request_metrics
+from movie_database.models import Actor, Director, Genre, Movie, OscarAward
+
+
+class TestASGIHandler(APITransactionTestCase):
+    """
+    The executor threads of the async views read through connections of
+    their own, so the rows of a test have to be committed.
+    """
+
+    def setUp(self):
+        self.application = ASGIHandler(WSGIHandler())
+        self.director = Director.objects.create(name='steven', surname='spielberg')
+        self.actor = Actor.objects.create(name='Roy', surname='Scheider')
+        self.genre = Genre.objects.create(name='Thriller')
+        self.award = OscarAward.objects.create(year=1976, category='Best_Film')
+        self.movie = Movie.objects.create(title='Jaws', director=self.director, oscar_award=self.award)
+        self.movie.actor.add(self.actor)
+        self.movie.genre.add(self.genre)
+        # the end of the request that would have written them
+        request_finished.send(sender=self.__class__)
+        get_response_cache().invalidate()
+
+    def request(self, path, query='', method='GET', headers=(), body=b''):
+        scope = {
+            'type': 'http',
+            'http_version': '1.1',
+            'method': method,
+            'path': path,
+            'root_path': '',
+            'query_string': query.encode('latin-1'),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            'server': ('testserver', 80),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.get_event_loop().run_until_complete(self.application(scope, receive, send))
+        start = messages[0]
+        self.assertEqual(start['type'], 'http.response.start')
+        response_headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in start['headers']}
+        content = b''.join(message.get('body', b'') for message in messages[1:])
+        return start['status'], response_headers, content
+
+    def assertSameAsWSGI(self, url):
+        status_code, headers, content = self.request(url)
+        response = self.client.get(url)
+        self.assertEqual(status_code, response.status_code)
+        self.assertEqual(json.loads(content.decode('utf-8')), json.loads(response.content.decode('utf-8')))
+        return headers
+
+    def test_list_and_detail_match_wsgi(self):
+        for basename, pk in (('genre', self.genre.pk), ('oscaraward', self.award.pk), ('actor', self.actor.pk),
+                             ('director', self.director.pk), ('movie', self.movie.pk)):
+            with self.subTest(basename=basename):
+                self.assertSameAsWSGI(reverse(basename + '-list'))
+                self.assertSameAsWSGI(reverse(basename + '-detail', kwargs={'pk': pk}))
+
+    @override_settings(API_METRICS={}, API_RESPONSE_CACHE=None)
+    def test_metrics_count_the_queries_of_executor_threads(self):
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        status_code, headers, content = self.request(url)
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        queries = int(headers['server-timing'].split('"')[1].split()[0])
+        self.assertGreater(queries, 0)
+        buckets, counts, total = get_request_metrics().snapshot()[
+            'api_db_queries', (('route', 'movie-detail'), ('action', 'retrieve'))]
+        self.assertEqual(total, queries)
+
+    def test_missing_detail(self):
+        status_code, headers, content = self.request(reverse('movie-detail', kwargs={'pk': 0}))
+        self.assertEqual(status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(json.loads(content.decode('utf-8')), {'detail': 'Not found.'})
+
+    def test_not_modified(self):
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        status_code, headers, content = self.request(url)
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(headers['etag'], self.client.get(url)['ETag'])
+
+        status_code, cached, content = self.request(url, headers=[('If-None-Match', headers['etag'])])
+        self.assertEqual(status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached['etag'], headers['etag'])
+        self.assertEqual(content, b'')
+
+    def test_response_cache(self):
+        url = reverse('genre-list')
+        self.assertEqual(self.request(url)[1]['x-cache'], 'MISS')
+        status_code, headers, content = self.request(url)
+        self.assertEqual(headers['x-cache'], 'HIT')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    @override_settings(API_RESPONSE_CACHE=None)
+    def test_included_relations_use_the_regular_action(self):
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        status_code, headers, content = self.request(url, query='include=director')
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        response = self.client.get(url, {'include': 'director'})
+        self.assertEqual(json.loads(content.decode('utf-8')), json.loads(response.content.decode('utf-8')))
+
+    def test_writes_go_through_wsgi(self):
+        body = json.dumps({'name': 'Horror'}).encode('utf-8')
+        status_code, headers, content = self.request(
+            reverse('genre-list'), method='POST', body=body,
+            headers=[('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+        self.assertEqual(status_code, status.HTTP_201_CREATED, content)
+        self.assertTrue(Genre.objects.filter(name='Horror').exists())
+
+    def test_executor_calls_close_obsolete_connections(self):
+        # closing the in-memory test database is a no-op, so the calls are
+        # recorded instead of checking the connection
+        calls = []
+
+        def count_movies():
+            calls.append('query')
+            return Movie.objects.count()
+
+        run = ThreadRunner()
+        loop = asyncio.get_event_loop()
+        with mock.patch('movie_database.async_views.close_old_connections', lambda: calls.append('close')):
+            self.assertEqual(loop.run_until_complete(run(count_movies)), 1)
+        self.assertEqual(calls, ['close', 'query', 'close'])
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.get_event_loop().run_until_complete(self.application({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
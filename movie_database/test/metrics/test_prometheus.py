@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from movie_database.cache import get_response_cache
+from movie_database.metrics import reset_request_metrics
+from movie_database.models import Genre
+from movie_database.pool import _pools, get_pool
+from movie_database.prometheus import format_labels, merge_snapshots, render_metrics
+from movie_database.test.pool.test_connectionPool import FakeConnection
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def worker_snapshot(pid, hits, connections):
+    return {
+        'pid': pid,
+        'histograms': [['api_db_queries', [['route', 'genre-list'], ['action', 'list']], [1, 5], [1, 2, 0], 7]],
+        'counters': [['api_response_cache_hits_total', [], hits], ['api_response_cache_misses_total', [], 1]],
+        'gauges': [['api_db_pool_connections', [['database', 'default'], ['state', 'idle']], connections]],
+    }
+
+
+class TestExposition(SimpleTestCase):
+    def test_merge_workers(self):
+        snapshots = [worker_snapshot(os.getpid(), 3, 2), worker_snapshot(exited_pid(), 5, 4)]
+        text = render_metrics(merge_snapshots(snapshots))
+        lines = text.splitlines()
+
+        self.assertIn('# TYPE api_db_queries histogram', lines)
+        labels = 'route="genre-list",action="list"'
+        self.assertIn('api_db_queries_bucket{%s,le="1"} 2' % labels, lines)
+        self.assertIn('api_db_queries_bucket{%s,le="5"} 6' % labels, lines)
+        self.assertIn('api_db_queries_bucket{%s,le="+Inf"} 6' % labels, lines)
+        self.assertIn('api_db_queries_sum{%s} 14.0' % labels, lines)
+        self.assertIn('api_db_queries_count{%s} 6' % labels, lines)
+        # counters of exited workers are kept, their gauges are not
+        self.assertIn('api_response_cache_hits_total 8', lines)
+        self.assertIn('api_response_cache_hit_ratio 0.8', lines)
+        self.assertIn('api_db_pool_connections{database="default",state="idle"} 2', lines)
+        self.assertIn('api_metrics_workers 1', lines)
+
+    def test_escape_labels(self):
+        self.assertEqual(format_labels([('route', 'a"b\\c\nd')]), r'{route="a\"b\\c\nd"}')
+        self.assertEqual(format_labels([]), '')
+
+
+@override_settings(API_METRICS={}, DEBUG=True)
+class TestMetricsEndpoint(APITestCase):
+    def setUp(self):
+        reset_request_metrics('API_METRICS')
+        get_response_cache().invalidate()
+
+    def test_request_and_cache_metrics(self):
+        Genre.objects.create(name='Horror')
+        self.client.get(reverse('genre-list'))
+        self.client.get(reverse('genre-list'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        lines = response.content.decode('utf-8').splitlines()
+        self.assertIn('api_request_duration_seconds_count{route="genre-list",action="list"} 2', lines)
+        self.assertIn('api_response_size_bytes_count{route="genre-list",action="list"} 2', lines)
+        self.assertIn('api_model_serialize_seconds_count{model="Genre"} 2', lines)
+        self.assertIn('# TYPE api_response_cache_hits_total counter', lines)
+        self.assertTrue(any(line.startswith('api_response_cache_hit_ratio ') for line in lines))
+
+    def test_pool_metrics(self):
+        get_pool('metrics_test', FakeConnection, {'MIN_SIZE': 2, 'MAX_SIZE': 3})
+        self.addCleanup(_pools.pop, ('metrics_test', os.getpid()))
+        lines = self.client.get(reverse('metrics')).content.decode('utf-8').splitlines()
+        self.assertIn('api_db_pool_connections{database="metrics_test",state="idle"} 2', lines)
+        self.assertIn('api_db_pool_max_size{database="metrics_test"} 3', lines)
+        self.assertIn('api_db_pool_events_total{database="metrics_test",event="opened"} 2', lines)
+
+    def test_workers_write_their_snapshots(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        pid = exited_pid()
+        with open(os.path.join(directory, '%d.json' % pid), 'w') as snapshot_file:
+            json.dump(worker_snapshot(pid, 5, 4), snapshot_file)
+
+        with self.settings(API_METRICS={'DIRECTORY': directory}):
+            lines = self.client.get(reverse('metrics')).content.decode('utf-8').splitlines()
+        self.assertIn('%d.json' % os.getpid(), os.listdir(directory))
+        self.assertIn('api_db_queries_count{route="genre-list",action="list"} 3', lines)
+        self.assertIn('api_metrics_workers 1', lines)
+
+    @override_settings(API_METRICS={'TOKEN': 'secret'}, DEBUG=False)
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEBUG=False)
+    def test_no_token_without_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+    def test_expired_snapshots_are_removed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for pid, age in ((exited_pid(), 7200), (exited_pid(), 60)):
+            path = os.path.join(directory, '%d.json' % pid)
+            with open(path, 'w') as snapshot_file:
+                json.dump(worker_snapshot(pid, 5, 4), snapshot_file)
+            os.utime(path, (time.time() - age, time.time() - age))
+
+        with self.settings(API_METRICS={'DIRECTORY': directory, 'SNAPSHOT_EXPIRY': 3600}):
+            lines = self.client.get(reverse('metrics')).content.decode('utf-8').splitlines()
+        self.assertEqual(len(os.listdir(directory)), 2)
+        self.assertIn('%d.json' % os.getpid(), os.listdir(directory))
+        self.assertIn('api_db_queries_count{route="genre-list",action="list"} 3', lines)
+
+    @override_settings(API_METRICS=None)
+    def test_disabled(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
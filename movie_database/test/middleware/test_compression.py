@@ -0,0 +1,91 @@
+import gzip
+
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from movie_database.compression import COMPRESSORS, choose_encoding, compress, compress_sequence, \
+    parse_accept_encoding
+from movie_database.models import Actor, Director, Movie
+
+
+def decompress(encoding, data):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        import brotli
+        return brotli.decompress(data)
+    import zstandard
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class TestAcceptEncoding(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(parse_accept_encoding('gzip, br;q=0.5 ,zstd;q=0,*;q=0.1, x;q=bad'),
+                         {'gzip': 1.0, 'br': 0.5, 'zstd': 0.0, '*': 0.1, 'x': 0.0})
+
+    def test_choose(self):
+        encodings = ['br', 'zstd', 'gzip']
+        self.assertEqual(choose_encoding('gzip, br', encodings), 'br')
+        self.assertEqual(choose_encoding('gzip, br;q=0.5', encodings), 'gzip')
+        self.assertEqual(choose_encoding('*', encodings), 'br')
+        self.assertEqual(choose_encoding('*, br;q=0', encodings), 'zstd')
+        self.assertIsNone(choose_encoding('identity', encodings))
+        self.assertIsNone(choose_encoding('gzip;q=0', encodings))
+        self.assertIsNone(choose_encoding('', encodings))
+
+    def test_round_trip(self):
+        data = b'{"title":"Jaws"}' * 1000
+        for encoding in COMPRESSORS:
+            with self.subTest(encoding=encoding):
+                self.assertEqual(decompress(encoding, compress(encoding, 5, data)), data)
+                stream = b''.join(compress_sequence(encoding, 5, [data[:5000], b'', data[5000:]]))
+                self.assertEqual(decompress(encoding, stream), data)
+
+
+@override_settings(API_COMPRESSION={'MIN_SIZE': 1024})
+class TestCompressionMiddleware(APITestCase):
+    def setUp(self):
+        director = Director.objects.create(name='Steven', surname='Spielberg')
+        for i in range(50):
+            Movie.objects.create(title='Movie %d' % i, director=director)
+
+    def test_large_responses_are_compressed(self):
+        plain = self.client.get(reverse('movie-list'))
+        for encoding in COMPRESSORS:
+            with self.subTest(encoding=encoding):
+                response = self.client.get(reverse('movie-list'), HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertEqual(int(response['Content-Length']), len(response.content))
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(decompress(encoding, response.content), plain.content)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(reverse('movie-detail', args=[1]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_no_accept_encoding(self):
+        response = self.client.get(reverse('movie-list'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @override_settings(API_COMPRESSION={'MIN_SIZE': 1024, 'ENCODINGS': ('gzip',)})
+    def test_only_configured_encodings_are_used(self):
+        response = self.client.get(reverse('movie-list'), HTTP_ACCEPT_ENCODING='br, zstd, gzip;q=0.1')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_streaming_responses_are_compressed(self):
+        plain = b''.join(self.client.get(reverse('movie-export')).streaming_content)
+        response = self.client.get(reverse('movie-export'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    def test_etag_is_weakened_and_still_matches(self):
+        Actor.objects.bulk_create([Actor(name='actor', surname='%d' % i) for i in range(50)])
+        response = self.client.get(reverse('actor-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(reverse('actor-list'), HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,116 @@
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from movie_database.metrics import Histogram, get_request_metrics, reset_request_metrics
+from movie_database.models import Actor, Director, Movie
+
+
+def routes_of(snapshot):
+    return set(dict(labels)['route'] for name, labels in snapshot if name == 'api_request_duration_seconds')
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(','):
+        name, *params = [part.strip() for part in metric.split(';')]
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class TestHistogram(SimpleTestCase):
+    def test_buckets_hold_values_at_most_their_bound(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 2, 5, 6, 100):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 2, 2])
+        self.assertEqual(histogram.count, 6)
+        self.assertEqual(histogram.sum, 114)
+
+
+@override_settings(API_METRICS={}, API_RESPONSE_CACHE=None)
+class TestRequestMetrics(APITestCase):
+    def setUp(self):
+        reset_request_metrics('API_METRICS')
+        director = Director.objects.create(name='steven', surname='spielberg')
+        actor = Actor.objects.create(name='Roy', surname='Scheider')
+        self.movie = Movie.objects.create(title='Jaws', director=director)
+        self.movie.actor.add(actor)
+
+    def test_server_timing_counts_the_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('movie-list'))
+        timing = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(list(timing), ['db', 'serialize', 'render', 'app'])
+        self.assertEqual(timing['db']['desc'], '"%d queries"' % len(context.captured_queries))
+        for metric in timing.values():
+            self.assertGreaterEqual(float(metric['dur']), 0)
+
+    def test_histograms_per_route(self):
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        # read before the next request resets the query log
+        queries = len(context.captured_queries)
+        self.client.get(url)
+        self.client.get(reverse('actor-list'))
+
+        snapshot = get_request_metrics().snapshot()
+        self.assertEqual(routes_of(snapshot), {'movie-detail', 'actor-list'})
+        labels = (('route', 'movie-detail'), ('action', 'retrieve'))
+        buckets, counts, total = snapshot['api_db_queries', labels]
+        self.assertEqual(sum(counts), 2)
+        self.assertEqual(total, 2 * queries)
+        for name in ('api_request_duration_seconds', 'api_response_size_bytes', 'api_serialize_seconds',
+                     'api_render_seconds'):
+            buckets, counts, total = snapshot[name, labels]
+            self.assertGreater(total, 0, name)
+        buckets, counts, total = snapshot['api_model_serialize_seconds', (('model', 'Movie'),)]
+        self.assertEqual(sum(counts), 2)
+
+    def test_actions(self):
+        self.client.get(reverse('movie-list'))
+        self.client.post(reverse('movie-list'), {})
+        snapshot = get_request_metrics().snapshot()
+        actions = set(dict(labels)['action'] for name, labels in snapshot if name == 'api_db_queries')
+        self.assertEqual(actions, {'list', 'create'})
+
+    def test_serialization_excludes_queries(self):
+        response = self.client.get(reverse('movie-list'))
+        timing = parse_server_timing(response['Server-Timing'])
+        self.assertGreater(float(timing['serialize']['dur']), 0)
+        self.assertLess(float(timing['serialize']['dur']) + float(timing['db']['dur']),
+                        float(timing['app']['dur']))
+
+    def test_unmatched_requests(self):
+        self.client.get('/no-such-page/')
+        self.assertEqual(routes_of(get_request_metrics().snapshot()), {'unmatched'})
+
+    @override_settings(API_METRICS={'SERVER_TIMING': False})
+    def test_server_timing_can_be_turned_off(self):
+        response = self.client.get(reverse('movie-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(routes_of(get_request_metrics().snapshot()), {'movie-list'})
+
+    @override_settings(API_METRICS={'SERVER_TIMING': 'staff'})
+    def test_server_timing_can_be_limited_to_staff(self):
+        response = self.client.get(reverse('movie-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        user = User.objects.create_user('editor', password='secret')
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('movie-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        user.is_staff = True
+        user.save()
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('movie-list'))
+        self.assertIn('db', parse_server_timing(response['Server-Timing']))
+
+    @override_settings(API_METRICS=None)
+    def test_disabled(self):
+        response = self.client.get(reverse('movie-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(get_request_metrics().snapshot(), {})
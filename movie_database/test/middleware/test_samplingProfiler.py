@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from movie_database.models import Director, Movie
+from movie_database.profiling import Profile, RouteProfiles, StackSampler, get_profiler, set_profile
+
+
+def profiled_work(profile, started):
+    set_profile(profile)
+    started.set()
+    deadline = time.time() + 0.05
+    while time.time() < deadline:
+        time.sleep(0.001)
+    set_profile(None)
+
+
+class TestStackSampler(SimpleTestCase):
+    def test_samples_the_threads_of_the_profile(self):
+        profile, started = Profile(), threading.Event()
+        sampler = StackSampler(0.001)
+        sampler.start(profile)
+        worker = threading.Thread(target=profiled_work, args=(profile, started))
+        worker.start()
+        started.wait()
+        worker.join()
+        sampler.stop(profile)
+
+        self.assertTrue(profile.stacks)
+        for stack in profile.stacks:
+            self.assertTrue(stack[0].startswith('threading:_bootstrap:'), stack)
+            self.assertIn('movie_database.test.middleware.test_samplingProfiler:profiled_work:', stack[-1])
+        self.assertEqual(profile.threads, set())
+
+    def test_hottest_frames_of_the_focus_modules(self):
+        routes = RouteProfiles(tempfile.gettempdir(), ('app',), 2, 5)
+        stacks = Counter({
+            ('main:run:1', 'app.views:list:10', 'app.serializers:data:5'): 5,
+            ('main:run:1', 'app.views:list:10', 'json:dumps:3'): 3,
+            ('main:run:1', 'app.views:list:10'): 1,
+        })
+        self.assertEqual(routes.hottest_frames(stacks), [('app.serializers:data:5', 5, 5),
+                                                         ('app.views:list:10', 4, 9)])
+
+
+class TestSamplingProfilerMiddleware(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        director = Director.objects.create(name='steven', surname='spielberg')
+        Movie.objects.create(title='Jaws', director=director)
+
+    def profiler(self, **options):
+        return self.settings(API_PROFILER=dict({'TOKEN': 'secret', 'DIRECTORY': self.directory}, **options))
+
+    def test_profile_on_request(self):
+        with self.profiler():
+            response = self.client.get(reverse('movie-list'), HTTP_X_PROFILE='secret')
+            # the request leaves the writing to the flusher
+            self.assertEqual(os.listdir(self.directory), [])
+            get_profiler()[1].flush()
+        self.assertGreaterEqual(int(response['X-Profile-Samples']), 0)
+
+        name = 'movie-list.%d' % os.getpid()
+        self.assertEqual(sorted(os.listdir(self.directory)), [name + '.folded', name + '.txt'])
+        with open(os.path.join(self.directory, name + '.folded')) as folded:
+            samples = 0
+            for line in folded:
+                stack, count = line.rsplit(' ', 1)
+                self.assertNotIn(' ', stack)
+                samples += int(count)
+        self.assertEqual(samples, int(response['X-Profile-Samples']))
+        with open(os.path.join(self.directory, name + '.txt')) as summary:
+            self.assertEqual(summary.readline(), '# %d samples of 1 requests to movie-list\n' % samples)
+
+    def test_wrong_token(self):
+        with self.profiler():
+            response = self.client.get(reverse('movie-list'), HTTP_X_PROFILE='guess')
+            get_profiler()[1].flush()
+        self.assertFalse(response.has_header('X-Profile-Samples'))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_sample_rate(self):
+        with self.profiler(SAMPLE_RATE=1.0, TOKEN=None):
+            response = self.client.get(reverse('movie-list'))
+            self.client.get(reverse('movie-list'), HTTP_X_PROFILE='')
+            get_profiler()[1].flush()
+        self.assertFalse(response.has_header('X-Profile-Samples'))
+        with open(os.path.join(self.directory, 'movie-list.%d.txt' % os.getpid())) as summary:
+            self.assertIn(' of 2 requests ', summary.readline())
+
+    @override_settings(API_PROFILER=None)
+    def test_disabled(self):
+        response = self.client.get(reverse('movie-list'), HTTP_X_PROFILE='secret')
+        self.assertFalse(response.has_header('X-Profile-Samples'))
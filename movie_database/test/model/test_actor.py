@@ -144,3 +144,14 @@ class ActorTestCase(TestCase):
         actor.delete()
         self.assertEqual(0, Actor.objects.count())
         self.assertEqual(1, Movie.objects.count())
+
+    def test_updated_changes_on_save(self):
+        actor = Actor(name='jane', surname='doe')
+        actor.save()
+        updated = actor.updated
+
+        actor.name = 'john'
+        actor.save()
+        actor.refresh_from_db()
+        self.assertGreater(actor.updated, updated)
+        self.assertLessEqual(actor.created, updated)
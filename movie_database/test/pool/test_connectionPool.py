@@ -0,0 +1,116 @@
+import gc
+import threading
+
+from django.test import SimpleTestCase
+
+from movie_database.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection(object):
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(SimpleTestCase):
+    def pool(self, **kwargs):
+        return ConnectionPool(FakeConnection, **kwargs)
+
+    def test_reuses_released_connections(self):
+        pool = self.pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.stats()['opened'], 1)
+        self.assertEqual(pool.stats()['acquired'], 2)
+
+    def test_fill(self):
+        pool = self.pool(min_size=2)
+        pool.fill()
+        self.assertEqual(pool.stats()['idle'], 2)
+        pool.acquire()
+        self.assertEqual(pool.stats()['opened'], 2)
+
+    def test_waits_for_a_release(self):
+        pool = self.pool(max_size=1, timeout=5)
+        connection = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, [connection])
+        timer.start()
+        self.assertIs(pool.acquire(), connection)
+        timer.join()
+        self.assertEqual(pool.stats()['waited'], 1)
+
+    def test_timeout(self):
+        pool = self.pool(max_size=1, timeout=0.01)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_discards(self):
+        pool = self.pool(max_size=1, timeout=0.01)
+        connection = pool.acquire()
+        pool.release(connection, discard=True)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_max_lifetime(self):
+        pool = self.pool(max_lifetime=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_checks_idle_connections(self):
+        pool = self.pool(check=lambda connection: connection.usable, check_interval=0)
+        connection = pool.acquire()
+        connection.usable = False
+        pool.release(connection)
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+
+    def test_failed_connect_frees_its_slot(self):
+        attempts = []
+
+        def connect():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise OSError
+            return FakeConnection()
+
+        pool = ConnectionPool(connect, max_size=1, timeout=0.01)
+        with self.assertRaises(OSError):
+            pool.acquire()
+        pool.acquire()
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_guard_discards_the_connection_of_a_collected_owner(self):
+        class Owner(object):
+            pass
+
+        pool = self.pool(max_size=1, timeout=0.01)
+        owner, connection = Owner(), pool.acquire()
+        pool.guard(owner, connection)
+        del owner
+        gc.collect()
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+        pool.acquire()
+
+    def test_detached_guard_keeps_the_connection(self):
+        class Owner(object):
+            pass
+
+        pool = self.pool()
+        owner, connection = Owner(), pool.acquire()
+        pool.guard(owner, connection).detach()
+        pool.release(connection)
+        del owner
+        gc.collect()
+        self.assertFalse(connection.closed)
+        self.assertEqual(pool.stats()['idle'], 1)
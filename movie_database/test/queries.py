@@ -0,0 +1,21 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin(object):
+    def assertConstantQueries(self, url, add_rows, sizes=(1, 5, 25)):
+        """
+        Grow the table behind `url` through `add_rows(count)` and check the
+        list request costs the same number of queries for every size.
+        """
+        counts = []
+        total = 0
+        for size in sizes:
+            add_rows(size - total)
+            total = size
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(len(set(counts)), 1, 'query count depends on page size: %s' % counts)
+        return counts[0]
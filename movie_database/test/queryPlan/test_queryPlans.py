@@ -0,0 +1,166 @@
+import re
+from unittest import mock, skipUnless
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from movie_database.filters import MovieFilter, ActorFilter
+from movie_database.models import Movie, OscarAward, Actor, Director
+
+
+class QueryPlanTestCase(TestCase):
+    def explain(self, queryset):
+        return self.explain_sql(*queryset.query.sql_with_params())
+
+    def explain_sql(self, sql, params):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                return '\n'.join(row[-1] for row in cursor.fetchall())
+            # tiny test tables always favour sequential scans
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql, params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset):
+        return self.assertPlanUsesIndex(queryset.model._meta.db_table, self.explain(queryset), queryset.query)
+
+    def assertPlanUsesIndex(self, table, plan, query, scan=False):
+        """
+        Assert that `plan` reads `table` through an index, searching it for a
+        range or, with `scan`, reading all of it in index order.
+        """
+        if connection.vendor == 'sqlite':
+            access = '(SEARCH|SCAN)' if scan else 'SEARCH'
+            pattern = r'%s (TABLE )?%s( AS \w+)? USING (COVERING )?INDEX' % (access, table)
+        else:
+            pattern = r'Index (Only )?Scan .*on %s|Bitmap Index Scan' % table
+            self.assertNotIn('Seq Scan on %s' % table, plan)
+        self.assertTrue(re.search(pattern, plan), 'no index used by:\n%s\n%s' % (query, plan))
+        return plan
+
+    def assertNoSort(self, queryset):
+        self.assertPlanHasNoSort(self.explain(queryset))
+
+    def assertPlanHasNoSort(self, plan):
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+        self.assertIsNone(re.search(r'^\s*(->\s*)?Sort\b', plan, re.M), plan)
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'EXPLAIN output is only checked on SQLite and PostgreSQL')
+class TestQueryPlans(QueryPlanTestCase):
+    def test_animated_filter_uses_index_in_title_order(self):
+        queryset = Movie.objects.filter(animated=True)
+        self.assertUsesIndex(queryset)
+        self.assertNoSort(queryset)
+
+    def test_director_filter_uses_index_in_title_order(self):
+        queryset = Movie.objects.filter(director_id=1)
+        self.assertUsesIndex(queryset)
+        self.assertNoSort(queryset)
+
+    def test_director_and_title_filter_uses_index(self):
+        self.assertUsesIndex(Movie.objects.filter(director_id=1, title='Jaws'))
+
+    def test_oscar_year_range_uses_index(self):
+        self.assertUsesIndex(OscarAward.objects.filter(year__gte=1990, year__lte=2000).order_by('year'))
+
+    def test_movie_keyset_page_uses_index(self):
+        queryset = Movie.objects.filter(title__gte='Jaws').order_by('title', 'pk')
+        self.assertUsesIndex(queryset)
+
+    def test_actor_keyset_page_uses_index(self):
+        queryset = Actor.objects.filter(surname__gte='Murray')
+        self.assertUsesIndex(queryset)
+        self.assertNoSort(queryset)
+
+    def test_title_prefix_filter_uses_index(self):
+        self.assertUsesIndex(MovieFilter({'title': 'Ja'}, queryset=Movie.objects.all()).qs)
+
+    def test_surname_prefix_filter_uses_index(self):
+        queryset = ActorFilter({'surname': 'Mur'}, queryset=Actor.objects.all()).qs
+        self.assertUsesIndex(queryset)
+        self.assertNoSort(queryset)
+
+    def test_animated_filter_with_director_uses_index(self):
+        queryset = MovieFilter({'animated': 'true', 'director': '1'}, queryset=Movie.objects.all()).qs
+        self.assertUsesIndex(queryset)
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'EXPLAIN output is only checked on SQLite and PostgreSQL')
+@override_settings(API_RESPONSE_CACHE=None)
+class TestEndpointQueryPlans(QueryPlanTestCase):
+    """
+    Plans of the page queries the list endpoints actually run, keyset
+    conditions and prefix ranges included.
+    """
+
+    def setUp(self):
+        for name, surname in (('Steven', 'Spielberg'), ('Peter', 'Jackson')):
+            Director.objects.create(name=name, surname=surname)
+        for name, surname in (('Bill', 'Murray'), ('Tom', 'Hanks'), ('Anna', 'Dymna')):
+            Actor.objects.create(name=name, surname=surname)
+        for title in ('Jaws', 'Jackie Brown', 'Heat'):
+            Movie.objects.create(title=title, director_id=1)
+
+    def page_query(self, url, table):
+        """
+        Request `url` and return the response and the `(sql, params)` of its
+        page query on `table`.
+        """
+        executed = []
+        execute = CursorWrapper.execute
+
+        def record(cursor, sql, params=None):
+            executed.append((sql, params))
+            return execute(cursor, sql, params)
+
+        with mock.patch.object(CursorWrapper, 'execute', record):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for sql, params in executed:
+            if re.search(r'FROM "%s"' % table, sql) and 'LIMIT' in sql:
+                return response, (sql, params or ())
+        self.fail('no page query on %s among:\n%s' % (table, '\n'.join(sql for sql, params in executed)))
+
+    def assertPageUsesIndex(self, url, table, scan=False):
+        response, (sql, params) = self.page_query(url, table)
+        plan = self.assertPlanUsesIndex(table, self.explain_sql(sql, params), sql, scan)
+        return response, plan
+
+    def test_movie_filters(self):
+        url = reverse('movie-list')
+        for query in ('director=1', 'animated=true', 'title=Ja', 'director=1&title=Ja'):
+            response, plan = self.assertPageUsesIndex('%s?%s' % (url, query), 'movie_database_movie')
+            if 'title' not in query:
+                self.assertPlanHasNoSort(plan)
+
+    def test_movie_keyset_page(self):
+        url = reverse('movie-list') + '?page_size=1'
+        response, plan = self.assertPageUsesIndex(url, 'movie_database_movie', scan=True)
+        self.assertPlanHasNoSort(plan)
+        response, plan = self.assertPageUsesIndex(response.data['next'], 'movie_database_movie')
+        self.assertPlanHasNoSort(plan)
+
+    def test_filtered_movie_keyset_page(self):
+        url = reverse('movie-list') + '?page_size=1&director=1'
+        response, plan = self.assertPageUsesIndex(url, 'movie_database_movie')
+        response, plan = self.assertPageUsesIndex(response.data['next'], 'movie_database_movie')
+        self.assertPlanHasNoSort(plan)
+
+    def test_actor_prefix_and_keyset_page(self):
+        url = reverse('actor-list')
+        response, plan = self.assertPageUsesIndex(url + '?surname=Mur', 'movie_database_actor')
+        self.assertPlanHasNoSort(plan)
+        response, plan = self.assertPageUsesIndex(url + '?page_size=1', 'movie_database_actor', scan=True)
+        self.assertPlanHasNoSort(plan)
+        response, plan = self.assertPageUsesIndex(response.data['next'], 'movie_database_actor')
+        self.assertPlanHasNoSort(plan)
+
+    def test_oscar_year_filter(self):
+        OscarAward.objects.create(year=1994, category='Best_Film')
+        self.assertPageUsesIndex(reverse('oscaraward-list') + '?year_min=1990&year_max=2000',
+                                 'movie_database_oscaraward')
@@ -0,0 +1,94 @@
+import datetime
+import json
+from collections import OrderedDict
+
+import cbor2
+import msgpack
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase
+from django.utils.translation import ugettext_lazy
+from rest_framework import status
+from rest_framework.relations import Hyperlink
+from rest_framework.test import APITestCase
+from rest_framework.utils.encoders import JSONEncoder
+
+from movie_database.models import Actor, Director, Genre, Movie
+from movie_database.renderers import CBORRenderer, MessagePackRenderer
+
+DATA = OrderedDict([
+    ('url', Hyperlink('http://testserver/movies/1/', 'Jaws')),
+    ('title', 'Seksmisja ż' * 20),
+    ('label', ugettext_lazy('Invalid cursor')),
+    ('created', datetime.datetime(2017, 3, 1, 12, 30, 15)),
+    ('integers', [0, 1, 127, 128, 255, 256, 65535, 65536, 2 ** 32, 2 ** 64 - 1,
+                  -1, -32, -33, -128, -129, -32768, -32769, -2 ** 31 - 1, -2 ** 63]),
+    ('rating', 7.25),
+    ('actor', list(range(100))),
+    ('oscar_award', None),
+    ('flags', [True, False]),
+    ('nested', {'key%d' % i: {'value': i} for i in range(20)}),
+    ('blob', b'\x00\x01' * 200),
+])
+
+
+class TestBinaryRenderers(SimpleTestCase):
+    def expected(self):
+        # bytes stay bytes; everything else comes back as its JSON value
+        blob = DATA['blob']
+        data = json.loads(json.dumps(OrderedDict((key, value) for key, value in DATA.items() if key != 'blob'),
+                                     cls=JSONEncoder))
+        data['blob'] = blob
+        return data
+
+    def test_msgpack_round_trip(self):
+        self.assertEqual(msgpack.unpackb(MessagePackRenderer().render(DATA), raw=False), self.expected())
+
+    def test_cbor_round_trip(self):
+        # cbor2 has a type of its own for datetimes
+        data = dict(DATA, created=DATA['created'].isoformat())
+        expected = dict(self.expected(), created=DATA['created'].isoformat())
+        self.assertEqual(cbor2.loads(CBORRenderer().render(data)), expected)
+
+
+class TestBinaryFormatViews(APITestCase):
+    formats = (
+        ('application/msgpack', lambda data: msgpack.packb(data, use_bin_type=True),
+         lambda content: msgpack.unpackb(content, raw=False)),
+        ('application/cbor', cbor2.dumps, cbor2.loads),
+    )
+
+    def setUp(self):
+        self.director = Director.objects.create(name='Steven', surname='Spielberg')
+        self.actor = Actor.objects.create(name='Bill', surname='Murray')
+        movie = Movie.objects.create(title='Jaws', director=self.director)
+        movie.actor.add(self.actor)
+        movie.genre.add(Genre.objects.create(name='Drama'))
+
+    def test_responses_match_json(self):
+        for url in (reverse('movie-list'), reverse('actor-list'), reverse('director-detail', args=[1]),
+                    reverse('api-root')):
+            expected = json.loads(self.client.get(url, HTTP_ACCEPT='application/json').content.decode('utf-8'))
+            for media_type, dumps, loads in self.formats:
+                with self.subTest(url=url, media_type=media_type):
+                    response = self.client.get(url, HTTP_ACCEPT=media_type)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(response['Content-Type'], media_type)
+                    self.assertEqual(loads(response.content), expected)
+
+    def test_format_suffix(self):
+        response = self.client.get('/movies.msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+
+    def test_create_from_binary_body(self):
+        for index, (media_type, dumps, loads) in enumerate(self.formats):
+            data = {'title': 'Heat %d' % index, 'director': self.director.pk, 'actor': [self.actor.pk]}
+            response = self.client.post(reverse('movie-list'), dumps(data), content_type=media_type,
+                                        HTTP_ACCEPT=media_type)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(loads(response.content)['title'], data['title'])
+        self.assertEqual(Movie.objects.filter(title__startswith='Heat', actor=self.actor).count(), 2)
+
+    def test_invalid_body_is_rejected(self):
+        for media_type, dumps, loads in self.formats:
+            response = self.client.post(reverse('movie-list'), b'\xc1\xff', content_type=media_type)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
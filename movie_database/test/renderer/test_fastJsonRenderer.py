@@ -0,0 +1,72 @@
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy
+from rest_framework.relations import Hyperlink
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor
+from movie_database.renderers import ENCODERS, FastJSONRenderer
+
+
+class TestFastJSONRenderer(SimpleTestCase):
+    data = OrderedDict([
+        ('url', Hyperlink('http://testserver/movies/1/', 'Jaws')),
+        ('title', 'Seksmisja \u2028 \u2029 \u017c'),
+        ('created', datetime.datetime(2017, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)),
+        ('day', datetime.date(2017, 3, 1)),
+        ('label', ugettext_lazy('Invalid cursor')),
+        ('budget', Decimal('1.5')),
+        ('key', uuid.UUID('12345678123456781234567812345678')),
+        ('actor', [1, 2, 3]),
+        ('oscar_award', None),
+        ('animated', False),
+        ('counts', {1: 'one'}),
+        ('huge', 2 ** 70),
+    ])
+
+    def render(self, encoder, data, media_type='application/json'):
+        renderer = FastJSONRenderer()
+        renderer.encoder = encoder
+        return renderer.render(data, media_type)
+
+    def test_output_matches_json_renderer(self):
+        expected = JSONRenderer().render(self.data, 'application/json')
+        for encoder in ENCODERS:
+            with self.subTest(encoder=encoder):
+                self.assertEqual(self.render(encoder, self.data), expected)
+
+    def test_indent_is_rendered_like_json_renderer(self):
+        expected = JSONRenderer().render(self.data, 'application/json; indent=4')
+        for encoder in ENCODERS:
+            with self.subTest(encoder=encoder):
+                self.assertEqual(self.render(encoder, self.data, 'application/json; indent=4'), expected)
+
+    def test_none_renders_empty_body(self):
+        for encoder in ENCODERS:
+            with self.subTest(encoder=encoder):
+                self.assertEqual(self.render(encoder, None), b'')
+
+    def test_unserializable_data_still_fails(self):
+        for encoder in ENCODERS:
+            with self.subTest(encoder=encoder):
+                with self.assertRaises(TypeError):
+                    self.render(encoder, {'value': object()})
+
+    def test_fastest_available_encoder_is_default(self):
+        self.assertEqual(FastJSONRenderer.encoder, ENCODERS[0])
+        self.assertEqual(ENCODERS[-1], 'json')
+
+
+class TestFastJSONRendererViews(APITestCase):
+    def test_views_render_with_fast_renderer(self):
+        Actor.objects.create(name='Bill', surname='Murray')
+        response = self.client.get(reverse('actor-list'))
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connections, router
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from movie_database.models import Director, Movie
+from movie_database.replicas import set_read_database
+
+PRIMARY, REPLICA = 'lag_primary', 'lag_replica'
+
+
+class ReplicationLagHarness(object):
+    """
+    A primary and a replica SQLite file in a temporary directory. The
+    replica holds the rows of the primary as of the last `replicate()`, so
+    it lags behind until then.
+    """
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = {alias: os.path.join(self.directory, alias + '.sqlite3') for alias in (PRIMARY, REPLICA)}
+
+    def start(self):
+        for alias, path in self.paths.items():
+            connections.databases[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+        call_command('migrate', database=PRIMARY, verbosity=0, interactive=False)
+        self.replicate()
+
+    def replicate(self):
+        connections[REPLICA].close()
+        shutil.copyfile(self.paths[PRIMARY], self.paths[REPLICA])
+
+    def stop(self):
+        for alias in self.paths:
+            connections[alias].close()
+            delattr(connections._connections, alias)
+            del connections.databases[alias]
+        shutil.rmtree(self.directory)
+
+
+@override_settings(API_DATABASE_ROUTING={'PRIMARY': PRIMARY, 'REPLICAS': (REPLICA,), 'PIN_SECONDS': 60})
+class TestReplicaRouting(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.harness = ReplicationLagHarness()
+        cls.harness.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.harness.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.director = Director.objects.create(name='Steven', surname='Spielberg')
+        self.harness.replicate()
+
+    def tearDown(self):
+        Movie.objects.all().delete()
+        Director.objects.all().delete()
+        self.harness.replicate()
+
+    def titles(self, client, **headers):
+        response = client.get(reverse('movie-list'), **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [movie['title'] for movie in response.data['results']]
+
+    def create_movie(self, client, title):
+        response = client.post(reverse('movie-list'), {'title': title, 'director': self.director.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def test_routes_reads_of_requests_only(self):
+        self.assertEqual(router.db_for_read(Movie), PRIMARY)
+        self.assertEqual(router.db_for_write(Movie), PRIMARY)
+        set_read_database(REPLICA)
+        try:
+            self.assertEqual(router.db_for_read(Movie), REPLICA)
+            self.assertEqual(router.db_for_write(Movie), PRIMARY)
+        finally:
+            set_read_database(None)
+        self.assertFalse(router.allow_migrate(REPLICA, 'movie_database'))
+
+    def test_reads_lag_behind_writes_of_other_clients(self):
+        self.create_movie(self.client, 'Jaws')
+        self.assertEqual(self.titles(APIClient()), [])
+        self.harness.replicate()
+        self.assertEqual(self.titles(APIClient()), ['Jaws'])
+
+    def test_reads_your_writes_with_the_cookie(self):
+        response = self.create_movie(self.client, 'Jaws')
+        self.assertIn('read_primary_until', response.cookies)
+        self.assertEqual(self.titles(self.client), ['Jaws'])
+
+    @override_settings(API_RESPONSE_CACHE=None)
+    def test_reads_your_writes_with_the_header(self):
+        response = self.create_movie(APIClient(), 'Jaws')
+        until = response['X-Read-Primary-Until']
+        self.assertEqual(self.titles(APIClient(), HTTP_X_READ_PRIMARY_UNTIL=until), ['Jaws'])
+        self.assertEqual(self.titles(APIClient(), HTTP_X_READ_PRIMARY_UNTIL='%.3f' % (time.time() - 1)), [])
+
+    def test_does_not_cache_lagging_reads(self):
+        self.create_movie(self.client, 'Jaws')
+        self.assertEqual(self.titles(APIClient()), [])
+        self.assertEqual(self.titles(self.client), ['Jaws'])
+        self.harness.replicate()
+        self.assertEqual(self.titles(APIClient()), ['Jaws'])
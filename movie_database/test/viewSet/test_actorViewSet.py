@@ -3,9 +3,10 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from movie_database.models import Actor, Director, Movie
+from movie_database.test.queries import QueryCountMixin
 
 
-class TestActorViewSet(APITestCase):
+class TestActorViewSet(QueryCountMixin, APITestCase):
     def test_detail_view_with_a_non_exist_actor(self):
         # should return a 404 not found.
         url = reverse('actor-detail', kwargs={'pk': 123})
@@ -128,3 +129,35 @@ class TestActorViewSet(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Actor.objects.count(), 0)
         self.assertEqual(Movie.objects.count(), 1)
+
+    def test_list_view_query_count_does_not_depend_on_actors(self):
+        director = Director(name='steven', surname='spilberg')
+        director.save()
+        movies = [Movie.objects.create(title=title, director=director) for title in ('Logan', 'Top Gun')]
+
+        def add_actors(count):
+            for i in range(count):
+                actor = Actor.objects.create(name='actor', surname='%d' % Actor.objects.count())
+                actor.plays.add(*movies)
+
+        queries = self.assertConstantQueries(reverse('actor-list'), add_actors)
+        # conditional GET state, actors and their movies
+        self.assertEqual(queries, 3)
+
+    def test_plays_renders_movie_urls(self):
+        Director(name='steven', surname='spilberg').save()
+        a = Actor(name='Bill', surname='Murray')
+        a.save()
+        m1 = Movie(title='Top Gun', director=Director.objects.get(pk=1))
+        m1.save()
+        m2 = Movie(title='Logan', director=Director.objects.get(pk=1))
+        m2.save()
+        a.plays.add(m1, m2)
+
+        url = reverse('actor-detail', kwargs={'pk': a.id})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['plays'], [
+            'http://testserver' + reverse('movie-detail', kwargs={'pk': m2.id}),
+            'http://testserver' + reverse('movie-detail', kwargs={'pk': m1.id}),
+        ])
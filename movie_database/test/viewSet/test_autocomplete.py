@@ -0,0 +1,123 @@
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.autocomplete import PrefixIndex, get_autocomplete_index, reset_autocomplete_index
+from movie_database.models import Actor, Director, Movie
+
+
+class TestPrefixIndex(APITestCase):
+    def setUp(self):
+        self.index = PrefixIndex([
+            ('jaws', 0, 2, 'Jaws'),
+            ('jaws the revenge', 0, 1, 'Jaws the Revenge'),
+            ('jackson', 1, 1, 'Samuel Jackson'),
+            ('jackson', 2, 1, 'Peter Jackson'),
+        ])
+
+    def test_search(self):
+        self.assertEqual(self.index.search('JA'), [
+            ('actor', 1, 'Samuel Jackson'), ('director', 1, 'Peter Jackson'),
+            ('movie', 2, 'Jaws'), ('movie', 1, 'Jaws the Revenge'),
+        ])
+        self.assertEqual(self.index.search('jaws', limit=1), [('movie', 2, 'Jaws')])
+        self.assertEqual(self.index.search('jb'), [])
+
+    def test_insert_update_and_remove(self):
+        self.index.insert('actor', 2, {'name': 'Hugh', 'surname': 'Jackman'})
+        self.assertEqual(self.index.search('jack', limit=1), [('actor', 2, 'Hugh Jackman')])
+        self.index.update('actor', 2, {'name': 'Hugh', 'surname': 'Grant'}, 'jackman')
+        self.assertEqual(self.index.search('gr'), [('actor', 2, 'Hugh Grant')])
+        self.assertEqual(len(self.index), 5)
+        # found by scanning without the key
+        self.index.remove('director', 1)
+        self.index.remove('movie', 1, 'jaws the revenge')
+        self.assertEqual(self.index.search('ja'), [('actor', 1, 'Samuel Jackson'), ('movie', 2, 'Jaws')])
+
+    def test_max_entries(self):
+        index = PrefixIndex([('b', 0, 1, 'B'), ('a', 0, 2, 'A'), ('c', 0, 3, 'C')], max_entries=2)
+        index.insert('movie', 4, {'title': 'D'})
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.stats()['dropped'], 2)
+        self.assertEqual(index.search('b'), [('movie', 1, 'B')])
+
+
+class TestAutocomplete(APITestCase):
+    def setUp(self):
+        reset_autocomplete_index()
+        self.spielberg = Director.objects.create(name='Steven', surname='Spielberg')
+        self.spinella = Actor.objects.create(name='Stephen', surname='Spinella')
+        self.jaws = Movie.objects.create(title='Jaws', director=self.spielberg)
+
+    def tearDown(self):
+        reset_autocomplete_index()
+
+    def complete(self, prefix, **params):
+        params['q'] = prefix
+        response = self.client.get(reverse('autocomplete-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['type'], item['id']) for item in response.data['results']]
+
+    def test_results(self):
+        response = self.client.get(reverse('autocomplete-list'), {'q': 'spi'})
+        self.assertEqual(response.data['results'][1], {
+            'url': 'http://testserver' + reverse('actor-detail', args=[self.spinella.pk]),
+            'type': 'actor',
+            'id': self.spinella.pk,
+            'text': 'Stephen Spinella',
+        })
+        self.assertEqual(self.complete('spi'), [('director', self.spielberg.pk), ('actor', self.spinella.pk)])
+        self.assertEqual(self.complete('spi', limit=1), [('director', self.spielberg.pk)])
+        self.assertEqual(self.complete('steven'), [])
+
+    def test_requires_a_prefix(self):
+        response = self.client.get(reverse('autocomplete-list'), {'q': ' '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_does_not_query_the_database(self):
+        get_autocomplete_index()
+        with self.assertNumQueries(0):
+            self.complete('ja')
+
+    def test_follows_writes(self):
+        self.assertEqual(self.complete('ja'), [('movie', self.jaws.pk)])
+        self.jaws.title = 'Jurassic Park'
+        self.jaws.save()
+        self.assertEqual(self.complete('ja'), [])
+        self.assertEqual(self.complete('ju'), [('movie', self.jaws.pk)])
+
+        hook = Movie.objects.create(title='Hook', director=self.spielberg)
+        self.assertEqual(self.complete('ho'), [('movie', hook.pk)])
+
+        actor = Actor.objects.get(pk=self.spinella.pk)
+        actor.surname = 'Hanks'
+        actor.save()
+        self.assertEqual(self.complete('h'), [('actor', actor.pk), ('movie', hook.pk)])
+        actor.delete()
+        self.spielberg.delete()
+        self.assertEqual(self.complete('h'), [])
+        self.assertEqual(self.complete('s'), [])
+
+    def test_previous_key_is_read_only_by_saves_that_need_it(self):
+        get_autocomplete_index()
+        movie = Movie.objects.get(pk=self.jaws.pk)
+        self.assertFalse(hasattr(movie, '_autocomplete_key'))
+        key_lookup = 'SELECT "movie_database_movie"."title" FROM'
+        movie.animated = True
+        with CaptureQueriesContext(connection) as context:
+            movie.save(update_fields=['animated'])
+        self.assertFalse([query for query in context.captured_queries if key_lookup in query['sql']])
+        movie = Movie.objects.get(pk=self.jaws.pk)
+        movie.title = 'Jurassic Park'
+        with CaptureQueriesContext(connection) as context:
+            movie.save(update_fields=['title'])
+        self.assertEqual(len([query for query in context.captured_queries if key_lookup in query['sql']]), 1)
+        self.assertEqual(self.complete('ju'), [('movie', movie.pk)])
+        self.assertEqual(self.complete('ja'), [])
+
+    def test_max_entries(self):
+        with override_settings(API_AUTOCOMPLETE={'MAX_ENTRIES': 1}):
+            self.assertEqual(len(self.complete('s') + self.complete('j')), 1)
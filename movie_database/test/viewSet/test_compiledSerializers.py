@@ -0,0 +1,71 @@
+from django.core.urlresolvers import reverse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from movie_database.compiled import compile_serializer
+from movie_database.models import Actor, Director, Movie, Genre, OscarAward, oscar_categories_tuple
+from movie_database.serializers import GenreSerializer, OscarAwardSerializer, ActorSerializer, DirectorSerializer, \
+    MovieSerializer
+
+
+class TestCompiledSerializers(APITestCase):
+    def setUp(self):
+        directors = [Director.objects.create(name='Steven', surname='Spielberg'),
+                     Director.objects.create(name='Andrzej', surname='Wajda')]
+        actors = [Actor.objects.create(name='Bill', surname='Murray'),
+                  Actor.objects.create(name='Anna', surname='Dymna'),
+                  Actor.objects.create(name='Jerzy', surname='Stuhr')]
+        genres = [Genre.objects.create(name='Drama'), Genre.objects.create(name='Comedy')]
+        award = OscarAward.objects.create(year=1980, category=oscar_categories_tuple[0][0])
+        for i, title in enumerate(('Jaws', 'Heat', 'Seksmisja', 'Jaws')):
+            movie = Movie.objects.create(title=title, director=directors[i % 2], animated=i == 2,
+                                         oscar_award=award if i == 0 else None)
+            movie.actor.add(*actors[i:])
+            movie.genre.add(*genres[:i % 3])
+
+    def assertSameOutput(self, serializer_class, query=''):
+        request = Request(APIRequestFactory().get('/' + query))
+        context = {'request': request, 'format': None}
+        queryset = serializer_class.Meta.model.objects.all()
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context=context).data)
+
+        compiled = compile_serializer(serializer_class(context=context))
+        self.assertIsNotNone(compiled)
+        rows = compiled.values(queryset)
+        self.assertEqual(JSONRenderer().render(compiled.to_representation(rows)), expected)
+
+    def test_output_matches_serializers(self):
+        for serializer_class in (GenreSerializer, OscarAwardSerializer, ActorSerializer, DirectorSerializer,
+                                 MovieSerializer):
+            self.assertSameOutput(serializer_class)
+
+    def test_output_matches_serializers_with_sparse_fields(self):
+        self.assertSameOutput(MovieSerializer, '?fields=url,actor,oscar_award')
+        self.assertSameOutput(ActorSerializer, '?fields=created,plays')
+
+    def test_unsupported_fields_are_not_compiled(self):
+        class TitleLengthSerializer(serializers.ModelSerializer):
+            length = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Movie
+                fields = ('id', 'length')
+
+        self.assertIsNone(compile_serializer(TitleLengthSerializer()))
+
+    def test_list_matches_detail_views(self):
+        for name in ('genre', 'oscaraward', 'actor', 'director', 'movie'):
+            results = self.client.get(reverse('%s-list' % name)).data['results']
+            self.assertTrue(results)
+            for item in results:
+                detail = self.client.get(reverse('%s-detail' % name, kwargs={'pk': item['id']}))
+                self.assertEqual(JSONRenderer().render(item), JSONRenderer().render(detail.data))
+
+    def test_list_pages_follow_the_cursor(self):
+        response = self.client.get(reverse('movie-list') + '?page_size=3&ordering=-title')
+        first = [item['id'] for item in response.data['results']]
+        second = [item['id'] for item in self.client.get(response.data['next']).data['results']]
+        self.assertEqual(len(first + second), Movie.objects.count())
+        self.assertEqual(first + second, list(Movie.objects.order_by('-title', '-pk').values_list('pk', flat=True)))
@@ -0,0 +1,97 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor, Director, Movie, Genre, OscarAward, oscar_categories_tuple
+
+
+class TestConditionalGet(APITestCase):
+    def setUp(self):
+        self.director = Director.objects.create(name='steven', surname='spilberg')
+        self.actor = Actor.objects.create(name='Bill', surname='Murray')
+        self.movie = Movie.objects.create(title='Jaws', director=self.director)
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(cached.content, b'')
+
+    def test_weak_etags_match(self):
+        url = reverse('movie-list')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"other", W/%s' % etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        url = reverse('actor-detail', kwargs={'pk': self.actor.pk})
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_save_changes_etag(self):
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        etag = self.client.get(url)['ETag']
+        self.movie.title = 'Jaws 2'
+        self.movie.save()
+        self.assertModified(url, etag)
+
+    def test_list_etag_changes_on_delete(self):
+        Movie.objects.create(title='Heat', director=self.director)
+        url = reverse('movie-list')
+        etag = self.client.get(url)['ETag']
+        self.movie.delete()
+        self.assertModified(url, etag)
+
+    def test_actor_etag_changes_when_cast(self):
+        url = reverse('actor-detail', kwargs={'pk': self.actor.pk})
+        etag = self.client.get(url)['ETag']
+        self.movie.actor.add(self.actor)
+        self.assertModified(url, etag)
+
+    def test_movie_etag_changes_when_actor_cast_from_reverse_side(self):
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        etag = self.client.get(url)['ETag']
+        self.actor.plays.add(self.movie)
+        self.assertModified(url, etag)
+
+    def test_movie_etag_changes_when_genre_cleared(self):
+        genre = Genre.objects.create(name='Drama')
+        self.movie.genre.add(genre)
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        etag = self.client.get(url)['ETag']
+        genre.movie_genre.clear()
+        self.assertModified(url, etag)
+
+    def test_movie_etag_changes_when_oscar_award_deleted(self):
+        award = OscarAward.objects.create(year=1979, category=oscar_categories_tuple[0][0])
+        self.movie.oscar_award = award
+        self.movie.save()
+        url = reverse('movie-detail', kwargs={'pk': self.movie.pk})
+        etag = self.client.get(url)['ETag']
+        award.delete()
+        self.assertModified(url, etag)
+
+    def test_director_etag_changes_when_movie_moves_away(self):
+        other = Director.objects.create(name='peter', surname='jackson')
+        url = reverse('director-detail', kwargs={'pk': self.director.pk})
+        etag = self.client.get(url)['ETag']
+        self.movie.director = other
+        self.movie.save()
+        self.assertModified(url, etag)
+
+    def test_missing_detail_is_404(self):
+        url = reverse('movie-detail', kwargs={'pk': 123})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
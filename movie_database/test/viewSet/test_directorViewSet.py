@@ -3,9 +3,10 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from movie_database.models import Director, Actor, Movie
+from movie_database.test.queries import QueryCountMixin
 
 
-class TestDirectorViewSet(APITestCase):
+class TestDirectorViewSet(QueryCountMixin, APITestCase):
 
     def test_detail_view_with_a_non_exist_director(self):
         # should return a 404 not found.
@@ -128,3 +129,25 @@ class TestDirectorViewSet(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Director.objects.count(), 0)
         self.assertEqual(Movie.objects.count(), 0)
+
+    def test_list_view_query_count_does_not_depend_on_directors(self):
+        def add_directors(count):
+            for i in range(count):
+                director = Director.objects.create(name='director', surname='%d' % Director.objects.count())
+                Movie(title='Logan', director=director).save()
+                Movie(title='Top Gun', director=director).save()
+
+        queries = self.assertConstantQueries(reverse('director-list'), add_directors)
+        # conditional GET state, directors and their movies
+        self.assertEqual(queries, 3)
+
+    def test_directs_renders_movie_urls(self):
+        d = Director(name='steven', surname='spilberg')
+        d.save()
+        m = Movie(title='Logan', director=d)
+        m.save()
+
+        url = reverse('director-detail', kwargs={'pk': d.id})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['directs'], ['http://testserver' + reverse('movie-detail', kwargs={'pk': m.id})])
@@ -0,0 +1,82 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor, Director, Movie, Genre, OscarAward, oscar_categories_tuple
+
+
+class TestFilters(APITestCase):
+    def setUp(self):
+        self.spielberg = Director.objects.create(name='Steven', surname='Spielberg')
+        self.jackson = Director.objects.create(name='Peter', surname='Jackson')
+        self.murray = Actor.objects.create(name='Bill', surname='Murray')
+        Actor.objects.create(name='Eddie', surname='Murphy')
+        Actor.objects.create(name='Anna', surname='Dymna')
+        self.drama = Genre.objects.create(name='Drama')
+        award_1980 = OscarAward.objects.create(year=1980, category=oscar_categories_tuple[0][0])
+        award_2000 = OscarAward.objects.create(year=2000, category=oscar_categories_tuple[1][0])
+
+        self.jaws = Movie.objects.create(title='Jaws', director=self.spielberg, oscar_award=award_1980)
+        self.jaws.actor.add(self.murray)
+        self.jaws.genre.add(self.drama)
+        self.jackie = Movie.objects.create(title='Jackie', director=self.jackson, animated=True,
+                                           oscar_award=award_2000)
+        self.heat = Movie.objects.create(title='Heat', director=self.jackson)
+
+    def titles(self, query):
+        response = self.client.get(reverse('movie-list') + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [movie['title'] for movie in response.data['results']]
+
+    def test_title_prefix(self):
+        self.assertEqual(self.titles('?title=Ja'), ['Jackie', 'Jaws'])
+        self.assertEqual(self.titles('?title=Jaw'), ['Jaws'])
+        self.assertEqual(self.titles('?title=ja'), [])
+
+    def test_title_prefix_at_the_end_of_the_code_space(self):
+        Movie.objects.create(title='Ja\U0010ffff', director=self.jackson)
+        Movie.objects.create(title='Ja\ud7ff', director=self.jackson)
+        self.assertEqual(self.titles('?title=Ja%F4%8F%BF%BF'), ['Ja\U0010ffff'])
+        self.assertEqual(self.titles('?title=%F4%8F%BF%BF'), [])
+        self.assertEqual(self.titles('?title=Ja%ED%9F%BF'), ['Ja\ud7ff'])
+
+    def test_relations(self):
+        self.assertEqual(self.titles('?director=%d' % self.jackson.pk), ['Heat', 'Jackie'])
+        self.assertEqual(self.titles('?actor=%d' % self.murray.pk), ['Jaws'])
+        self.assertEqual(self.titles('?genre=%d' % self.drama.pk), ['Jaws'])
+
+    def test_animated(self):
+        self.assertEqual(self.titles('?animated=true'), ['Jackie'])
+        self.assertEqual(self.titles('?animated=false'), ['Heat', 'Jaws'])
+
+    def test_oscar_year_range(self):
+        self.assertEqual(self.titles('?oscar_year_min=1990'), ['Jackie'])
+        self.assertEqual(self.titles('?oscar_year_min=1970&oscar_year_max=1990'), ['Jaws'])
+
+    def test_person_surname_prefix(self):
+        response = self.client.get(reverse('actor-list') + '?surname=Mur')
+        self.assertEqual([actor['name'] for actor in response.data['results']], ['Eddie', 'Bill'])
+        response = self.client.get(reverse('director-list') + '?surname=Ja')
+        self.assertEqual([director['name'] for director in response.data['results']], ['Peter'])
+
+    def test_oscar_award_category_and_year(self):
+        url = reverse('oscaraward-list')
+        response = self.client.get(url + '?category=%s' % oscar_categories_tuple[1][0])
+        self.assertEqual([award['year'] for award in response.data['results']], [2000])
+        response = self.client.get(url + '?year_max=1990')
+        self.assertEqual([award['year'] for award in response.data['results']], [1980])
+
+    def test_ordering_by_indexed_column(self):
+        self.assertEqual(self.titles('?ordering=-title'), ['Jaws', 'Jackie', 'Heat'])
+
+    def test_ordering_by_unindexed_column_is_ignored(self):
+        self.assertEqual(self.titles('?ordering=-created'), ['Heat', 'Jackie', 'Jaws'])
+
+    def test_descending_ordering_pages_by_cursor(self):
+        titles = []
+        url = reverse('movie-list') + '?ordering=-title&page_size=1'
+        while url:
+            response = self.client.get(url)
+            titles += [movie['title'] for movie in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, ['Jaws', 'Jackie', 'Heat'])
@@ -2,7 +2,7 @@ from django.core.urlresolvers import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from movie_database.models import Genre
+from movie_database.models import Genre, Director, Movie
 
 
 class TestGenreViewSet(APITestCase):
@@ -65,3 +65,18 @@ class TestGenreViewSet(APITestCase):
         g.save()
         response = self.client.get('/genres/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_movie_genre_renders_movie_urls(self):
+        Director(name='steven', surname='spilberg').save()
+        g = Genre(name='Comedy')
+        g.save()
+        m = Movie(title='Logan', director=Director.objects.get(pk=1))
+        m.save()
+        m.genre.add(g)
+
+        url = reverse('genre-detail', kwargs={'pk': g.id})
+        with self.assertNumQueries(2):
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['movie_genre'],
+                         ['http://testserver' + reverse('movie-detail', kwargs={'pk': m.id})])
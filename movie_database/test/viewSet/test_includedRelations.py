@@ -0,0 +1,81 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor, Director, Movie, Genre, OscarAward, oscar_categories_tuple
+
+
+class TestIncludedRelations(APITestCase):
+    def setUp(self):
+        self.director = Director.objects.create(name='Steven', surname='Spielberg')
+        self.murray = Actor.objects.create(name='Bill', surname='Murray')
+        self.dymna = Actor.objects.create(name='Anna', surname='Dymna')
+        self.drama = Genre.objects.create(name='Drama')
+        self.award = OscarAward.objects.create(year=1980, category=oscar_categories_tuple[0][0])
+        self.jaws = Movie.objects.create(title='Jaws', director=self.director, oscar_award=self.award)
+        self.jaws.actor.add(self.murray, self.dymna)
+        self.jaws.genre.add(self.drama)
+        self.heat = Movie.objects.create(title='Heat', director=self.director)
+        self.heat.actor.add(self.murray)
+
+    def test_detail_includes_related_objects(self):
+        url = reverse('movie-detail', kwargs={'pk': self.jaws.pk})
+        response = self.client.get(url + '?include=director,actor,genre,oscar_award')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Jaws')
+        included = response.data['included']
+        self.assertEqual(list(included), ['directors', 'actors', 'genres', 'oscarAwards'])
+        self.assertEqual([director['surname'] for director in included['directors']], ['Spielberg'])
+        self.assertEqual([actor['surname'] for actor in included['actors']], ['Dymna', 'Murray'])
+        self.assertEqual(included['genres'][0]['name'], 'Drama')
+        self.assertEqual(included['oscarAwards'][0]['year'], 1980)
+
+    def test_included_objects_match_their_own_endpoints(self):
+        url = reverse('movie-detail', kwargs={'pk': self.jaws.pk})
+        included = self.client.get(url + '?include=actor').data['included']
+        actor = self.client.get(reverse('actor-detail', kwargs={'pk': self.murray.pk})).data
+        self.assertIn(actor, included['actors'])
+
+    def test_list_deduplicates_shared_objects(self):
+        response = self.client.get(reverse('movie-list') + '?include=director,actor')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(len(response.data['included']['directors']), 1)
+        self.assertEqual(len(response.data['included']['actors']), 2)
+
+    def test_query_count_does_not_depend_on_rows(self):
+        url = reverse('movie-list') + '?include=director,actor,genre,oscar_award'
+        # movies with actors and genres, then every relation with its movie links
+        with self.assertNumQueries(10):
+            self.client.get(url)
+        for i in range(5):
+            movie = Movie.objects.create(title='movie %d' % i, director=Director.objects.create(
+                name='director', surname='%d' % i))
+            movie.actor.add(Actor.objects.create(name='actor', surname='%d' % i))
+        with self.assertNumQueries(10):
+            self.client.get(url)
+
+    def test_included_objects_ignore_sparse_fields(self):
+        url = reverse('movie-detail', kwargs={'pk': self.jaws.pk})
+        response = self.client.get(url + '?fields=id&include=director')
+        self.assertEqual(set(response.data), {'id', 'included'})
+        self.assertIn('surname', response.data['included']['directors'][0])
+
+    def test_unknown_relation_is_rejected(self):
+        response = self.client.get(reverse('movie-list') + '?include=actor,crew')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('include', response.data)
+
+    def test_included_objects_skip_conditional_get(self):
+        # renaming the director leaves the movie rows untouched
+        for url in (reverse('movie-list'), reverse('movie-detail', kwargs={'pk': self.jaws.pk})):
+            response = self.client.get(url + '?include=director')
+            self.assertFalse(response.has_header('ETag'))
+            self.director.surname = 'Kubrick %s' % url
+            self.director.save()
+            response = self.client.get(url + '?include=director', HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['included']['directors'][0]['surname'], 'Kubrick %s' % url)
+
+    def test_without_include(self):
+        response = self.client.get(reverse('movie-detail', kwargs={'pk': self.jaws.pk}))
+        self.assertNotIn('included', response.data)
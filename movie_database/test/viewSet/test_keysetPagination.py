@@ -0,0 +1,76 @@
+import json
+from base64 import urlsafe_b64encode
+
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor, Director, Movie, Genre
+from movie_database.pagination import KeysetPagination
+
+
+class TestKeysetPagination(APITestCase):
+    def setUp(self):
+        # duplicated titles force the `id` tiebreak
+        for title in ['Jaws', 'Alien', 'Jaws', 'Brazil', 'Alien', 'Heat', 'Zelig']:
+            Movie(title=title, director=Director.objects.create(name=title, surname='%d' % Director.objects.count()))\
+                .save()
+
+    def walk(self, url, key='next'):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([movie['id'] for movie in response.data['results']])
+            url = response.data[key]
+        return pages
+
+    def test_pages_follow_title_then_id(self):
+        pages = self.walk(reverse('movie-list') + '?page_size=2')
+        expected = list(Movie.objects.order_by('title', 'id').values_list('id', flat=True))
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_links_walk_back(self):
+        forward = self.walk(reverse('movie-list') + '?page_size=3')
+        first = self.client.get(reverse('movie-list') + '?page_size=3')
+        self.assertIsNone(first.data['previous'])
+
+        last = self.client.get(self.client.get(first.data['next']).data['next'])
+        backward = self.walk(last.data['previous'], key='previous')
+        self.assertEqual(backward, [forward[1], forward[0]])
+
+    def test_page_size_is_capped(self):
+        original = KeysetPagination.max_page_size
+        KeysetPagination.max_page_size = 2
+        try:
+            response = self.client.get(reverse('movie-list') + '?page_size=50')
+        finally:
+            KeysetPagination.max_page_size = original
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('movie-list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursors_return_404(self):
+        for position in (['x', 'abc'], ['x', {'id': 1}], ['x', [1]], ['x', None], 'ab', None, ['x', 1, 2]):
+            cursor = urlsafe_b64encode(json.dumps({'r': 0, 'p': position}).encode('utf-8')).decode('ascii')
+            response = self.client.get(reverse('movie-list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+            self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+    def test_actors_follow_surname_then_name(self):
+        for name, surname in [('b', 'Murray'), ('a', 'Murray'), ('z', 'Allen'), ('c', 'Zappa')]:
+            Actor(name=name, surname=surname).save()
+
+        pages = self.walk(reverse('actor-list') + '?page_size=3')
+        names = [Actor.objects.get(pk=pk).name for pk in sum(pages, [])]
+        self.assertEqual(names, ['z', 'a', 'b', 'c'])
+
+    def test_unordered_models_page_by_id(self):
+        for name in ['Drama', 'Comedy', 'Action']:
+            Genre(name=name).save()
+
+        pages = self.walk(reverse('genre-list') + '?page_size=2')
+        self.assertEqual(pages, [[1, 2], [3]])
@@ -0,0 +1,113 @@
+import json
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from django.utils.six import StringIO
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor, Director, Movie, Genre, OscarAward, MovieReadModel, oscar_categories_tuple
+from movie_database.read_model import build_read_models
+
+
+@override_settings(API_MOVIE_READ_MODEL=True)
+class TestMovieReadModel(APITestCase):
+    def setUp(self):
+        self.spielberg = Director.objects.create(name='Steven', surname='Spielberg')
+        self.wajda = Director.objects.create(name='Andrzej', surname='Wajda')
+        self.murray = Actor.objects.create(name='Bill', surname='Murray')
+        self.dymna = Actor.objects.create(name='Anna', surname='Dymna')
+        self.drama = Genre.objects.create(name='Drama')
+        self.award = OscarAward.objects.create(year=1980, category=oscar_categories_tuple[0][0])
+        self.jaws = Movie.objects.create(title='Jaws', director=self.spielberg, oscar_award=self.award)
+        self.jaws.actor.add(self.murray, self.dymna)
+        self.jaws.genre.add(self.drama)
+        self.heat = Movie.objects.create(title='Heat', director=self.wajda, animated=True)
+        self.heat.actor.add(self.murray)
+
+    def assertInSync(self):
+        expected = {row.id: json.loads(row.data) for row in build_read_models(Movie.objects.all())}
+        stored = {row.id: json.loads(row.data) for row in MovieReadModel.objects.all()}
+        self.assertEqual(stored, expected)
+
+    def stored(self, movie):
+        return json.loads(MovieReadModel.objects.get(pk=movie.pk).data)
+
+    def test_rows_follow_movie_writes(self):
+        self.assertInSync()
+        self.jaws.title = 'Jaws 2'
+        self.jaws.save()
+        self.assertEqual(self.stored(self.jaws)['title'], 'Jaws 2')
+        self.heat.delete()
+        self.assertInSync()
+
+    def test_rows_follow_m2m_changes_from_both_sides(self):
+        self.jaws.actor.remove(self.dymna)
+        self.assertInSync()
+        self.murray.plays.clear()
+        self.assertEqual(self.stored(self.heat)['actor'], [])
+        self.assertInSync()
+        self.drama.movie_genre.add(self.heat)
+        self.assertEqual(self.stored(self.heat)['genre'], [self.drama.pk])
+        self.heat.genre.clear()
+        self.assertInSync()
+
+    def test_rows_follow_related_changes(self):
+        # renaming an actor changes the order of the actor lists
+        self.dymna.surname = 'Zymna'
+        self.dymna.save()
+        self.assertEqual(self.stored(self.jaws)['actor'], [self.murray.pk, self.dymna.pk])
+        self.murray.delete()
+        self.drama.delete()
+        self.award.delete()
+        self.assertInSync()
+        self.assertIsNone(self.stored(self.jaws)['oscar_award'])
+        self.wajda.delete()
+        self.assertFalse(MovieReadModel.objects.filter(pk=self.heat.pk).exists())
+        self.assertInSync()
+
+    def test_rows_follow_bulk_creates(self):
+        data = [{'title': 'Movie %d' % i, 'director': self.wajda.pk, 'actor': [self.dymna.pk]} for i in range(3)]
+        response = self.client.post(reverse('movie-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(MovieReadModel.objects.count(), 5)
+        self.assertInSync()
+
+    def test_responses_match_regular_views(self):
+        urls = [reverse('movie-list'), reverse('movie-list') + '?fields=url,actor&ordering=-title',
+                reverse('movie-list') + '?animated=true&page_size=1', reverse('movie-list') + '?director=1',
+                reverse('movie-detail', args=[self.jaws.pk]), reverse('movie-detail', args=[self.heat.pk])]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                with self.settings(API_MOVIE_READ_MODEL=False):
+                    expected = self.client.get(url)
+                self.assertEqual(response.content, expected.content)
+
+    def test_list_reads_one_table(self):
+        # conditional GET state and the read model rows
+        with self.assertNumQueries(2) as context:
+            self.client.get(reverse('movie-list'))
+        self.assertIn('movie_database_moviereadmodel', context.captured_queries[-1]['sql'])
+        self.assertNotIn('JOIN', context.captured_queries[-1]['sql'])
+
+    def test_other_filters_use_regular_views(self):
+        response = self.client.get(reverse('movie-list') + '?actor=%d' % self.dymna.pk)
+        self.assertEqual([movie['title'] for movie in response.data['results']], ['Jaws'])
+
+    def test_missing_detail(self):
+        response = self.client.get(reverse('movie-detail', args=[123]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_command(self):
+        MovieReadModel.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_movie_read_model', chunk_size=1, stdout=out)
+        self.assertIn('Rebuilt 2 movie read models', out.getvalue())
+        self.assertInSync()
+
+    @override_settings(API_MOVIE_READ_MODEL=False)
+    def test_disabled(self):
+        Movie.objects.create(title='Logan', director=self.wajda)
+        self.assertFalse(MovieReadModel.objects.filter(title='Logan').exists())
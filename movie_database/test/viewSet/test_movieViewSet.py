@@ -1,11 +1,18 @@
+import json
+
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from movie_database.models import Director, Actor, OscarAward, oscar_categories_tuple, Movie
+from movie_database.models import Director, Actor, OscarAward, oscar_categories_tuple, Movie, Genre
+from movie_database.test.queries import QueryCountMixin
+from movie_database.serializers import MovieSerializer
+from movie_database.views import MovieViewSet
 
 
-class TestMovieViewSet(APITestCase):
+class TestMovieViewSet(QueryCountMixin, APITestCase):
     def setUp(self):
         Director(name='Stephen', surname='Spilberg').save()
         Director(name='Peter', surname='Jackson').save()
@@ -86,3 +93,183 @@ class TestMovieViewSet(APITestCase):
         self.assertEqual(Movie.objects.count(), 1)
         self.assertEqual(Movie.objects.get().director, Director.objects.get(pk=1))
         self.assertEqual(response.data['animated'], True)
+
+    def test_list_view_query_count_does_not_depend_on_movies(self):
+        Genre(name='Drama').save()
+
+        def add_movies(count):
+            for i in range(count):
+                movie = Movie(title='movie %d' % Movie.objects.count(), director=Director.objects.get(pk=1),
+                              oscar_award=None)
+                movie.save()
+                movie.actor.add(*Actor.objects.all())
+                movie.genre.add(Genre.objects.get())
+
+        queries = self.assertConstantQueries(reverse('movie-list'), add_movies)
+        # conditional GET state, movies, actors and genres
+        self.assertEqual(queries, 4)
+
+    def test_detail_view_renders_related_ids(self):
+        Genre(name='Drama').save()
+        movie = Movie(title='steven', director=Director.objects.get(pk=2), oscar_award=OscarAward.objects.get(pk=1))
+        movie.save()
+        movie.actor.add(Actor.objects.get(pk=1))
+        movie.genre.add(Genre.objects.get())
+
+        url = reverse('movie-detail', kwargs={'pk': movie.id})
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['director'], 2)
+        self.assertEqual(response.data['actor'], [1])
+        self.assertEqual(response.data['genre'], [1])
+
+    def test_export_streams_every_movie(self):
+        for i in range(5):
+            movie = Movie(title='movie %d' % i, director=Director.objects.get(pk=1))
+            movie.save()
+            movie.actor.add(Actor.objects.get(pk=2))
+
+        response = self.client.get(reverse('movie-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content).decode('utf-8'))
+        self.assertEqual([movie['id'] for movie in data], [1, 2, 3, 4, 5])
+        self.assertEqual(data[0]['actor'], [2])
+
+    def test_export_fetches_in_chunks(self):
+        for i in range(5):
+            Movie(title='movie %d' % i, director=Director.objects.get(pk=1)).save()
+
+        view = MovieViewSet(request=None, format_kwarg=None, kwargs={})
+        view.export_chunk_size = 2
+        with self.assertNumQueries(9):
+            content = b''.join(view.stream_export(view.get_queryset()))
+        self.assertEqual(len(json.loads(content.decode('utf-8'))), 5)
+
+    def test_export_of_empty_table(self):
+        response = self.client.get(reverse('movie-export'))
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+    def test_bulk_create_movies_with_relations(self):
+        Genre(name='Drama').save()
+        url = reverse('movie-bulk')
+        data = [
+            {'title': 'Jaws', 'director': 1, 'actor': [1, 2], 'genre': [1]},
+            {'title': 'Heat', 'director': 2, 'actor': [2], 'animated': True},
+            {'title': 'Jaws', 'director': 2},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 3)
+        self.assertEqual(Movie.objects.count(), 3)
+
+        jaws = Movie.objects.get(pk=response.data['created'][0])
+        self.assertEqual(jaws.title, 'Jaws')
+        self.assertEqual(jaws.director_id, 1)
+        self.assertEqual(sorted(jaws.actor.values_list('pk', flat=True)), [1, 2])
+        self.assertEqual(list(jaws.genre.values_list('pk', flat=True)), [1])
+        self.assertIsNotNone(jaws.created)
+        heat = Movie.objects.get(pk=response.data['created'][1])
+        self.assertTrue(heat.animated)
+        self.assertEqual(list(heat.actor.values_list('pk', flat=True)), [2])
+
+    def test_bulk_create_query_count_does_not_depend_on_batch_size(self):
+        url = reverse('movie-bulk')
+        counts = []
+        for size in (1, 10):
+            data = [{'title': 'movie %d %d' % (size, i), 'director': 1 + i % 2, 'actor': [1, 2]}
+                    for i in range(size)]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Movie.objects.count(), 11)
+
+    def test_bulk_create_rejects_duplicates(self):
+        Movie(title='Jaws', director=Director.objects.get(pk=1)).save()
+        url = reverse('movie-bulk')
+        data = [
+            {'title': 'Jaws', 'director': 1},
+            {'title': 'Heat', 'director': 1},
+            {'title': 'Heat', 'director': 1},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data[0])
+        self.assertEqual(response.data[1], {})
+        self.assertIn('non_field_errors', response.data[2])
+        self.assertEqual(Movie.objects.count(), 1)
+
+    def test_bulk_create_rejects_duplicate_oscar_awards(self):
+        Movie(title='Jaws', director=Director.objects.get(pk=1), oscar_award=OscarAward.objects.get(pk=1)).save()
+        url = reverse('movie-bulk')
+        first, second = [reverse('oscaraward-detail', kwargs={'pk': pk}) for pk in (1, 2)]
+        data = [
+            {'title': 'Heat', 'director': 1, 'oscar_award': first},
+            {'title': 'Alien', 'director': 1, 'oscar_award': second},
+            {'title': 'Rocky', 'director': 1, 'oscar_award': second},
+            {'title': 'Ronin', 'director': 1, 'oscar_award': None},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('oscar_award', response.data[0])
+        self.assertEqual(response.data[1], {})
+        self.assertIn('oscar_award', response.data[2])
+        self.assertEqual(response.data[3], {})
+        self.assertEqual(Movie.objects.count(), 1)
+
+    def test_bulk_create_checks_oscar_awards_with_one_query(self):
+        OscarAward(year=2001, category=oscar_categories_tuple[1][0]).save()
+        url = reverse('movie-bulk')
+        counts = []
+        for size, first in ((1, 1), (2, 2)):
+            data = [{'title': 'movie %d %d' % (size, i), 'director': 1,
+                     'oscar_award': reverse('oscaraward-detail', kwargs={'pk': first + i})} for i in range(size)]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(sum('IN (' in query['sql'] and '"oscar_award_id"' in query['sql']
+                              for query in context.captured_queries))
+        self.assertEqual(counts, [1, 1])
+
+    def test_bulk_create_rejects_unknown_relations(self):
+        url = reverse('movie-bulk')
+        data = [
+            {'title': 'Jaws', 'director': 1, 'actor': [1]},
+            {'title': 'Heat', 'director': 7, 'actor': [1, 9]},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('director', response.data[1])
+        self.assertIn('actor', response.data[1])
+        self.assertEqual(Movie.objects.count(), 0)
+
+    def test_create_resolves_actors_with_one_query(self):
+        for i in range(5):
+            Actor(name='actor', surname='%d' % i).save()
+        Genre(name='Drama').save()
+        Genre(name='Comedy').save()
+        data = {'title': 'steven', 'director': 1, 'actor': [1, 2, 3, 4, 5, 6, 7], 'genre': [1, 2]}
+        serializer = MovieSerializer(data=data, context={'request': None})
+        # director, actors, genres and the unique_together check
+        with self.assertNumQueries(4):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual([actor.pk for actor in serializer.validated_data['actor']], [1, 2, 3, 4, 5, 6, 7])
+
+    def test_create_reports_every_missing_actor(self):
+        url = reverse('movie-list')
+        data = {'title': 'steven', 'director': 1, 'actor': [1, 8, 2, 9]}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['actor'], ['Invalid pks [8, 9] - objects do not exist.'])
+        self.assertEqual(Movie.objects.count(), 0)
+
+    def test_create_rejects_malformed_actor(self):
+        url = reverse('movie-list')
+        data = {'title': 'steven', 'director': 1, 'actor': [1, 'x']}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('actor', response.data)
@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from movie_database.cache import DjangoCacheBackend, LRUCacheBackend, get_response_cache
+from movie_database.models import Genre, Director, Actor, Movie
+
+
+class TestResponseCache(APITransactionTestCase):
+    def setUp(self):
+        get_response_cache().invalidate()
+
+    def test_second_read_is_served_from_cache(self):
+        Genre(name='Comedy').save()
+        url = reverse('genre-list')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, response.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        url = reverse('genre-list')
+        self.client.get(url)
+        response = self.client.get(url + '?page_size=1')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_save_invalidates(self):
+        url = reverse('genre-list')
+        self.client.get(url)
+        Genre(name='Comedy').save()
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([genre['name'] for genre in response.data['results']], ['Comedy'])
+
+    def test_m2m_change_invalidates(self):
+        director = Director.objects.create(name='steven', surname='spilberg')
+        actor = Actor.objects.create(name='Bill', surname='Murray')
+        movie = Movie.objects.create(title='Jaws', director=director)
+        url = reverse('movie-detail', kwargs={'pk': movie.pk})
+        self.client.get(url)
+
+        actor.plays.add(movie)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['actor'], [actor.pk])
+
+    def test_bulk_create_invalidates(self):
+        director = Director.objects.create(name='steven', surname='spilberg')
+        url = reverse('movie-list')
+        self.client.get(url)
+
+        self.client.post(reverse('movie-bulk'), [{'title': 'Jaws', 'director': director.pk}], format='json')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_stats_count_hits_misses_and_invalidations(self):
+        cache = get_response_cache()
+        before = cache.stats()
+        url = reverse('genre-list')
+        self.client.get(url)
+        self.client.get(url)
+        Genre(name='Comedy').save()
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] - before['hits'], 1)
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+        self.assertEqual(stats['invalidations'] - before['invalidations'], 1)
+
+    def test_write_in_a_transaction_invalidates_after_it_commits(self):
+        backend = get_response_cache().backend
+        with transaction.atomic():
+            Genre(name='Comedy').save()
+            # a reader may still cache the old rows under this version
+            version = backend.get_version()
+        request_finished.send(sender=self.__class__)
+        self.assertNotEqual(backend.get_version(), version)
+
+    @override_settings(API_RESPONSE_CACHE={'BACKEND': 'django', 'ALIAS': 'default'})
+    def test_django_cache_backend(self):
+        url = reverse('genre-list')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        Genre(name='Comedy').save()
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+    @override_settings(API_RESPONSE_CACHE={'BACKEND': 'django', 'ALIAS': 'default'})
+    def test_dropped_version_does_not_revive_stale_entries(self):
+        caches['default'].delete(DjangoCacheBackend.version_key)
+        url = reverse('genre-list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        Genre(name='Comedy').save()
+        # e.g. culled by the file cache
+        caches['default'].delete(DjangoCacheBackend.version_key)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([genre['name'] for genre in response.data['results']], ['Comedy'])
+
+    @override_settings(API_RESPONSE_CACHE=None)
+    def test_disabled_cache(self):
+        url = reverse('genre-list')
+        self.client.get(url)
+        self.assertFalse(self.client.get(url).has_header('X-Cache'))
+
+
+class TestResponseCacheInTransaction(APITestCase):
+    def test_responses_read_in_a_transaction_are_not_stored(self):
+        url = reverse('genre-list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+
+class TestLRUCacheBackend(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        backend = LRUCacheBackend(max_entries=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+        self.assertEqual(backend.get('a'), 1)
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('c'), 3)
+
+    def test_version_bump_drops_entries(self):
+        backend = LRUCacheBackend()
+        backend.set('a', 1)
+        backend.incr_version()
+        self.assertEqual(backend.get_version(), 1)
+        self.assertIsNone(backend.get('a'))
+
+    def test_entries_expire(self):
+        backend = LRUCacheBackend(timeout=60)
+        with mock.patch('movie_database.cache.time.monotonic', return_value=100.0):
+            backend.set('a', 1)
+        with mock.patch('movie_database.cache.time.monotonic', return_value=159.0):
+            self.assertEqual(backend.get('a'), 1)
+        with mock.patch('movie_database.cache.time.monotonic', return_value=160.0):
+            self.assertIsNone(backend.get('a'))
@@ -0,0 +1,129 @@
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.utils.six import StringIO
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor, Director, Genre, Movie
+from movie_database.search import FTS5SearchBackend, ScanSearchBackend, get_search_backend
+
+
+class TestSearch(APITestCase):
+    def setUp(self):
+        self.spielberg = Director.objects.create(name='Steven', surname='Spielberg')
+        self.murray = Actor.objects.create(name='Bill', surname='Murray')
+        self.jaws = Movie.objects.create(title='Jaws', director=self.spielberg)
+        self.jaws2 = Movie.objects.create(title='Jaws the Revenge', director=self.spielberg)
+        self.drama = Genre.objects.create(name='Drama')
+
+    def search(self, query, **params):
+        params['q'] = query
+        response = self.client.get(reverse('search-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def found(self, query):
+        return [(item['type'], item['id']) for item in self.search(query).data['results']]
+
+    def test_uses_fts5_on_sqlite(self):
+        if connection.vendor == 'sqlite':
+            self.assertIsInstance(get_search_backend(), FTS5SearchBackend)
+
+    def test_matches_prefixes_of_every_word(self):
+        self.assertEqual(self.found('spiel'), [('director', self.spielberg.pk)])
+        self.assertEqual(self.found('STEVEN spielberg'), [('director', self.spielberg.pk)])
+        self.assertEqual(self.found('bill murr'), [('actor', self.murray.pk)])
+        self.assertEqual(self.found('dram'), [('genre', self.drama.pk)])
+        self.assertEqual(self.found('steven murray'), [])
+
+    def test_results(self):
+        item = self.search('murray').data['results'][0]
+        self.assertEqual(item, {
+            'url': 'http://testserver' + reverse('actor-detail', kwargs={'pk': self.murray.pk}),
+            'type': 'actor', 'id': self.murray.pk, 'text': 'Bill Murray'})
+
+    def test_results_are_ranked(self):
+        results = self.found('jaws')
+        self.assertEqual(set(results), {('movie', self.jaws.pk), ('movie', self.jaws2.pk)})
+        if not isinstance(get_search_backend(), ScanSearchBackend):
+            # the shorter title matches more closely
+            self.assertEqual(results[0], ('movie', self.jaws.pk))
+
+    def test_index_follows_writes(self):
+        self.murray.surname = 'Nighy'
+        self.murray.save()
+        self.assertEqual(self.found('murray'), [])
+        self.assertEqual(self.found('nighy'), [('actor', self.murray.pk)])
+        self.spielberg.delete()
+        self.assertEqual(self.found('jaws'), [])
+        self.assertEqual(self.found('spielberg'), [])
+
+    def test_index_follows_bulk_creates(self):
+        director = Director.objects.create(name='Andrzej', surname='Wajda')
+        data = [{'title': 'Kanal', 'director': director.pk}, {'title': 'Popiol i diament', 'director': director.pk}]
+        self.client.post(reverse('movie-bulk'), data, format='json')
+        self.assertEqual(len(self.found('diament')), 1)
+
+    def test_pages(self):
+        for i in range(5):
+            Movie.objects.create(title='Jaws %d' % i, director=self.spielberg)
+        first = self.search('jaws', page_size=3)
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        self.assertIsNone(third.data['next'])
+        ids = [item['id'] for page in (first, second, third) for item in page.data['results']]
+        self.assertEqual(sorted(ids), sorted(Movie.objects.values_list('pk', flat=True)))
+        previous = self.client.get(third.data['previous'])
+        self.assertEqual(previous.data['results'], second.data['results'])
+
+    def test_scan_fallback(self):
+        backend = ScanSearchBackend('default')
+        found = backend.search(['jaws'], 10)
+        self.assertEqual([document[:3] for document in found], [('movie', self.jaws.pk, 'Jaws'),
+                                                                ('movie', self.jaws2.pk, 'Jaws the Revenge')])
+        self.assertEqual([document[:3] for document in backend.search(['steven', 'spiel'], 10)],
+                         [('director', self.spielberg.pk, 'Steven Spielberg')])
+        self.assertEqual([document[:3] for document in backend.search(['jaws'], 10, found[0][3])],
+                         [('movie', self.jaws2.pk, 'Jaws the Revenge')])
+        self.assertEqual([document[:3] for document in backend.search(['jaws'], 10, found[1][3], reverse=True)],
+                         [('movie', self.jaws.pk, 'Jaws')])
+
+    def test_scan_fallback_pages_across_kinds(self):
+        Actor.objects.create(name='Steven', surname='Seagal')
+        backend = ScanSearchBackend('default')
+        first = backend.search(['steven'], 1)
+        self.assertEqual(first[0][:2], ('actor', Actor.objects.get(surname='Seagal').pk))
+        second = backend.search(['steven'], 1, first[0][3])
+        self.assertEqual(second[0][:2], ('director', self.spielberg.pk))
+        self.assertEqual(backend.search(['steven'], 1, second[0][3]), [])
+        self.assertEqual(backend.search(['steven'], 5, second[0][3], reverse=True), first)
+
+    def test_pages_read_only_the_page(self):
+        for i in range(5):
+            Movie.objects.create(title='Jaws %d' % i, director=self.spielberg)
+        backend = get_search_backend()
+        first = backend.search(['jaws'], 3)
+        self.assertEqual(len(first), 3)
+        rest = backend.search(['jaws'], 10, first[-1][3])
+        self.assertEqual(len(rest), 4)
+        self.assertFalse(set(document[1] for document in first) & set(document[1] for document in rest))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('search-list'), {'q': 'jaws', 'cursor': 'eyJyIjogMCwgInAiOiBbIngiXX0='})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_empty_query_is_rejected(self):
+        response = self.client.get(reverse('search-list'), {'q': ' ,. '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('q', response.data)
+
+    def test_rebuild_command(self):
+        get_search_backend().clear()
+        if get_search_backend().count() is not None:
+            self.assertEqual(self.found('jaws'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', chunk_size=1, stdout=out)
+        self.assertIn('Indexed 5 documents', out.getvalue())
+        self.assertEqual(len(self.found('jaws')), 2)
@@ -0,0 +1,53 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from movie_database.models import Actor, Director, Movie, Genre
+
+
+class TestSparseFields(APITestCase):
+    def setUp(self):
+        self.director = Director.objects.create(name='Steven', surname='Spielberg')
+        self.actor = Actor.objects.create(name='Bill', surname='Murray')
+        for title in ('Jaws', 'Heat'):
+            movie = Movie.objects.create(title=title, director=self.director)
+            movie.actor.add(self.actor)
+            movie.genre.add(Genre.objects.get_or_create(name='Drama')[0])
+
+    def test_list_keeps_requested_fields_only(self):
+        response = self.client.get(reverse('movie-list') + '?fields=id,title')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': 2, 'title': 'Heat'}, {'id': 1, 'title': 'Jaws'}])
+
+    def test_dropped_relations_are_not_prefetched(self):
+        # conditional GET state and the movies
+        with self.assertNumQueries(2) as context:
+            self.client.get(reverse('movie-list') + '?fields=id,title')
+        select = context.captured_queries[-1]['sql']
+        self.assertNotIn('"animated"', select)
+        self.assertNotIn('"director_id"', select)
+
+    def test_kept_relations_are_still_prefetched(self):
+        response = self.client.get(reverse('movie-list') + '?fields=title,actor')
+        self.assertEqual(response.data['results'][0], {'title': 'Heat', 'actor': [self.actor.pk]})
+
+    def test_detail(self):
+        url = reverse('actor-detail', kwargs={'pk': self.actor.pk})
+        response = self.client.get(url + '?fields=surname,url')
+        self.assertEqual(response.data, {'url': 'http://testserver' + url, 'surname': 'Murray'})
+
+    def test_unknown_fields_keep_full_representation(self):
+        response = self.client.get(reverse('genre-list') + '?fields=nope')
+        self.assertEqual(set(response.data['results'][0]), {'url', 'id', 'name', 'movie_genre'})
+
+    def test_pages_of_sparse_lists(self):
+        response = self.client.get(reverse('movie-list') + '?fields=id&page_size=1')
+        with self.assertNumQueries(2):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'id': 1}])
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post(reverse('movie-list') + '?fields=id', {'director': self.director.pk},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('title', response.data)
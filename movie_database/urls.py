@@ -10,11 +10,14 @@ router.register(r'oscarAwards', views.OscarAwardViewSet)
 router.register(r'actors', views.ActorViewSet)
 router.register(r'directors', views.DirectorViewSet)
 router.register(r'movies', views.MovieViewSet)
+router.register(r'search', views.SearchViewSet, base_name='search')
+router.register(r'autocomplete', views.AutocompleteViewSet, base_name='autocomplete')
 
 # The API URLs are now determined automatically by the router.
 # Additionally, we include the login URLs for the browsable API.
 
 urlpatterns = [
     url(r'^', include(router.urls)),
+    url(r'^metrics$', views.metrics, name='metrics'),
     url(r'^api-auth/', include('rest_framework.urls', namespace='rest_framework')),
 ]
@@ -1,11 +1,313 @@
-from rest_framework import viewsets
+import json
+from collections import OrderedDict
 
-from movie_database.models import Genre, OscarAward, Actor, Director, Movie
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import router
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status, viewsets
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.generics import get_object_or_404
+from rest_framework.relations import HyperlinkedRelatedField, ManyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from movie_database.async_views import AsyncReadMixin
+from movie_database.autocomplete import get_autocomplete_index
+from movie_database.cache import CachedResponseMixin
+from movie_database.compiled import compile_serializer
+from movie_database.conditional import ConditionalGetMixin
+from movie_database.fields import build_url_template, format_url
+from movie_database.filters import MovieFilter, MovieReadModelFilter, ActorFilter, DirectorFilter, OscarAwardFilter
+from movie_database.metrics import get_options as get_metrics_options, record_serialization
+from movie_database.models import Genre, OscarAward, Actor, Director, Movie, MovieReadModel
+from movie_database.pagination import KeysetPagination
+from movie_database.prometheus import CONTENT_TYPE, collect_metrics, render_metrics
+from movie_database.read_model import read_model_enabled
+from movie_database.search import get_search_backend, tokenize
+from movie_database.renderers import FastJSONRenderer
 from movie_database.serializers import GenreSerializer, OscarAwardSerializer, ActorSerializer, DirectorSerializer, \
     MovieSerializer
 
+_related_plans = {}
+
+
+def plan_related(serializer):
+    """
+    Return the `select_related` and `prefetch_related` lookups needed to
+    render the relations declared on `serializer` without per-row queries,
+    and the local columns its fields read.
+
+    Prefetch lookups are `(name, only)` pairs, where `only` lists the columns
+    to load when the field renders nothing but primary keys, or is `None`.
+    """
+    key = (serializer.__class__, tuple(serializer.fields))
+    if key not in _related_plans:
+        opts = serializer.Meta.model._meta
+        select_related, prefetch_related, columns = [], [], [opts.pk.name]
+        for field in serializer.fields.values():
+            if not field.source_attrs:
+                continue
+            try:
+                model_field = opts.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                columns.append(model_field.name)
+            if not model_field.is_relation:
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                only = None
+                if isinstance(field, ManyRelatedField) and field.child_relation.use_pk_only_optimization():
+                    only = (model_field.related_model._meta.pk.name,)
+                    if model_field.one_to_many:
+                        only += (model_field.field.name,)
+                prefetch_related.append((field.source_attrs[0], only))
+            else:
+                select_related.append(field.source_attrs[0])
+        _related_plans[key] = (tuple(select_related), tuple(prefetch_related), tuple(columns))
+    return _related_plans[key]
+
+
+def plan_queryset(queryset, serializer, ordering=()):
+    """
+    Apply the relation plan of `serializer` to `queryset`. When the
+    serializer renders a subset of its fields, only their columns and the
+    `ordering` columns are loaded.
+    """
+    select_related, prefetch_related, columns = plan_related(serializer)
+    if getattr(serializer, 'sparse_fields', False):
+        queryset = queryset.only(*(columns + tuple(ordering)))
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*[
+            Prefetch(name, queryset=queryset.model._meta.get_field(name).related_model.objects.only(*only))
+            if only else name
+            for name, only in prefetch_related
+        ])
+    return queryset
+
+
+class RelatedQuerysetMixin(object):
+    """
+    Applies the relation plan of the serializer to the queryset, so list
+    and detail views run a fixed number of queries. When the request asks
+    for a subset of the fields, only their columns are loaded.
+    """
+
+    def get_queryset(self):
+        return plan_queryset(super().get_queryset(), self.get_serializer(), self.get_ordering_columns())
+
+    def get_ordering_columns(self):
+        # the paginator reads the ordering columns of every page
+        ordering = [field.lstrip('-') for field in self.queryset.model._meta.ordering]
+        return ordering + list(getattr(self, 'ordering_fields', ()))
+
+
+class CompiledListMixin(object):
+    """
+    Renders `list` pages from `.values()` rows with the compiled form of the
+    serializer, skipping model instances and the per-field dispatch. Views
+    whose serializer cannot be compiled fall back to the regular `list`.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = compiled.values(self.filter_queryset(self.get_queryset()), self.get_ordering_columns())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.to_representation(page))
+        return Response(compiled.to_representation(queryset))
+
+
+class IncludedRelationsMixin(object):
+    """
+    Side-loads the relations named in the `include` query parameter into an
+    `included` section, e.g. `?include=director,actor`. Each relation is
+    fetched once for the whole page, so related objects shared by several
+    rows appear only once.
+
+    `included_relations` maps the includable field names to the section key
+    and serializer of the related objects.
+    """
+    include_query_param = 'include'
+    included_relations = {}
+
+    def get_included_relations(self):
+        requested = self.request.query_params.get(self.include_query_param)
+        if not requested:
+            return []
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.included_relations]
+        if unknown:
+            raise ValidationError({self.include_query_param: ['Unknown relations: %s.' % ', '.join(unknown)]})
+        return sorted(set(names), key=names.index)
+
+    def supports_conditional_get(self, request):
+        # included rows change without touching the listed ones
+        return not request.query_params.get(self.include_query_param)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        self.included_source = page
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        self.included_source = [obj]
+        return obj
+
+    def list(self, request, *args, **kwargs):
+        relations = self.get_included_relations()
+        response = super().list(request, *args, **kwargs)
+        return self.include_related(response, relations)
+
+    def retrieve(self, request, *args, **kwargs):
+        relations = self.get_included_relations()
+        response = super().retrieve(request, *args, **kwargs)
+        return self.include_related(response, relations)
+
+    def include_related(self, response, relations):
+        if not relations or response.status_code != status.HTTP_200_OK:
+            return response
+        pk_name = self.queryset.model._meta.pk.name
+        pks = [obj[pk_name] if isinstance(obj, dict) else obj.pk for obj in self.included_source]
+        context = dict(self.get_serializer_context(), sparse_fields=False)
+        included = OrderedDict()
+        for name in relations:
+            key, serializer_class = self.included_relations[name]
+            serializer = serializer_class(context=context)
+            field = self.queryset.model._meta.get_field(name)
+            queryset = serializer_class.Meta.model.objects.filter(**{'%s__in' % field.related_query_name(): pks})
+            queryset = plan_queryset(queryset.distinct(), serializer)
+            included[key] = serializer_class(queryset, many=True, context=context).data
+        response.data['included'] = included
+        return response
+
+
+class ReadModelMixin(object):
+    """
+    Serves `list` and `retrieve` from `read_model`, a table of pre-rendered
+    representations with relative URLs, while `API_MOVIE_READ_MODEL` is on.
+
+    Requests using query parameters other than the filters of
+    `read_model_filter_class`, pagination, ordering and `fields` fall back
+    to the regular views.
+    """
+    read_model = None
+    read_model_filter_class = None
+
+    def use_read_model(self):
+        if not read_model_enabled() or self.format_kwarg:
+            return False
+        params = set(self.read_model_filter_class.base_filters)
+        params.update((self.paginator.cursor_query_param, self.paginator.page_size_query_param,
+                       api_settings.ORDERING_PARAM, api_settings.URL_FORMAT_OVERRIDE,
+                       self.serializer_class.fields_query_param))
+        return set(self.request.query_params) <= params
+
+    def filter_read_model(self, queryset):
+        for backend in self.filter_backends:
+            if issubclass(backend, DjangoFilterBackend):
+                queryset = self.read_model_filter_class(self.request.query_params, queryset=queryset,
+                                                        request=self.request).qs
+            else:
+                queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    @record_serialization
+    def render_read_models(self, payloads):
+        """
+        Return the representations stored in `payloads`, narrowed to the
+        fields of the serializer and with absolute URLs.
+        """
+        fields = self.get_serializer().fields
+        urls = set(name for name, field in fields.items()
+                   if isinstance(getattr(field, 'child_relation', field), HyperlinkedRelatedField))
+        base = self.request.build_absolute_uri('/')[:-1]
+        data = []
+        for payload in payloads:
+            stored = json.loads(payload)
+            item = OrderedDict()
+            for name in fields:
+                value = stored[name]
+                if name in urls and value is not None:
+                    value = [base + url for url in value] if isinstance(value, list) else base + value
+                item[name] = value
+            data.append(item)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_read_model():
+            return super().list(request, *args, **kwargs)
+
+        columns = set([self.read_model._meta.pk.name, 'data'] + self.get_ordering_columns())
+        queryset = self.filter_read_model(self.read_model.objects.all()).values(*columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.render_read_models(row['data'] for row in page))
+        return Response(self.render_read_models(row['data'] for row in queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_read_model():
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_read_model(self.read_model.objects.all()).values('data')
+        row = get_object_or_404(queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return Response(self.render_read_models([row['data']])[0])
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Yield the rows of `queryset` as lists of at most `chunk_size` instances,
+    walking the primary key so every chunk also gets its own prefetches;
+    `QuerySet.iterator()` ignores `prefetch_related` before Django 4.1, with
+    or without `chunk_size`.
+    """
+    queryset = queryset.order_by('pk')
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+        chunk = list(queryset.filter(pk__gt=chunk[-1].pk)[:chunk_size])
+
+
+class StreamingExportMixin(object):
+    """
+    Adds an unpaginated `export` route streaming every row as one JSON array,
+    serialized chunk by chunk so memory use does not grow with the table.
+    """
+    export_chunk_size = getattr(settings, 'API_EXPORT_CHUNK_SIZE', 500)
+
+    @list_route(methods=['get'])
+    def export(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(self.stream_export(queryset), content_type='application/json')
+
+    def stream_export(self, queryset):
+        renderer = FastJSONRenderer()
+        yield b'['
+        separator = b''
+        for chunk in iter_chunks(queryset, self.export_chunk_size):
+            data = renderer.render(self.get_serializer(chunk, many=True).data)
+            yield separator + data[1:-1]
+            separator = b','
+        yield b']'
+
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(AsyncReadMixin, CachedResponseMixin, CompiledListMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     This viewset automatically provides `list`, `create`, `retrieve`,
     `update` and `destroy` actions.
@@ -13,12 +315,17 @@ class GenreViewSet(viewsets.ModelViewSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    pagination_class = KeysetPagination
+    filter_backends = (OrderingFilter,)
+    # only indexed columns, so ordering never needs a full sort
+    ordering_fields = ('name', 'id')
 
     def perform_create(self, serializer):
         serializer.save()
 
 
-class OscarAwardViewSet(viewsets.ModelViewSet):
+class OscarAwardViewSet(AsyncReadMixin, CachedResponseMixin, CompiledListMixin, RelatedQuerysetMixin,
+                        viewsets.ModelViewSet):
     """
     This viewset automatically provides `list`, `create`, `retrieve`,
     `update` and `destroy` actions.
@@ -26,12 +333,18 @@ class OscarAwardViewSet(viewsets.ModelViewSet):
 
     queryset = OscarAward.objects.all()
     serializer_class = OscarAwardSerializer
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filter_class = OscarAwardFilter
+    # only indexed columns, so ordering never needs a full sort
+    ordering_fields = ('year', 'id')
 
     def perform_create(self, serializer):
         serializer.save()
 
 
-class ActorViewSet(viewsets.ModelViewSet):
+class ActorViewSet(AsyncReadMixin, ConditionalGetMixin, CachedResponseMixin, CompiledListMixin,
+                   StreamingExportMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     This viewset automatically provides `list`, `create`, `retrieve`,
     `update` and `destroy` actions.
@@ -39,12 +352,18 @@ class ActorViewSet(viewsets.ModelViewSet):
 
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filter_class = ActorFilter
+    # only indexed columns, so ordering never needs a full sort
+    ordering_fields = ('surname', 'id')
 
     def perform_create(self, serializer):
         serializer.save()
 
 
-class DirectorViewSet(viewsets.ModelViewSet):
+class DirectorViewSet(AsyncReadMixin, ConditionalGetMixin, CachedResponseMixin, CompiledListMixin,
+                      StreamingExportMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     This viewset automatically provides `list`, `create`, `retrieve`,
     `update` and `destroy` actions.
@@ -52,12 +371,18 @@ class DirectorViewSet(viewsets.ModelViewSet):
 
     queryset = Director.objects.all()
     serializer_class = DirectorSerializer
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filter_class = DirectorFilter
+    # only indexed columns, so ordering never needs a full sort
+    ordering_fields = ('surname', 'id')
 
     def perform_create(self, serializer):
         serializer.save()
 
 
-class MovieViewSet(viewsets.ModelViewSet):
+class MovieViewSet(AsyncReadMixin, ConditionalGetMixin, CachedResponseMixin, IncludedRelationsMixin, ReadModelMixin,
+                   CompiledListMixin, StreamingExportMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     This viewset automatically provides `list`, `create`, `retrieve`,
     `update` and `destroy` actions.
@@ -65,6 +390,143 @@ class MovieViewSet(viewsets.ModelViewSet):
 
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filter_class = MovieFilter
+    # only indexed columns, so ordering never needs a full sort
+    ordering_fields = ('title', 'id')
+    read_model = MovieReadModel
+    read_model_filter_class = MovieReadModelFilter
+    included_relations = {
+        'director': ('directors', DirectorSerializer),
+        'actor': ('actors', ActorSerializer),
+        'genre': ('genres', GenreSerializer),
+        'oscar_award': ('oscarAwards', OscarAwardSerializer),
+    }
 
     def perform_create(self, serializer):
         serializer.save()
+
+    @list_route(methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create a list of movies in one transaction and return their ids.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        movies = serializer.save()
+        return Response({'created': [movie.pk for movie in movies]}, status=status.HTTP_201_CREATED)
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    Ranked full-text search over movie titles, actors, directors and genres,
+    e.g. `/search/?q=spiel`. Every word of the query matches as a prefix.
+    Results are paged with `cursor` and `page_size`; the cursor holds the
+    rank of the last result, so deep pages cost as much as the first one.
+    """
+    search_query_param = 'q'
+    view_names = {
+        'movie': 'movie-detail',
+        'actor': 'actor-detail',
+        'director': 'director-detail',
+        'genre': 'genre-detail',
+    }
+
+    def list(self, request, *args, **kwargs):
+        tokens = tokenize(request.query_params.get(self.search_query_param, ''))
+        if not tokens:
+            raise ValidationError({self.search_query_param: ['Enter at least one word to search for.']})
+        paginator = KeysetPagination()
+        page_size = paginator.get_page_size(request)
+        reverse, position = paginator.decode_cursor(request)
+        backend = get_search_backend(router.db_for_read(Movie))
+        if position is not None and not backend.valid_position(position):
+            raise NotFound(paginator.invalid_cursor_message)
+
+        documents = backend.search(tokens, page_size + 1, position, reverse)
+        has_more = len(documents) > page_size
+        documents = documents[:page_size]
+        if reverse:
+            documents.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        url = request.build_absolute_uri()
+        next_link = previous_link = None
+        if has_next and documents:
+            next_link = paginator.cursor_url(url, False, documents[-1][3])
+        if has_previous and documents:
+            previous_link = paginator.cursor_url(url, True, documents[0][3])
+
+        templates = {}
+        results = []
+        for kind, pk, text, position in documents:
+            if kind not in templates:
+                templates[kind] = build_url_template(self.view_names[kind], request, self.format_kwarg)
+            results.append(OrderedDict([('url', format_url(templates[kind], pk)), ('type', kind), ('id', pk),
+                                        ('text', text)]))
+        return Response(OrderedDict([
+            ('next', next_link),
+            ('previous', previous_link),
+            ('results', results)
+        ]))
+
+
+class AutocompleteViewSet(viewsets.ViewSet):
+    """
+    Typeahead over movie titles and actor and director surnames, e.g.
+    `/autocomplete/?q=spi`, answered from an index kept in memory by every
+    worker without querying the database. `limit` caps the results.
+    """
+    search_query_param = 'q'
+    limit_query_param = 'limit'
+    default_limit = 10
+    max_limit = 50
+    view_names = {
+        'movie': 'movie-detail',
+        'actor': 'actor-detail',
+        'director': 'director-detail',
+    }
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def list(self, request, *args, **kwargs):
+        prefix = request.query_params.get(self.search_query_param, '').strip()
+        if not prefix:
+            raise ValidationError({self.search_query_param: ['Enter the beginning of a title or a surname.']})
+        entries = get_autocomplete_index().search(prefix, self.get_limit())
+
+        templates = {}
+        results = []
+        for kind, pk, text in entries:
+            if kind not in templates:
+                templates[kind] = build_url_template(self.view_names[kind], request, self.format_kwarg)
+            results.append(OrderedDict([('url', format_url(templates[kind], pk)), ('type', kind), ('id', pk),
+                                        ('text', text)]))
+        return Response(OrderedDict([('results', results)]))
+
+
+@require_GET
+def metrics(request):
+    """
+    The metrics of every worker in the Prometheus text format. Scrapers
+    send `API_METRICS['TOKEN']` as a bearer token; without a token the
+    metrics are served only with `DEBUG` on.
+    """
+    options = get_metrics_options()
+    if options is None:
+        raise Http404
+    token = options['TOKEN']
+    if not token and not settings.DEBUG:
+        raise Http404
+    if token and not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), 'Bearer ' + token):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(render_metrics(collect_metrics()), content_type=CONTENT_TYPE)